@@ -0,0 +1,82 @@
+"""
+Database settings from environment variables.
+
+    DB_ENGINE              default django.db.backends.postgresql
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+    DB_CONN_MAX_AGE        seconds to keep a connection between requests (default 60, 0 = close per request)
+    DB_CONN_HEALTH_CHECKS  ping reused connections before a request uses them (default on)
+    DB_POOL                use psycopg's connection pool instead of persistent connections (default off)
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT
+                           pool bounds per process (default 2, 10) and seconds to wait for a free connection (10)
+    DB_REPLICA_HOST        adds a read replica alias (see quizzes/db_routing.py); same settings as the
+                           primary unless DB_REPLICA_PORT, DB_REPLICA_NAME, DB_REPLICA_USER or
+                           DB_REPLICA_PASSWORD are set. Pointing it at the primary's host gives a local
+                           two-alias setup.
+
+Persistent connections keep one connection per worker thread. The pool shares
+a bounded set per process, which is what caps connections against Postgres'
+`max_connections` when there are many threads, and is the option to use under
+ASGI (where Django does not reuse persistent connections across requests).
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def env_bool(env, name, default):
+    value = env.get(name)
+    return default if value is None else value.strip().lower() in TRUE_VALUES
+
+
+def env_int(env, name, default):
+    value = env.get(name)
+    try:
+        return default if value is None else int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f'{name} must be an integer, got {value!r}')
+
+
+def database_from_env(env):
+    """Builds a DATABASES entry from a mapping of environment variables."""
+    config = {
+        'ENGINE': env.get('DB_ENGINE', 'django.db.backends.postgresql'),
+        'NAME': env.get('DB_NAME', 'quizwiz_db'),
+        'USER': env.get('DB_USER', 'mel_wizard'),
+        'PASSWORD': env.get('DB_PASSWORD', 'MagicWithin4!'),
+        'HOST': env.get('DB_HOST', 'localhost'),
+        'PORT': env.get('DB_PORT', '5432'),
+    }
+    if env_bool(env, 'DB_POOL', False):
+        if config['ENGINE'] != 'django.db.backends.postgresql':
+            raise ImproperlyConfigured('DB_POOL requires the postgresql engine.')
+        # The pool replaces persistent connections (Django rejects both at once) and health-checks itself
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS'] = {
+            'pool': {
+                'min_size': env_int(env, 'DB_POOL_MIN_SIZE', 2),
+                'max_size': env_int(env, 'DB_POOL_MAX_SIZE', 10),
+                'timeout': env_int(env, 'DB_POOL_TIMEOUT', 10),
+            },
+        }
+    else:
+        config['CONN_MAX_AGE'] = env_int(env, 'DB_CONN_MAX_AGE', 60)
+        config['CONN_HEALTH_CHECKS'] = env_bool(env, 'DB_CONN_HEALTH_CHECKS', True)
+    return config
+
+
+def replica_from_env(env, primary):
+    """Builds the replica DATABASES entry from DB_REPLICA_* variables, or returns None."""
+    if not env.get('DB_REPLICA_HOST'):
+        return None
+    replica = {
+        **primary,
+        'HOST': env['DB_REPLICA_HOST'],
+        # In tests the replica is the test database itself, not a second one
+        'TEST': {'MIRROR': 'default'},
+    }
+    for setting in ('PORT', 'NAME', 'USER', 'PASSWORD'):
+        replica[setting] = env.get(f'DB_REPLICA_{setting}', primary[setting])
+    if 'OPTIONS' in primary:
+        # Each alias gets its own pool
+        replica['OPTIONS'] = {key: dict(value) if isinstance(value, dict) else value for key, value in primary['OPTIONS'].items()}
+    return replica
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .db_config import database_from_env, replica_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'quizzes.metrics.MetricsMiddleware',
+    'quizzes.db_routing.PrimaryPinningMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -76,16 +81,18 @@ WSGI_APPLICATION = 'quiz_wizard.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection, persistence and pooling options come from DB_* environment
+# variables; see quiz_wizard/db_config.py.
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'quizwiz_db',
-        'USER': 'mel_wizard',
-        'PASSWORD': 'MagicWithin4!',
-        'HOST': 'localhost',
-        'PORT': '5432',
-    }
+    'default': database_from_env(os.environ),
 }
+if replica := replica_from_env(os.environ, DATABASES['default']):
+    DATABASES['replica'] = replica
+
+# Quiz content and completed results are read from the replica when one is
+# configured; writes and in-progress attempts use the primary.
+DATABASE_ROUTERS = ['quizzes.db_routing.PrimaryReplicaRouter']
 
 
 # Password validation
@@ -130,3 +137,76 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# orjson-based JSON rendering and parsing (see quizzes/renderers.py).
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'quizzes.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'quizzes.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Quiz question plans (see quizzes/question_plan.py) are cached in-process.
+# Set this to a CACHES alias to also share built plans between worker processes.
+QUIZ_QUESTION_PLAN_CACHE = None
+
+# CACHES alias holding rendered quiz payloads (see quizzes/http_caching.py).
+QUIZ_RENDERED_CACHE = 'default'
+
+# Per-endpoint metrics (see quizzes/metrics.py), exposed at /api/metrics/.
+QUIZ_METRICS = {
+    'SLOW_QUERY_MS': 100,  # Queries at least this slow are sampled at /api/metrics/slow_queries/
+    'SLOW_QUERY_SAMPLES': 50,
+}
+
+# Read routing (see quizzes/db_routing.py).
+QUIZ_DB_ROUTING = {
+    'REPLICA': 'replica',  # DATABASES alias for reads; routing is off when the alias is not configured
+    'PIN_SECONDS': 5,  # How long a client, and a just-completed attempt's results, stay on the primary
+}
+
+# Cache-backed state for in-progress attempts (see quizzes/attempt_state.py).
+QUIZ_ATTEMPT_STATE = {
+    'ENABLED': False,  # Keep attempt cursors (and, write-behind, answers) in the cache and write them in batches
+    'CACHE': 'default',  # CACHES alias; use a shared backend when several processes serve attempts
+    'DURABILITY': 'write-through',  # 'write-through' writes each answer before responding; 'write-behind' buffers answers too
+    'FLUSH_EVERY': 10,  # Answers per database flush; completing an attempt always flushes
+}
+
+# Regrading stored answers when an answer key changes in the admin (see quizzes/regrading.py).
+QUIZ_REGRADING = {
+    'BACKGROUND_THRESHOLD': 5000,  # Questions with more stored answers are regraded in a background thread
+}
+
+# Admission control for exam-start spikes (see quizzes/admission.py).
+QUIZ_ADMISSION = {
+    'ENABLED': False,  # Throttle with token buckets and shed excess concurrent requests with 429 + Retry-After
+    'CACHE': 'default',  # CACHES alias holding the token buckets; use a shared backend when several processes serve the API
+    'MAX_CONCURRENT_WRITES': 16,  # Write requests (POST, PUT, PATCH, DELETE) in flight per process
+    'QUEUE_SECONDS': 0.1,  # How long a request waits for a free slot before it is shed
+    'RETRY_AFTER': 1,  # Retry-After (seconds) sent with shed requests
+    # Per "<ViewSet>.<action>" (the names /api/metrics/ reports): token buckets per 'student' and per 'quiz'
+    # ({'rate': 'N/period', 'burst': tokens}; burst defaults to N) and a 'concurrency' cap per process
+    'ACTIONS': {
+        'AttemptViewSet.create': {
+            'student': {'rate': '10/min', 'burst': 5},
+            'quiz': {'rate': '50/s', 'burst': 200},
+            'concurrency': 8,
+        },
+        'AttemptViewSet.current_question': {
+            'student': {'rate': '120/min', 'burst': 20},
+            'quiz': {'rate': '200/s', 'burst': 400},
+        },
+        'AttemptViewSet.answer': {
+            'student': {'rate': '120/min', 'burst': 20},
+        },
+        'AttemptViewSet.bulk_answers': {
+            'student': {'rate': '10/min', 'burst': 5},
+        },
+    },
+}
@@ -1,8 +1,19 @@
 from django.contrib import admin
 from .models import Quiz, Student, MCQ, Choice, FTQ, Attempt, Answer
+from .regrading import schedule_regrade
 
 # To make the admin interface more user-friendly, we can customize how models are displayed.
 
+def regrade_answers(model_admin, request, question, mcq_ids=None, ftq_ids=None):
+    """Regrades the answers to an edited question (see quizzes/regrading.py) and tells the admin user what happened."""
+    if question.quiz_id is None:
+        return
+    result = schedule_regrade(question.quiz_id, mcq_ids, ftq_ids)
+    if result is None:
+        model_admin.message_user(request, 'Regrading this question\'s answers in the background.')
+    else:
+        model_admin.message_user(request, f'Regraded {result.answers} answer(s); {result.attempts} attempt(s) changed.')
+
 class ChoiceInline(admin.TabularInline):
     """
     Allows editing Choices directly within the MCQ admin page.
@@ -17,15 +28,30 @@ class MCQAdmin(admin.ModelAdmin):
     list_display = ('question', 'quiz')
     inlines = [ChoiceInline]
 
+    def save_related(self, request, form, formsets, change):
+        """Regrades stored answers once the question and its choices are saved with new points or correct choices."""
+        super().save_related(request, form, formsets, change)
+        if change and ('points' in form.changed_data or any(formset.has_changed() for formset in formsets)):
+            regrade_answers(self, request, form.instance, mcq_ids=[form.instance.pk])
+
 @admin.register(FTQ)
 class FTQAdmin(admin.ModelAdmin):
     """Custom admin view for Free Text Questions."""
-    list_display = ('question', 'quiz', 'points')
+    list_display = ('question', 'quiz', 'points', 'grading_policy')
+    regraded_fields = {'points', 'accepted_answers', 'grading_policy', 'max_edits'}
+
+    def save_related(self, request, form, formsets, change):
+        """Regrades stored answers once the question is saved with a new answer key or points."""
+        super().save_related(request, form, formsets, change)
+        if change and self.regraded_fields.intersection(form.changed_data):
+            regrade_answers(self, request, form.instance, ftq_ids=[form.instance.pk])
 
 @admin.register(Quiz)
 class QuizAdmin(admin.ModelAdmin):
     """Custom admin view for Quizzes."""
     list_display = ('name',)
+    # Maintained by the question signals; editing them here would only be overwritten or go stale
+    readonly_fields = Quiz.DERIVED_FIELDS
     # You could add inlines for MCQs and FTQs here if you wanted to edit questions from the quiz page
     # but it can get crowded. Managing them separately is often cleaner.
 
@@ -0,0 +1,214 @@
+"""
+Admission control for exam-start spikes.
+
+When a whole class starts a quiz at once, every `create` and
+`current_question` request reaches the database together and latency
+collapses for everyone. With QUIZ_ADMISSION['ENABLED'], two checks run before
+a viewset action's handler:
+
+- Token buckets (`TokenBucketThrottle`, a DRF throttle): each action can give
+  every student and every quiz a bucket of `burst` tokens refilled at `rate`
+  (QUIZ_ADMISSION['ACTIONS']['<ViewSet>.<action>']). A request takes one
+  token from each of its buckets; an empty bucket answers 429 with a
+  Retry-After of the time until the next token. Buckets live in a Django
+  cache, so point QUIZ_ADMISSION['CACHE'] at a shared backend when several
+  processes serve the API. A bucket is one cache value, the time it will be
+  full again (the GCRA form of a token bucket), read and written without a
+  lock: concurrent requests for the same bucket can occasionally both take
+  the last token.
+- Concurrency limiters (`acquire_slots`): write requests share a cap of
+  MAX_CONCURRENT_WRITES in flight per process, and an action can set its own
+  `concurrency` cap. A request waits at most QUEUE_SECONDS for a slot and is
+  otherwise shed with 429 and a Retry-After of RETRY_AFTER seconds, instead of
+  queueing for a database connection.
+
+Viewsets opt in with `AdmissionControlMixin` and say which student and quiz a
+request belongs to through `admission_scopes`. Action names are the ones
+/api/metrics/ reports. The async read views (quizzes/async_views.py) are not
+throttled.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .models import Attempt
+
+SCOPES = ('student', 'quiz')
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# An attempt's student and quiz never change
+ATTEMPT_SCOPES_TIMEOUT = 24 * 60 * 60
+
+
+def _settings():
+    return {
+        'ENABLED': False,
+        'CACHE': 'default',
+        'MAX_CONCURRENT_WRITES': 16,
+        'QUEUE_SECONDS': 0.1,
+        'RETRY_AFTER': 1,
+        'ACTIONS': {},
+        **getattr(settings, 'QUIZ_ADMISSION', {}),
+    }
+
+
+def action_label(view):
+    return f'{type(view).__name__}.{view.action}'
+
+
+def parse_rate(rate):
+    """Splits a DRF-style rate ('30/min', '5/s') into (requests, period in seconds)."""
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period[0]]
+
+
+# --- Token buckets ---
+
+def take_token(cache, key, rate, burst=None, now=None):
+    """
+    Takes a token from the bucket stored under `key`, which holds at most
+    `burst` tokens (default: the rate's request count) and refills at `rate`.
+    Returns 0 if a token was taken, otherwise the seconds until one is available.
+    """
+    requests, period = parse_rate(rate)
+    interval = period / requests
+    capacity = (burst or requests) * interval
+    now = time.time() if now is None else now
+    full_at = max(cache.get(key, now), now) + interval
+    if full_at - now > capacity:
+        return full_at - now - capacity
+    # Expires once the bucket is full again, when it is no different from a missing one
+    cache.set(key, full_at, math.ceil(full_at - now))
+    return 0
+
+
+def attempt_scopes(attempt_id):
+    """The student and quiz of an attempt, cached so throttling attempt requests needs no query."""
+    try:
+        attempt_id = int(attempt_id)
+    except (TypeError, ValueError):
+        return {}
+    cache = caches[_settings()['CACHE']]
+    key = f'quizzes:admission:attempt:{attempt_id}'
+    owner = cache.get(key)
+    if owner is None:
+        owner = Attempt.objects.filter(pk=attempt_id).values_list('student_id', 'quiz_id').first()  # type: ignore
+        if owner is None:
+            return {}
+        cache.set(key, owner, ATTEMPT_SCOPES_TIMEOUT)
+    return {'student': owner[0], 'quiz': owner[1]}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Takes a token from the action's student and quiz buckets (see the module docstring)."""
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        options = _settings()
+        label = action_label(view)
+        limits = options['ACTIONS'].get(label) if options['ENABLED'] else None
+        if not limits or not any(scope in limits for scope in SCOPES):
+            return True
+        scope_ids = view.admission_scopes(request)
+        cache = caches[options['CACHE']]
+        for scope in SCOPES:
+            if scope not in limits:
+                continue
+            try:
+                scope_id = int(scope_ids.get(scope))
+            except (TypeError, ValueError):
+                # Unknown or malformed ids are left to the view to reject
+                continue
+            wait = take_token(cache, f'quizzes:admission:{label}:{scope}:{scope_id}', limits[scope]['rate'], limits[scope].get('burst'))
+            if wait:
+                self.retry_after = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+# --- Concurrency limiters ---
+
+class ConcurrencyLimiter:
+    """A cap on requests in flight in this process."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def acquire(self, timeout):
+        return self._slots.acquire(timeout=timeout)
+
+    def release(self):
+        self._slots.release()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(name, limit):
+    """The process-wide limiter called `name`, replaced when its configured limit changes."""
+    with _limiters_lock:
+        current = _limiters.get(name)
+        if current is None or current.limit != limit:
+            current = _limiters[name] = ConcurrencyLimiter(limit)
+        return current
+
+
+def acquire_slots(request, view):
+    """
+    Takes a slot in the write limiter (for unsafe methods) and in the action's
+    own limiter, if it has one. Returns the limiters held, for `release_slots`;
+    raises Throttled (429 with Retry-After) when a slot does not free up
+    within QUEUE_SECONDS.
+    """
+    options = _settings()
+    if not options['ENABLED']:
+        return []
+    wanted = []
+    if request.method not in SAFE_METHODS and options['MAX_CONCURRENT_WRITES']:
+        wanted.append(limiter('writes', options['MAX_CONCURRENT_WRITES']))
+    label = action_label(view)
+    concurrency = options['ACTIONS'].get(label, {}).get('concurrency')
+    if concurrency:
+        wanted.append(limiter(label, concurrency))
+    held = []
+    for candidate in wanted:
+        if not candidate.acquire(options['QUEUE_SECONDS']):
+            release_slots(held)
+            raise Throttled(wait=options['RETRY_AFTER'], detail='Too many requests in progress.')
+        held.append(candidate)
+    return held
+
+
+def release_slots(held):
+    for slot in held:
+        slot.release()
+
+
+class AdmissionControlMixin:
+    """DRF viewset hooks: the token-bucket throttle, and a limiter slot held while the action runs."""
+    throttle_classes = [TokenBucketThrottle]
+
+    def admission_scopes(self, request):
+        """The request's {'student': id, 'quiz': id} for the token buckets; a missing scope is not throttled."""
+        return {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._admission_slots = acquire_slots(request, self)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._admission_slots = []
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            release_slots(self._admission_slots)
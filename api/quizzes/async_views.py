@@ -0,0 +1,105 @@
+"""
+Native async versions of the read-heavy endpoints, served under /api/async/.
+
+    GET /api/async/quizzes/
+    GET /api/async/quizzes/{id}/
+    GET /api/async/attempts/{id}/current_question/
+    GET /api/async/attempts/{id}/results/
+
+Under ASGI these run on the event loop instead of taking a worker thread for
+the whole request: database reads use the async ORM (`aget`, `afirst`,
+`async for`) and cached bodies and question plans are served without leaving
+the loop. Payloads, status codes, ETags and Cache-Control headers are the same
+as the DRF viewsets in quizzes/views.py; payloads are only built (see
+quizzes/projections.py) once everything they read has been loaded. Writes
+stay on the synchronous endpoints.
+"""
+import hashlib
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+from .attempt_state import acurrent_position, entry_at
+from .http_caching import acached_json_response, quiz_etag
+from .models import Attempt, Quiz
+from .projections import aload_question, attempt_results_payload, current_question_payload
+from .question_plan import aget_question_plan
+from .renderers import render_json
+from .results import AttemptResults
+from . import snapshots
+from .serializers import QuizListSerializer
+from .snapshots import asnapshot_body
+from .views import QuizViewSet
+
+
+def _json_response(data, status=200):
+    return HttpResponse(render_json(data), status=status, content_type='application/json')
+
+
+def _not_found(model):
+    return _json_response({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+@require_safe
+async def quiz_list(request):
+    fields = QuizListSerializer.Meta.fields
+    rows = [row async for row in Quiz.objects.order_by('name').values_list(*fields, 'content_version')]  # type: ignore
+    digest = hashlib.sha1(repr(rows).encode()).hexdigest()
+
+    async def render():
+        return [dict(zip(fields, row)) for row in rows]
+
+    return await acached_json_response(
+        request,
+        etag=f'"quizzes-{digest}"',
+        cache_key=f'quizzes:rendered:list:{digest}',
+        render=render,
+        cache_control=QuizViewSet.content_cache_control
+    )
+
+
+@require_safe
+async def quiz_detail(request, pk):
+    quiz = await Quiz.objects.only('id', 'content_version').filter(pk=pk).afirst()  # type: ignore
+    if quiz is None:
+        return _not_found(Quiz)
+    variant = snapshots.STUDENT
+    return await acached_json_response(
+        request,
+        etag=quiz_etag(quiz.pk, quiz.content_version, variant),
+        cache_key=f'quizzes:rendered:{variant}:{quiz.pk}:{quiz.content_version}',
+        render_body=lambda: asnapshot_body(quiz, variant),
+        cache_control=QuizViewSet.content_cache_control
+    )
+
+
+@require_safe
+async def current_question(request, pk):
+    attempt = await Attempt.objects.select_related('quiz').filter(pk=pk).afirst()  # type: ignore
+    if attempt is None:
+        return _not_found(Attempt)
+    if attempt.time_end:
+        return _json_response({'error': 'Quiz already completed'}, status=400)
+
+    plan = await aget_question_plan(attempt.quiz)
+    if not plan:
+        return _json_response({'error': 'No questions found for this quiz'}, status=404)
+
+    position = await acurrent_position(attempt, plan)
+    if position is None:
+        return _json_response({'error': 'No questions found for this quiz'}, status=404)
+    row = await aload_question(entry_at(attempt, plan, position))
+    return _json_response(current_question_payload(row, position, len(attempt.question_order), attempt.quiz_id))
+
+
+@require_safe
+async def attempt_results(request, pk):
+    attempt = await Attempt.objects.select_related('student', 'quiz').filter(pk=pk).afirst()  # type: ignore
+    if attempt is None:
+        return _not_found(Attempt)
+    if not attempt.time_end:
+        return _json_response({'error': 'Quiz not yet completed'}, status=400)
+
+    # Load the answers up front (the totals are stored on the attempt and quiz)
+    attempt._results_cache = await AttemptResults.aload(attempt)
+    return _json_response(attempt_results_payload(attempt))
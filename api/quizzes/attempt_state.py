@@ -0,0 +1,447 @@
+"""
+Cache-backed state for in-progress attempts.
+
+Without it, every `answer` POST locks, writes and re-totals an `Answer` and
+then writes the `Attempt` row again just to move its cursor. With
+QUIZ_ATTEMPT_STATE['ENABLED'], an in-progress attempt's cursor, answered
+bitmap and buffered answers live in a Django cache under
+`quizzes:attempt-state:{id}` and are written to the database in batches.
+locmem (the default cache) is fine for a single process; when several
+processes serve attempts, point QUIZ_ATTEMPT_STATE['CACHE'] at a shared
+backend (Redis, Memcached).
+
+Durability modes:
+
+- write-through: each answer is written to the database before the response,
+  as without the engine; only cursor moves are batched.
+- write-behind: answers are buffered in the cache too and written with one
+  `record_answers` call per batch.
+
+The state is flushed every FLUSH_EVERY answers, always when the attempt is
+completed (in the same transaction as the completion), before `bulk_answers`,
+and by the `flush_attempt_state` command (e.g. from cron, or before a deploy
+that clears the cache). A state missing from the cache is rebuilt from the
+database, with the cursor moved past the furthest stored answer, so losing
+the cache loses nothing in write-through mode and at most the last
+FLUSH_EVERY - 1 answers (which are asked again) in write-behind mode.
+
+Requests for one attempt are serialized with a lock in the same cache
+(`cache.add`). While the engine is on, the database cursor and running totals
+of an in-progress attempt may lag behind the cache; completed attempts are
+always fully written.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Attempt
+from .scoring import complete_attempt, record_answer, record_answers
+
+WRITE_THROUGH = 'write-through'
+WRITE_BEHIND = 'write-behind'
+DURABILITY_MODES = (WRITE_THROUGH, WRITE_BEHIND)
+
+
+class AttemptBusy(Exception):
+    """Raised when another request holds an attempt's state for longer than LOCK_TIMEOUT."""
+
+
+def _settings():
+    return {
+        'ENABLED': False,
+        'CACHE': 'default',
+        'DURABILITY': WRITE_THROUGH,
+        'FLUSH_EVERY': 10,
+        'TIMEOUT': 24 * 60 * 60,
+        'LOCK_TIMEOUT': 5,
+        **getattr(settings, 'QUIZ_ATTEMPT_STATE', {}),
+    }
+
+
+def enabled():
+    return bool(_settings()['ENABLED'])
+
+
+def state_key(attempt_id):
+    return f'quizzes:attempt-state:{attempt_id}'
+
+
+# --- Question order and cursor ---
+#
+# An attempt walks a fixed question order (`Attempt.question_order`), taken from
+# the quiz's plan when it starts, with an integer cursor into it and a bitmap of
+# the positions answered. "Question N of M", resume, skip and go back are then
+# list indexing; the plan is only consulted to map a position to its entry.
+# Questions deleted from the quiz since the attempt started are stepped over.
+
+def question_order(plan):
+    """The question order for a new attempt: [content_type_id, question_id] pairs, in plan order."""
+    return [[entry.content_type_id, entry.question_id] for entry in plan.entries]
+
+
+def ensure_question_order(attempt, plan):
+    """Fixes the order of an attempt created without one (e.g. while its quiz had no questions)."""
+    if not attempt.question_order and len(plan):
+        attempt.question_order = question_order(plan)
+        attempt.save(update_fields=['question_order'])
+
+
+def entry_at(attempt, plan, position):
+    """The plan entry of the question at a position of the attempt's order, or None if it has left the quiz."""
+    plan_position = plan.position_of(*attempt.question_order[position])
+    return None if plan_position is None else plan[plan_position]
+
+
+def next_position(attempt, plan, position, step=1):
+    """The nearest position after `position` (before it, with step=-1) whose question is still in the quiz, or None."""
+    position += step
+    while 0 <= position < len(attempt.question_order):
+        if entry_at(attempt, plan, position) is not None:
+            return position
+        position += step
+    return None
+
+
+def available_position(attempt, plan, position):
+    """
+    `position` (clamped to the order) if its question is still in the quiz,
+    otherwise the nearest such position after it, then before it. None when
+    none of the attempt's questions are left.
+    """
+    position = min(position, len(attempt.question_order) - 1)
+    if position < 0:
+        return None
+    if entry_at(attempt, plan, position) is not None:
+        return position
+    following = next_position(attempt, plan, position)
+    return following if following is not None else next_position(attempt, plan, position, -1)
+
+
+def next_unanswered(attempt, plan, answered, position):
+    """
+    The first position after `position`, wrapping around to the start, whose
+    question is still in the quiz and not yet answered; None once all are answered.
+    """
+    total = len(attempt.question_order)
+    for offset in range(1, total + 1):
+        candidate = (position + offset) % total
+        if not is_answered(answered, candidate) and entry_at(attempt, plan, candidate) is not None:
+            return candidate
+    return None
+
+
+def is_answered(answered, position):
+    """Whether a position is set in an answered bitmap."""
+    index = position >> 3
+    return index < len(answered) and bool(answered[index] >> (position & 7) & 1)
+
+
+def mark_answered(answered, position):
+    """Sets a position in an answered bitmap (a bytearray), growing it as needed."""
+    index = position >> 3
+    if index >= len(answered):
+        answered.extend(bytes(index + 1 - len(answered)))
+    answered[index] |= 1 << (position & 7)
+
+
+def order_positions(attempt):
+    """Maps (content_type_id, question_id) to its position in the attempt's order."""
+    return {tuple(key): position for position, key in enumerate(attempt.question_order)}
+
+
+def _merge_stored_answered(attempt, answered):
+    """
+    ORs the attempt's stored answered bitmap, read under its row lock, into
+    `answered` (a bytearray). Bits are only ever set, so concurrent requests
+    writing the merged bitmap back cannot drop each other's answers.
+    """
+    stored = Attempt.objects.select_for_update().filter(pk=attempt.pk).values_list('answered', flat=True).first()  # type: ignore
+    for index, bits in enumerate(bytes(stored or b'')):
+        if index >= len(answered):
+            answered.append(bits)
+        else:
+            answered[index] |= bits
+    return answered
+
+
+def save_answered(attempt, positions):
+    """Sets positions in the attempt's stored answered bitmap. Returns the merged bitmap."""
+    with transaction.atomic():
+        answered = _merge_stored_answered(attempt, bytearray())
+        for position in positions:
+            mark_answered(answered, position)
+        attempt.answered = bytes(answered)
+        attempt.save(update_fields=['answered'])
+    return answered
+
+
+def save_position(attempt, position):
+    """Stores the attempt's cursor."""
+    attempt.position = position
+    attempt.save(update_fields=['position'])
+
+
+def save_cursor(attempt, position, answered):
+    """Stores the attempt's cursor, and the answered bitmap merged into the stored one."""
+    with transaction.atomic():
+        answered = _merge_stored_answered(attempt, bytearray(answered))
+        attempt.position = position
+        attempt.answered = bytes(answered)
+        attempt.save(update_fields=['position', 'answered'])
+
+
+def resolve_position(attempt, plan):
+    """
+    Returns the attempt's stored cursor, moved off a question deleted from the
+    quiz if need be (see `available_position`); None if no questions are left.
+    """
+    ensure_question_order(attempt, plan)
+    position = available_position(attempt, plan, attempt.position)
+    if position is not None and position != attempt.position:
+        save_position(attempt, position)
+    return position
+
+
+# --- Per-request state ---
+
+class _AttemptState:
+    """Navigation shared by both state implementations; `position` and `answered` are set by them."""
+
+    def entry(self, position):
+        return entry_at(self.attempt, self.plan, position)
+
+    def next_position(self, position, step=1):
+        return next_position(self.attempt, self.plan, position, step)
+
+    def is_answered(self, position):
+        return is_answered(self.answered, position)
+
+    def next_unanswered(self, position):
+        return next_unanswered(self.attempt, self.plan, self.answered, position)
+
+    @property
+    def total(self):
+        """Number of questions in the attempt's order ("of M")."""
+        return len(self.attempt.question_order)
+
+
+class DatabaseAttemptState(_AttemptState):
+    """The engine switched off: the cursor and answers are read and written in the database."""
+
+    def __init__(self, attempt, plan):
+        self.attempt = attempt
+        self.plan = plan
+        self.position = resolve_position(attempt, plan)
+        self.answered = bytearray(attempt.answered)
+
+    def record(self, position, entry, selected_choice_id, free_text_response, is_correct):
+        # The answered bit goes in under the row lock taken by record_answer, in the same transaction
+        with transaction.atomic():
+            record_answer(
+                self.attempt, entry,
+                selected_choice_id=selected_choice_id, free_text_response=free_text_response, is_correct=is_correct
+            )
+            self.answered = save_answered(self.attempt, [position])
+
+    def move_to(self, position):
+        self.position = position
+        save_position(self.attempt, position)
+
+    def complete(self):
+        complete_attempt(self.attempt, self.plan.total_points)
+
+
+class CachedAttemptState(_AttemptState):
+    """
+    An attempt's cursor, answered bitmap and buffered answers as kept in the cache:
+
+        {'position': position in the attempt's question order,
+         'answered': answered bitmap (bytes),
+         'pending': {(content_type_id, question_id): (selected_choice_id, free_text_response, is_correct)},
+         'unflushed': answers recorded since the last flush}
+    """
+
+    def __init__(self, attempt, plan, cache, options, data):
+        self.attempt = attempt
+        self.plan = plan
+        self.cache = cache
+        self.options = options
+        self.answered = bytearray(data['answered'])
+        self.pending = dict(data['pending'])
+        self.unflushed = data['unflushed']
+        self.completed = False
+        self.changed = False
+        # Stepped off questions deleted since the state was cached, like resolve_position
+        self.position = None if data['position'] is None else available_position(attempt, plan, data['position'])
+
+    @classmethod
+    def load(cls, attempt, plan, cache, options):
+        data = cache.get(state_key(attempt.pk))
+        if data is not None:
+            return cls(attempt, plan, cache, options, data)
+        state = cls(attempt, plan, cache, options, cls.initial_data(attempt))
+        state.changed = True
+        return state
+
+    @staticmethod
+    def initial_data(attempt):
+        """State rebuilt from the database: the stored cursor, or past the furthest stored answer."""
+        positions = order_positions(attempt)
+        answered = bytearray()
+        furthest = -1
+        for key in attempt.answers.values_list('question_type_id', 'question_id'):
+            position = positions.get(key)
+            if position is not None:
+                mark_answered(answered, position)
+                furthest = max(furthest, position)
+        position = min(max(attempt.position, furthest + 1), len(positions) - 1)
+        return {'position': position, 'answered': bytes(answered), 'pending': {}, 'unflushed': 0}
+
+    def data(self):
+        return {'position': self.position, 'answered': bytes(self.answered), 'pending': self.pending, 'unflushed': self.unflushed}
+
+    def record(self, position, entry, selected_choice_id, free_text_response, is_correct):
+        if self.options['DURABILITY'] == WRITE_BEHIND:
+            self.pending[(entry.content_type_id, entry.question_id)] = (selected_choice_id, free_text_response, is_correct)
+        else:
+            record_answer(
+                self.attempt, entry,
+                selected_choice_id=selected_choice_id, free_text_response=free_text_response, is_correct=is_correct
+            )
+        mark_answered(self.answered, position)
+        self.unflushed += 1
+        self.changed = True
+
+    def move_to(self, position):
+        self.position = position
+        self.changed = True
+
+    def flush(self):
+        """Writes the buffered answers, the cursor and the answered bitmap to the database in one transaction."""
+        graded = {}
+        for key, value in self.pending.items():
+            position = self.plan.position_of(*key)
+            if position is not None:
+                graded[self.plan[position]] = value
+        with transaction.atomic():
+            if graded:
+                record_answers(self.attempt, graded)
+            if self.position is not None:
+                save_cursor(self.attempt, self.position, self.answered)
+        self.pending = {}
+        self.unflushed = 0
+        self.changed = True
+
+    def complete(self):
+        with transaction.atomic():
+            self.flush()
+            complete_attempt(self.attempt, self.plan.total_points)
+        self.completed = True
+
+    def save(self):
+        """Stores the state in the cache (flushing first when a batch is full); completed attempts are dropped."""
+        key = state_key(self.attempt.pk)
+        if self.completed:
+            self.cache.delete(key)
+            return
+        if self.unflushed >= self.options['FLUSH_EVERY']:
+            self.flush()
+        if self.changed:
+            self.cache.set(key, self.data(), self.options['TIMEOUT'])
+
+
+@contextmanager
+def _locked(cache, attempt_id, timeout):
+    """Holds the attempt's state lock; an abandoned lock expires after `timeout` seconds."""
+    key = f'{state_key(attempt_id)}:lock'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while not cache.add(key, token, timeout):
+        if time.monotonic() >= deadline:
+            raise AttemptBusy(attempt_id)
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+@contextmanager
+def open_attempt_state(attempt, plan):
+    """
+    Yields the state of an in-progress attempt for one request: its cursor
+    (`position`, None when none of its questions are left), navigation
+    helpers, and `record`, `move_to` and `complete` operations. The state is
+    saved when the block exits without an exception.
+    """
+    options = _settings()
+    ensure_question_order(attempt, plan)
+    if not options['ENABLED']:
+        yield DatabaseAttemptState(attempt, plan)
+        return
+    cache = caches[options['CACHE']]
+    with _locked(cache, attempt.pk, options['LOCK_TIMEOUT']):
+        state = CachedAttemptState.load(attempt, plan, cache, options)
+        yield state
+        state.save()
+
+
+def flush_attempt_state(attempt, plan, discard=False):
+    """
+    Writes an attempt's cached state (buffered answers, cursor and answered bitmap) to the
+    database; `discard` also drops it from the cache. Returns whether there
+    was a cached state.
+    """
+    options = _settings()
+    if not options['ENABLED']:
+        return False
+    cache = caches[options['CACHE']]
+    with _locked(cache, attempt.pk, options['LOCK_TIMEOUT']):
+        data = cache.get(state_key(attempt.pk))
+        if data is None:
+            return False
+        state = CachedAttemptState(attempt, plan, cache, options, data)
+        state.flush()
+        if discard:
+            cache.delete(state_key(attempt.pk))
+        else:
+            state.save()
+    return True
+
+
+def cached_attempt_ids(attempt_ids):
+    """The subset of the given attempt ids that have a state in the cache."""
+    options = _settings()
+    if not options['ENABLED']:
+        return set()
+    keys = {state_key(attempt_id): attempt_id for attempt_id in attempt_ids}
+    return {keys[key] for key in caches[options['CACHE']].get_many(keys)}
+
+
+def _current_position(attempt, plan):
+    with open_attempt_state(attempt, plan) as state:
+        return state.position
+
+
+async def acurrent_position(attempt, plan):
+    """
+    The attempt's cursor for async views. A stored or cached cursor on a
+    question still in the quiz is read without leaving the event loop; fixing
+    the order, stepping off a deleted question or rebuilding a state runs in a
+    worker thread.
+    """
+    options = _settings()
+    if not options['ENABLED']:
+        position = attempt.position
+    else:
+        data = await caches[options['CACHE']].aget(state_key(attempt.pk))
+        position = None if data is None else data['position']
+    if position is not None and position < len(attempt.question_order) and entry_at(attempt, plan, position) is not None:
+        return position
+    return await sync_to_async(_current_position)(attempt, plan)
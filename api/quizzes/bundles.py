@@ -0,0 +1,209 @@
+"""
+Quiz bundles: a versioned, streamable file format for quiz content.
+
+A bundle is a JSON Lines file (optionally gzip-compressed, by `.gz` suffix).
+The first line is a header, every following line is one quiz:
+
+    {"format": "quizwhiz-bundle", "version": 1}
+    {"name": "Lizard Superlatives", "questions": [
+        {"type": "mcq", "text": "...", "points": 5,
+         "choices": [{"text": "...", "correct": true}, ...]},
+        {"type": "ftq", "text": "...", "points": 10,
+         "accepted_answers": ["..."], "grading": "fuzzy", "max_edits": 1}]}
+
+FTQ grading keys are optional: without "accepted_answers" any non-empty
+response is correct, and "grading" defaults to "normalized" (see
+quizzes/grading.py).
+
+Bundles are read and written one quiz at a time, so neither side needs the
+whole file in memory. Imports insert quizzes, questions and choices with
+`bulk_create` in batches, inside a single transaction.
+"""
+import gzip
+import json
+
+from django.db import transaction
+
+from .models import Quiz, MCQ, FTQ, Choice, GradingPolicy
+
+BUNDLE_FORMAT = 'quizwhiz-bundle'
+BUNDLE_VERSION = 1
+DEFAULT_BATCH_SIZE = 500
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is malformed. The message includes the line number."""
+
+
+def open_bundle(path, mode='r'):
+    """Opens a bundle file as text, transparently handling gzip (`.gz`) files."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+# --- Reading ---
+
+def _validate_quiz(quiz, line_number):
+    def fail(message):
+        raise BundleError(f'line {line_number}: {message}')
+
+    if not isinstance(quiz, dict) or not isinstance(quiz.get('name'), str) or not quiz['name'].strip():
+        fail('each quiz needs a non-empty "name"')
+    if len(quiz['name']) > 255:
+        fail('quiz name is longer than 255 characters')
+    questions = quiz.get('questions')
+    if not isinstance(questions, list):
+        fail('"questions" must be a list')
+    for number, question in enumerate(questions, start=1):
+        where = f'question {number}'
+        if not isinstance(question, dict) or question.get('type') not in ('mcq', 'ftq'):
+            fail(f'{where}: "type" must be "mcq" or "ftq"')
+        if not isinstance(question.get('text'), str) or not question['text'].strip():
+            fail(f'{where}: "text" is required')
+        points = question.get('points', 5 if question['type'] == 'mcq' else None)
+        if not isinstance(points, int) or isinstance(points, bool) or points < 0:
+            fail(f'{where}: "points" must be a non-negative integer')
+        if question['type'] == 'mcq':
+            choices = question.get('choices')
+            if not isinstance(choices, list) or not choices:
+                fail(f'{where}: MCQs need a non-empty "choices" list')
+            for choice in choices:
+                if not isinstance(choice, dict) or not isinstance(choice.get('text'), str) or len(choice['text']) > 255:
+                    fail(f'{where}: each choice needs a "text" of at most 255 characters')
+                if not isinstance(choice.get('correct', False), bool):
+                    fail(f'{where}: choice "correct" must be true or false')
+        else:
+            accepted = question.get('accepted_answers', [])
+            if not isinstance(accepted, list) or not all(isinstance(answer, str) for answer in accepted):
+                fail(f'{where}: "accepted_answers" must be a list of strings')
+            if question.get('grading', GradingPolicy.NORMALIZED) not in GradingPolicy.values:
+                fail(f'{where}: "grading" must be one of {", ".join(GradingPolicy.values)}')
+            max_edits = question.get('max_edits', 1)
+            if not isinstance(max_edits, int) or isinstance(max_edits, bool) or not 0 <= max_edits <= 10:
+                fail(f'{where}: "max_edits" must be an integer from 0 to 10')
+    return quiz
+
+
+def read_bundle(lines):
+    """Yields validated quiz dicts from an iterable of bundle lines."""
+    header = None
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise BundleError(f'line {line_number}: invalid JSON ({error.msg})')
+        if header is None:
+            if not isinstance(record, dict) or record.get('format') != BUNDLE_FORMAT:
+                raise BundleError(f'line {line_number}: not a {BUNDLE_FORMAT} file')
+            if record.get('version') != BUNDLE_VERSION:
+                raise BundleError(f'line {line_number}: unsupported bundle version {record.get("version")!r}')
+            header = record
+            continue
+        yield _validate_quiz(record, line_number)
+    if header is None:
+        raise BundleError('empty bundle')
+
+
+# --- Importing ---
+
+def _insert_batch(quizzes):
+    """Inserts a batch of validated quiz dicts with one bulk_create per table."""
+    # bulk_create skips the signal handlers that keep the quiz totals, so they are set up front
+    quiz_objects = Quiz.objects.bulk_create([  # type: ignore
+        Quiz(
+            name=quiz['name'],
+            question_count=len(quiz['questions']),
+            total_points=sum(question.get('points', 5) for question in quiz['questions']),
+        )
+        for quiz in quizzes
+    ])
+
+    mcqs, mcq_choices, ftqs = [], [], []
+    for quiz, quiz_object in zip(quizzes, quiz_objects):
+        for question in quiz['questions']:
+            if question['type'] == 'mcq':
+                mcqs.append(MCQ(quiz=quiz_object, question=question['text'], points=question.get('points', 5)))
+                mcq_choices.append(question['choices'])
+            else:
+                ftqs.append(FTQ(
+                    quiz=quiz_object, question=question['text'], points=question['points'],
+                    accepted_answers=question.get('accepted_answers', []),
+                    grading_policy=question.get('grading', GradingPolicy.NORMALIZED),
+                    max_edits=question.get('max_edits', 1),
+                ))
+
+    MCQ.objects.bulk_create(mcqs)  # type: ignore
+    FTQ.objects.bulk_create(ftqs)  # type: ignore
+    Choice.objects.bulk_create([  # type: ignore
+        Choice(mcq=mcq, content=choice['text'], is_correct=choice.get('correct', False))
+        for mcq, choices in zip(mcqs, mcq_choices)
+        for choice in choices
+    ])
+    return len(quiz_objects), len(mcqs), len(ftqs)
+
+
+def import_bundle(lines, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Imports every quiz in a bundle, in one transaction. Quizzes are buffered
+    until a batch holds `batch_size` questions, then inserted together.
+    With `dry_run`, the bundle is only validated.
+    Returns a dict of counts: quizzes, mcqs, ftqs.
+    """
+    counts = {'quizzes': 0, 'mcqs': 0, 'ftqs': 0}
+
+    def flush(batch):
+        if batch and not dry_run:
+            quizzes, mcqs, ftqs = _insert_batch(batch)
+        else:
+            quizzes = len(batch)
+            mcqs = sum(1 for quiz in batch for question in quiz['questions'] if question['type'] == 'mcq')
+            ftqs = sum(len(quiz['questions']) for quiz in batch) - mcqs
+        counts['quizzes'] += quizzes
+        counts['mcqs'] += mcqs
+        counts['ftqs'] += ftqs
+
+    with transaction.atomic():
+        batch, batch_questions = [], 0
+        for quiz in read_bundle(lines):
+            batch.append(quiz)
+            batch_questions += len(quiz['questions'])
+            if batch_questions >= batch_size:
+                flush(batch)
+                batch, batch_questions = [], 0
+        flush(batch)
+    return counts
+
+
+# --- Exporting ---
+
+def _ftq_record(ftq):
+    record = {'type': 'ftq', 'text': ftq.question, 'points': ftq.points}
+    if ftq.accepted_answers:
+        record.update(accepted_answers=ftq.accepted_answers, grading=ftq.grading_policy, max_edits=ftq.max_edits)
+    return record
+
+
+def iter_bundle(quizzes=None, chunk_size=100):
+    """Yields bundle lines (header first) for the given quizzes (default: all)."""
+    if quizzes is None:
+        quizzes = Quiz.objects.all()
+    yield json.dumps({'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION}) + '\n'
+    quizzes = quizzes.order_by('id').prefetch_related('mcqs__choices', 'ftqs')
+    for quiz in quizzes.iterator(chunk_size=chunk_size):
+        questions = [
+            {
+                'type': 'mcq',
+                'text': mcq.question,
+                'points': mcq.points,
+                'choices': [
+                    {'text': choice.content, 'correct': choice.is_correct}
+                    for choice in sorted(mcq.choices.all(), key=lambda choice: choice.id)
+                ],
+            }
+            for mcq in sorted(quiz.mcqs.all(), key=lambda mcq: mcq.id)
+        ]
+        questions += [_ftq_record(ftq) for ftq in sorted(quiz.ftqs.all(), key=lambda ftq: ftq.id)]
+        yield json.dumps({'name': quiz.name, 'questions': questions}, ensure_ascii=False) + '\n'
@@ -0,0 +1,106 @@
+"""
+Choice-selection analytics ("most students pick wrong choice B").
+
+`ChoiceStat` holds, per choice, the number of answers that currently select
+it. The scoring functions pass the change of every answer write to
+`apply_choice_deltas` (+1 for the new choice, -1 for the one a replaced answer
+had selected), which applies all of them with a single
+`UPDATE ... SET count = count + CASE ...`; the rows of choices selected for
+the first time are inserted at zero and incremented the same way. Dashboards then read counters instead of
+grouping every `Answer` row: `quiz_choice_distribution` returns a whole
+quiz's choices with their counts in one query.
+
+Anything that removes or rewrites answers outside the scoring functions
+(deleting attempts, editing answers by hand) leaves the counters stale until
+`rollup_choice_stats` (management command of the same name) recomputes them
+from `Answer`.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Answer, Choice, ChoiceStat
+
+
+def selection_deltas(changes):
+    """
+    Counter deltas for answers whose selected choice changed: `changes` is an
+    iterable of (previous choice id or None, new choice id or None).
+    """
+    deltas = Counter()
+    for previous, current in changes:
+        if previous == current:
+            continue
+        if previous is not None:
+            deltas[previous] -= 1
+        if current is not None:
+            deltas[current] += 1
+    return deltas
+
+
+def _increment(deltas):
+    """Applies the deltas to existing counters with one UPDATE; returns the number of rows updated."""
+    return ChoiceStat.objects.filter(pk__in=deltas).update(  # type: ignore
+        count=Greatest(
+            F('count') + Case(*(When(pk=choice_id, then=Value(delta)) for choice_id, delta in deltas.items()), output_field=IntegerField()),
+            Value(0)
+        )
+    )
+
+
+def apply_choice_deltas(deltas):
+    """Adds `deltas` ({choice_id: change}) to the selection counters, creating missing ones."""
+    deltas = {choice_id: delta for choice_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        if _increment(deltas) == len(deltas):
+            return
+        existing = set(ChoiceStat.objects.filter(pk__in=deltas).values_list('pk', flat=True))  # type: ignore
+        missing = {choice_id: delta for choice_id, delta in deltas.items() if choice_id not in existing}
+        # Rows created by a concurrent request in the meantime are skipped, then counted like the rest
+        ChoiceStat.objects.bulk_create([ChoiceStat(choice_id=choice_id, count=0) for choice_id in missing], ignore_conflicts=True)  # type: ignore
+        _increment(missing)
+
+
+def quiz_choice_distribution(quiz_id):
+    """
+    Every choice of the quiz's MCQs with its selection count, in one query,
+    grouped per question: [{'question_id', 'answered', 'choices': [...]}].
+    """
+    rows = Choice.objects.filter(mcq__quiz_id=quiz_id).order_by('mcq_id', 'id').values_list(  # type: ignore
+        'mcq_id', 'id', 'content', 'is_correct', Coalesce('stat__count', 0)
+    )
+    questions = {}
+    for mcq_id, choice_id, content, is_correct, count in rows:
+        question = questions.setdefault(mcq_id, {'question_id': mcq_id, 'answered': 0, 'choices': []})
+        question['answered'] += count
+        question['choices'].append({'id': choice_id, 'content': content, 'is_correct': is_correct, 'count': count})
+    for question in questions.values():
+        for choice in question['choices']:
+            choice['share'] = round(choice['count'] / question['answered'], 4) if question['answered'] else 0.0
+    return list(questions.values())
+
+
+def rollup_choice_stats(quiz_ids=None, batch_size=1000):
+    """
+    Recomputes the selection counters of the given quizzes' choices (default:
+    all) from `Answer` with one GROUP BY, in one transaction. Returns the
+    number of counters written.
+    """
+    stats = ChoiceStat.objects.all()  # type: ignore
+    answers = Answer.objects.filter(selected_choice__isnull=False)  # type: ignore
+    if quiz_ids is not None:
+        stats = stats.filter(choice__mcq__quiz_id__in=quiz_ids)
+        answers = answers.filter(selected_choice__mcq__quiz_id__in=quiz_ids)
+    counts = answers.values_list('selected_choice_id').annotate(count=Count('id')).order_by()
+
+    with transaction.atomic():
+        stats.delete()
+        written = ChoiceStat.objects.bulk_create(  # type: ignore
+            [ChoiceStat(choice_id=choice_id, count=count) for choice_id, count in counts],
+            batch_size=batch_size
+        )
+    return len(written)
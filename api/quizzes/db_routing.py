@@ -0,0 +1,121 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary (`default`). Reads go to the replica alias
+named by QUIZ_DB_ROUTING['REPLICA'] when it is configured in DATABASES:
+
+- quiz content (Quiz, MCQ, FTQ, Choice, QuizSnapshot) is read from the replica;
+- attempts, and the answers of attempts still in progress, are read from the
+  primary;
+- the answers of completed attempts are read from the replica, except during
+  the first PIN_SECONDS after completion, so the results page shown right
+  after the last answer never misses it because of replication lag.
+
+Read-your-writes stickiness: every request with an unsafe method reads from
+the primary, and a successful one sets a short-lived cookie that keeps the
+client on the primary for PIN_SECONDS (`PrimaryPinningMiddleware`).
+Without a replica alias the router defers to Django's default (`default`).
+"""
+from contextvars import ContextVar
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+PIN_COOKIE = 'quizwhiz_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+CONTENT_MODELS = ('quiz', 'mcq', 'ftq', 'choice', 'quizsnapshot')
+
+_pinned = ContextVar('quizwhiz_primary_pinned', default=False)
+
+
+def _settings():
+    return {
+        'REPLICA': 'replica',
+        'PIN_SECONDS': 5,
+        **getattr(settings, 'QUIZ_DB_ROUTING', {}),
+    }
+
+
+def replica_alias():
+    """The configured replica alias, or None if there is no replica."""
+    alias = _settings()['REPLICA']
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def primary_pinned():
+    return _pinned.get()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        # Historical models (module "__fake__") belong to migrations, which must read the database they migrate
+        if replica is None or model._meta.app_label != 'quizzes' or model.__module__ == '__fake__':
+            return None
+        if _pinned.get():
+            return DEFAULT_DB_ALIAS
+        name = model._meta.model_name
+        if name in CONTENT_MODELS:
+            return replica
+        if name == 'answer':
+            attempt = hints.get('instance')
+            time_end = getattr(attempt, 'time_end', None)
+            if time_end and time_end <= timezone.now() - timedelta(seconds=_settings()['PIN_SECONDS']):
+                return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS if replica_alias() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db == replica_alias():
+            return False
+        return None
+
+
+class PrimaryPinningMiddleware:
+    """Sends a request's reads to the primary after (and during) that client's writes."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(self.pins(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = _pinned.set(self.pins(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.finish(request, response)
+
+    def pins(self, request):
+        return request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replica_alias():
+            response.set_cookie(PIN_COOKIE, '1', max_age=_settings()['PIN_SECONDS'], httponly=True, samesite='Lax')
+        return response
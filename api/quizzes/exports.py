@@ -0,0 +1,164 @@
+"""
+Streaming export of attempts and their answers.
+
+Attempts and answers are read with two server-side cursors
+(`QuerySet.iterator(chunk_size=...)`), both ordered by attempt id, and merged
+as they are read, so memory use stays flat no matter how many rows are
+exported. All filters are applied in SQL.
+
+Two formats are supported:
+
+- ndjson: one JSON object per attempt, with its answers nested in "answers";
+- csv: one row per answer (attempts without answers get one row with empty
+  answer columns).
+"""
+import csv
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Attempt, Answer
+from .question_plan import mcq_content_type_id, ftq_content_type_id
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+DEFAULT_CHUNK_SIZE = 2000
+_ENCODER = DjangoJSONEncoder()
+
+ATTEMPT_FIELDS = [
+    'id', 'quiz_id', 'quiz__name', 'student_id', 'student__name', 'student__email',
+    'time_start', 'time_end', 'duration', 'score', 'points_earned', 'correct_count', 'answered_count',
+]
+ANSWER_FIELDS = [
+    'id', 'attempt_id', 'question_type_id', 'question_id', 'selected_choice_id',
+    'selected_choice__content', 'free_text_response', 'is_correct', 'points_earned',
+]
+
+ATTEMPT_COLUMNS = [
+    'attempt_id', 'quiz_id', 'quiz_name', 'student_id', 'student_name', 'student_email',
+    'time_start', 'time_end', 'duration', 'score', 'points_earned', 'correct_count', 'answered_count',
+]
+ANSWER_COLUMNS = [
+    'answer_id', 'question_type', 'question_id', 'selected_choice_id', 'selected_choice',
+    'free_text_response', 'is_correct', 'answer_points_earned',
+]
+
+
+def parse_timestamp(value):
+    """Parses an ISO date or datetime (naive values are taken as the current time zone)."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'Invalid date: {value}')
+        parsed = datetime.datetime.combine(date, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_attempts(quiz_id=None, student_id=None, completed_after=None, completed_before=None):
+    """Returns the attempts to export; completion-date filters exclude unfinished attempts."""
+    attempts = Attempt.objects.all()
+    if quiz_id is not None:
+        attempts = attempts.filter(quiz_id=quiz_id)
+    if student_id is not None:
+        attempts = attempts.filter(student_id=student_id)
+    if completed_after is not None:
+        attempts = attempts.filter(time_end__gte=completed_after)
+    if completed_before is not None:
+        attempts = attempts.filter(time_end__lt=completed_before)
+    return attempts
+
+
+def iter_attempts_with_answers(attempts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields (attempt, answers) pairs of plain dicts, in attempt id order.
+    Only one attempt's answers are held in memory at a time.
+    """
+    question_types = {mcq_content_type_id(): 'mcq', ftq_content_type_id(): 'ftq'}
+    attempt_rows = attempts.order_by('id').values(*ATTEMPT_FIELDS).iterator(chunk_size=chunk_size)
+    answer_rows = (
+        Answer.objects.filter(attempt__in=attempts.values('pk'))
+        .order_by('attempt_id', 'id')
+        .values(*ANSWER_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    pending = next(answer_rows, None)
+    for attempt in attempt_rows:
+        answers = []
+        # Both streams are ordered by attempt id; skip answers of attempts not exported
+        while pending is not None and pending['attempt_id'] < attempt['id']:
+            pending = next(answer_rows, None)
+        while pending is not None and pending['attempt_id'] == attempt['id']:
+            pending['question_type'] = question_types.get(pending['question_type_id'])
+            answers.append(pending)
+            pending = next(answer_rows, None)
+        yield attempt, answers
+
+
+def _attempt_record(attempt):
+    return dict(zip(ATTEMPT_COLUMNS, (attempt[field] for field in ATTEMPT_FIELDS)))
+
+
+def _answer_record(answer):
+    return {
+        'answer_id': answer['id'],
+        'question_type': answer['question_type'],
+        'question_id': answer['question_id'],
+        'selected_choice_id': answer['selected_choice_id'],
+        'selected_choice': answer['selected_choice__content'],
+        'free_text_response': answer['free_text_response'],
+        'is_correct': answer['is_correct'],
+        'answer_points_earned': answer['points_earned'],
+    }
+
+
+def iter_ndjson(attempts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields one NDJSON line per attempt."""
+    for attempt, answers in iter_attempts_with_answers(attempts, chunk_size):
+        record = _attempt_record(attempt)
+        record['answers'] = [_answer_record(answer) for answer in answers]
+        yield _ENCODER.encode(record) + '\n'
+
+
+class _Echo:
+    """A file-like object whose write() just returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(attempts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields a CSV header followed by one line per answer."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(ATTEMPT_COLUMNS + ANSWER_COLUMNS)
+    empty_answer = [''] * len(ANSWER_COLUMNS)
+    for attempt, answers in iter_attempts_with_answers(attempts, chunk_size):
+        attempt_values = [_csv_value(attempt[field]) for field in ATTEMPT_FIELDS]
+        if not answers:
+            yield writer.writerow(attempt_values + empty_answer)
+        for answer in answers:
+            yield writer.writerow(attempt_values + [_csv_value(value) for value in _answer_record(answer).values()])
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    # Format datetimes and durations the same way as the NDJSON export
+    return _ENCODER.default(value)
+
+
+def iter_export(export_format, attempts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields the export of the given attempts as text chunks."""
+    if export_format == 'csv':
+        return iter_csv(attempts, chunk_size)
+    return iter_ndjson(attempts, chunk_size)
+
+
+def content_type_for(export_format):
+    return 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
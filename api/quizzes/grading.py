@@ -0,0 +1,97 @@
+"""
+Free-text (FTQ) grading.
+
+Each FTQ has accepted answers and a grading policy (`GradingPolicy`):
+
+- exact: the response, trimmed, equals an accepted answer;
+- normalized: equal after `normalize` (case, accents, punctuation and
+  whitespace ignored);
+- fuzzy: normalized, and within `max_edits` edits (Levenshtein distance) of
+  an accepted answer.
+
+FTQs without accepted answers accept any non-empty response, as before
+grading existed.
+
+Accepted answers are compiled once into an `AnswerKey` (already normalized
+for the normalized and fuzzy policies) when the question plan is built, so
+they are cached per quiz content version with the plan and grading a
+submission only normalizes the response (itself memoized) and does set
+lookups, plus a banded edit-distance check for fuzzy questions.
+"""
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+from .models import GradingPolicy
+
+# `answers` is a frozenset of accepted answers in the form the policy compares
+AnswerKey = namedtuple('AnswerKey', ['policy', 'max_edits', 'answers'])
+
+# Dashes and connectors separate words ("sit-and-wait"); other punctuation is dropped ("Jacobson's")
+_SEPARATOR_CATEGORIES = ('Pd', 'Pc')
+
+
+@lru_cache(maxsize=8192)
+def normalize(text):
+    """The case-, accent-, punctuation- and whitespace-insensitive form of an answer."""
+    characters = []
+    for character in unicodedata.normalize('NFKD', text):
+        category = unicodedata.category(character)
+        if category in _SEPARATOR_CATEGORIES:
+            characters.append(' ')
+        elif not category.startswith('P') and not unicodedata.combining(character):
+            characters.append(character)
+    return ' '.join(''.join(characters).casefold().split())
+
+
+def within_edits(first, second, max_edits):
+    """Whether the Levenshtein distance between two strings is at most `max_edits`."""
+    if abs(len(first) - len(second)) > max_edits:
+        return False
+    if first == second:
+        return True
+    if len(first) > len(second):
+        first, second = second, first
+    too_far = max_edits + 1
+    # Only cells within `max_edits` of the diagonal can stay under the limit
+    previous = [column if column <= max_edits else too_far for column in range(len(second) + 1)]
+    for row, character in enumerate(first, start=1):
+        low, high = max(1, row - max_edits), min(len(second), row + max_edits)
+        current = [too_far] * (len(second) + 1)
+        if row <= max_edits:
+            current[0] = row
+        for column in range(low, high + 1):
+            current[column] = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (character != second[column - 1]),
+            )
+        if min(current[low - 1:high + 1]) > max_edits:
+            return False
+        previous = current
+    return previous[len(second)] <= max_edits
+
+
+def compile_answer_key(accepted_answers, policy=GradingPolicy.NORMALIZED, max_edits=1):
+    """Precomputes the comparable forms of an FTQ's accepted answers."""
+    if policy == GradingPolicy.EXACT:
+        answers = frozenset(answer.strip() for answer in accepted_answers)
+    else:
+        answers = frozenset(normalize(answer) for answer in accepted_answers)
+    return AnswerKey(str(policy), max_edits, answers - {''})
+
+
+def grade_free_text(key, response):
+    """Whether a free-text response matches an FTQ's `AnswerKey` (None: no key)."""
+    if not response:
+        return False
+    if key is None or not key.answers:
+        return True
+    if key.policy == GradingPolicy.EXACT:
+        return response.strip() in key.answers
+    normalized = normalize(response)
+    if normalized in key.answers:
+        return True
+    if key.policy == GradingPolicy.FUZZY:
+        return any(within_edits(normalized, answer, key.max_edits) for answer in key.answers)
+    return False
@@ -0,0 +1,66 @@
+"""
+HTTP caching for quiz content endpoints.
+
+Quiz content changes rarely, and every change bumps `Quiz.content_version`
+(see quizzes/signals.py). The quiz endpoints therefore:
+
+- emit a strong ETag derived from (quiz id, content version, serializer);
+- answer a matching `If-None-Match` with 304 after reading only the quiz row;
+- keep the rendered JSON bytes in the Django cache, keyed by
+  (variant, quiz, version), so repeated requests skip serialization and
+  the question tables altogether. On a cache miss, quiz payloads come from
+  their stored snapshots (quizzes/snapshots.py) rather than serializers.
+
+`acached_json_response` is the same for the async views in
+quizzes/async_views.py, using the cache's async API.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from .renderers import render_json
+
+
+def _cache():
+    return caches[getattr(settings, 'QUIZ_RENDERED_CACHE', 'default')]
+
+
+def quiz_etag(quiz_id, version, variant):
+    return f'"quiz-{quiz_id}-v{version}-{variant}"'
+
+
+def _finish(response, etag, cache_control):
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def cached_json_response(request, etag, cache_key, cache_control, render=None, render_body=None):
+    """
+    Returns a 304 if the client already has `etag`; otherwise the JSON bytes
+    cached under `cache_key`, calling `render()` to build the data on a miss
+    (or `render_body()` to load the bytes themselves).
+    """
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _finish(not_modified, etag, cache_control)
+    body = _cache().get(cache_key) if cache_key else None
+    if body is None:
+        body = render_body() if render_body else render_json(render())
+        if cache_key:
+            _cache().set(cache_key, body)
+    return _finish(HttpResponse(body, content_type='application/json'), etag, cache_control)
+
+
+async def acached_json_response(request, etag, cache_key, cache_control, render=None, render_body=None):
+    """`cached_json_response` with an awaitable `render()` or `render_body()`."""
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _finish(not_modified, etag, cache_control)
+    body = await _cache().aget(cache_key) if cache_key else None
+    if body is None:
+        body = await render_body() if render_body else render_json(await render())
+        if cache_key:
+            await _cache().aset(cache_key, body)
+    return _finish(HttpResponse(body, content_type='application/json'), etag, cache_control)
@@ -0,0 +1,136 @@
+"""
+Per-quiz leaderboards and score distributions from incremental aggregates.
+
+Two tables are kept up to date as attempts complete (`record_completion`,
+called by `complete_attempt` in the completion transaction):
+
+- `QuizBestScore`: each student's best completed attempt per quiz (earlier
+  attempts win ties). The leaderboard is its top N, read through the
+  (quiz, -score, achieved_at, id) index.
+- `QuizScoreBucket`: completed attempts per quiz and score bucket
+  (BUCKET_WIDTH points wide, 100% in the last bucket).
+
+Both are updated with conditional UPDATEs and a create on first use, so
+concurrent completions never lose an increment, and both endpoints read a
+bounded number of rows however many attempts exist. Anything that changes
+completed attempts behind their back (deleting attempts, rescoring) should
+be followed by `rebuild_quiz_aggregates` (management command of the same
+name).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, Window
+from django.db.models.functions import Cast, Floor, Least, RowNumber
+
+from .models import Attempt, QuizBestScore, QuizScoreBucket
+
+BUCKET_WIDTH = 10
+BUCKETS = 100 // BUCKET_WIDTH
+
+
+def score_bucket(score):
+    """The histogram bucket of a 0-100 score."""
+    return min(max(int(score // BUCKET_WIDTH), 0), BUCKETS - 1)
+
+
+def _create_or_retry(create, retry):
+    """Runs `create`; if a concurrent request created the row first, runs `retry` instead."""
+    try:
+        with transaction.atomic():
+            create()
+    except IntegrityError:
+        retry()
+
+
+def record_completion(attempt):
+    """Adds a just-completed attempt to its quiz's best scores and score histogram."""
+    if attempt.score is None:
+        return
+    best = {'score': attempt.score, 'attempt_id': attempt.pk, 'achieved_at': attempt.time_end}
+
+    def improve_best():
+        return QuizBestScore.objects.filter(  # type: ignore
+            quiz_id=attempt.quiz_id, student_id=attempt.student_id, score__lt=attempt.score
+        ).update(**best)
+
+    if not improve_best():
+        _create_or_retry(
+            lambda: QuizBestScore.objects.create(quiz_id=attempt.quiz_id, student_id=attempt.student_id, **best),  # type: ignore
+            improve_best
+        )
+
+    bucket = score_bucket(attempt.score)
+
+    def increment_bucket():
+        return QuizScoreBucket.objects.filter(quiz_id=attempt.quiz_id, bucket=bucket).update(count=F('count') + 1)  # type: ignore
+
+    if not increment_bucket():
+        _create_or_retry(
+            lambda: QuizScoreBucket.objects.create(quiz_id=attempt.quiz_id, bucket=bucket, count=1),  # type: ignore
+            increment_bucket
+        )
+
+
+def leaderboard(quiz_id, limit=10):
+    """The quiz's top `limit` best scores, with competition ranks (equal scores share a rank)."""
+    rows = QuizBestScore.objects.filter(quiz_id=quiz_id).select_related('student').order_by('-score', 'achieved_at', 'id')[:limit]  # type: ignore
+    entries = []
+    for position, row in enumerate(rows, start=1):
+        rank = entries[-1]['rank'] if entries and entries[-1]['score'] == row.score else position
+        entries.append({
+            'rank': rank,
+            'student': {'id': row.student_id, 'name': row.student.name},
+            'score': row.score,
+            'attempt_id': row.attempt_id,
+            'achieved_at': row.achieved_at,
+        })
+    return entries
+
+
+def score_distribution(quiz_id):
+    """Completed attempts per score bucket, every bucket included."""
+    counts = dict(QuizScoreBucket.objects.filter(quiz_id=quiz_id).values_list('bucket', 'count'))  # type: ignore
+    return {
+        'bucket_width': BUCKET_WIDTH,
+        'completed_attempts': sum(counts.values()),
+        'buckets': [
+            {'min': bucket * BUCKET_WIDTH, 'max': (bucket + 1) * BUCKET_WIDTH, 'count': counts.get(bucket, 0)}
+            for bucket in range(BUCKETS)
+        ],
+    }
+
+
+def rebuild_quiz_aggregates(quiz_ids=None, batch_size=1000):
+    """
+    Recomputes best scores and histograms from the completed attempts of the
+    given quizzes (default: all) in one transaction. Returns
+    (best score rows, bucket rows) written.
+    """
+    completed = Attempt.objects.filter(time_end__isnull=False, score__isnull=False)  # type: ignore
+    best_scores = QuizBestScore.objects.all()  # type: ignore
+    buckets = QuizScoreBucket.objects.all()  # type: ignore
+    if quiz_ids is not None:
+        completed = completed.filter(quiz_id__in=quiz_ids)
+        best_scores = best_scores.filter(quiz_id__in=quiz_ids)
+        buckets = buckets.filter(quiz_id__in=quiz_ids)
+
+    # One sorted pass: each student's attempts at a quiz ranked best first
+    best_rows = completed.annotate(
+        rank=Window(RowNumber(), partition_by=[F('quiz_id'), F('student_id')], order_by=[F('score').desc(), F('time_end'), F('id')]),
+    ).filter(rank=1).values_list('quiz_id', 'student_id', 'id', 'score', 'time_end')
+    bucket_rows = completed.annotate(
+        bucket=Least(Cast(Floor(F('score') / BUCKET_WIDTH), IntegerField()), BUCKETS - 1),
+    ).values_list('quiz_id', 'bucket').annotate(count=Count('id')).order_by()
+
+    with transaction.atomic():
+        best_scores.delete()
+        buckets.delete()
+        written = QuizBestScore.objects.bulk_create(  # type: ignore
+            (QuizBestScore(quiz_id=quiz_id, student_id=student_id, attempt_id=attempt_id, score=score, achieved_at=time_end)
+             for quiz_id, student_id, attempt_id, score, time_end in best_rows.iterator()),
+            batch_size=batch_size
+        )
+        histogram = QuizScoreBucket.objects.bulk_create(  # type: ignore
+            [QuizScoreBucket(quiz_id=quiz_id, bucket=max(bucket, 0), count=count) for quiz_id, bucket, count in bucket_rows],
+            batch_size=batch_size
+        )
+    return len(written), len(histogram)
@@ -0,0 +1,339 @@
+"""
+Load-test harness for the quiz-taking flow.
+
+Simulates N students taking quizzes concurrently through the real URL
+routing and views (using Django's test `Client`, one per simulated student,
+each on a worker thread with its own database connection):
+
+    register (StudentViewSet.create) -> start attempt -> repeat
+    current_question -> answer until completed -> results
+
+Every request is timed and its SQL queries are counted with a connection
+execute wrapper. A request refused with 429 (see quizzes/admission.py) is
+recorded and retried after its Retry-After, as a well-behaved client would.
+`summarize` turns the samples into per-endpoint throughput, latency
+percentiles and queries per request; the `benchmark_quiz_flow` management
+command runs it and saves the report as JSON so runs can be diffed between
+commits.
+
+`run_read_benchmark` drives GETs against the read endpoints through either
+the WSGI handler (sync views, one thread per in-flight request) or the ASGI
+handler (async views, all requests in flight on one event loop), so
+`benchmark_read_path` can compare the two at high concurrency.
+
+`run_connection_benchmark` replays the database side of a request's lifecycle
+(the request_started/request_finished signals that open, reuse or close
+connections, around a small query) under a given connection configuration,
+so `benchmark_connections` can show the per-request connection overhead of
+fresh, persistent and pooled connections.
+"""
+import asyncio
+import itertools
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+
+class Sample:
+    __slots__ = ('endpoint', 'status', 'seconds', 'queries')
+
+    def __init__(self, endpoint, status, seconds, queries):
+        self.endpoint = endpoint
+        self.status = status
+        self.seconds = seconds
+        self.queries = queries
+
+
+class Recorder:
+    """Collects request samples from all worker threads."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def add(self, sample):
+        with self._lock:
+            self.samples.append(sample)
+
+
+class QueryCounter:
+    """A connection execute wrapper that counts the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class StudentSession:
+    """
+    One simulated student: a test client that records every request it makes.
+    Requests refused with 429 are retried up to `retries` times, after their
+    Retry-After (capped at `max_retry_wait` seconds) plus up to 50% jitter.
+    """
+
+    def __init__(self, recorder, retries=5, max_retry_wait=5.0):
+        self.client = Client(raise_request_exception=False)
+        self.recorder = recorder
+        self.retries = retries
+        self.max_retry_wait = max_retry_wait
+
+    def request(self, endpoint, method, path, data=None):
+        for attempt in range(self.retries + 1):
+            response = self.send(endpoint, method, path, data)
+            if response.status_code != 429 or attempt == self.retries:
+                return response
+            # Jittered, so refused clients do not all come back at the same moment
+            time.sleep(min(float(response.get('Retry-After', 1)), self.max_retry_wait) * random.uniform(1, 1.5))
+
+    def send(self, endpoint, method, path, data=None):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            if method == 'get':
+                response = self.client.get(path)
+            else:
+                response = self.client.post(path, data or {}, content_type='application/json')
+            elapsed = time.perf_counter() - start
+        self.recorder.add(Sample(endpoint, response.status_code, elapsed, counter.count))
+        return response
+
+    def take_quiz(self, quiz_id, email):
+        """Registers, then walks one attempt from start to results. Returns False on any error."""
+        response = self.request('students.create', 'post', '/api/students/', {'name': email.split('@')[0], 'email': email})
+        if response.status_code != 201:
+            return False
+        student_id = response.json()['student']['id']
+
+        response = self.request('attempts.create', 'post', '/api/attempts/', {'quiz_id': quiz_id, 'student_id': student_id})
+        if response.status_code not in (200, 201):
+            return False
+        attempt_id = response.json()['id']
+
+        while True:
+            response = self.request('attempts.current_question', 'get', f'/api/attempts/{attempt_id}/current_question/')
+            if response.status_code != 200:
+                return False
+            question = response.json()
+            if question['question_type'] == 'mcq':
+                payload = {'choice_id': question['choices'][0]['id']}
+            else:
+                payload = {'answer': 'benchmark'}
+            response = self.request('attempts.answer', 'post', f'/api/attempts/{attempt_id}/answer/', payload)
+            if response.status_code != 200:
+                return False
+            if not response.json()['next_question_available']:
+                break
+
+        response = self.request('attempts.results', 'get', f'/api/attempts/{attempt_id}/results/')
+        return response.status_code == 200
+
+
+def run_quiz_flow(quiz_ids, students=20, concurrency=8, **session_options):
+    """
+    Runs `students` simulated students over the given quizzes (round-robin)
+    on `concurrency` threads. `session_options` go to each `StudentSession`.
+    Returns (recorder, wall-clock seconds, failures).
+    """
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    quiz_cycle = itertools.cycle(quiz_ids)
+    jobs = [(next(quiz_cycle), f'bench-{run_id}-{index}@example.com') for index in range(students)]
+
+    def work(job):
+        try:
+            return StudentSession(recorder, **session_options).take_quiz(*job)
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(work, jobs))
+    wall_seconds = time.perf_counter() - start
+    return recorder, wall_seconds, outcomes.count(False)
+
+
+def server_timing_queries(response):
+    """The SQL query count reported in a response's Server-Timing header (see quizzes/metrics.py)."""
+    match = re.search(r'desc="(\d+) queries"', response.get('Server-Timing', ''))
+    return int(match.group(1)) if match else 0
+
+
+def run_read_benchmark(mode, targets, requests=1000, concurrency=64):
+    """
+    Sends `requests` GETs, round-robin over `targets` ((endpoint, path) pairs),
+    with `concurrency` requests in flight. `mode` is "wsgi" (a test `Client`
+    per worker thread) or "asgi" (`AsyncClient` tasks on one event loop, each
+    request in its own thread-sensitive context as under a real ASGI server).
+    Returns (recorder, wall-clock seconds).
+    """
+    recorder = Recorder()
+    jobs = itertools.islice(itertools.cycle(targets), requests)
+    lock = threading.Lock()
+
+    def next_job():
+        with lock:
+            return next(jobs, None)
+
+    def record(endpoint, response, elapsed):
+        recorder.add(Sample(endpoint, response.status_code, elapsed, server_timing_queries(response)))
+
+    def wsgi_worker():
+        client = Client(raise_request_exception=False)
+        try:
+            while (job := next_job()) is not None:
+                start = time.perf_counter()
+                response = client.get(job[1])
+                record(job[0], response, time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    async def asgi_worker(client):
+        while (job := next_job()) is not None:
+            async with ThreadSensitiveContext():
+                start = time.perf_counter()
+                response = await client.get(job[1])
+                record(job[0], response, time.perf_counter() - start)
+
+    async def asgi_run():
+        client = AsyncClient(raise_request_exception=False)
+        await asyncio.gather(*(asgi_worker(client) for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    if mode == 'asgi':
+        asyncio.run(asgi_run())
+    else:
+        threads = [threading.Thread(target=wsgi_worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return recorder, time.perf_counter() - start
+
+
+# Connection configurations compared by `benchmark_connections`
+CONNECTION_MODES = {
+    'fresh': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10}}},
+}
+
+
+def run_connection_benchmark(mode, query, requests=1000, concurrency=8, alias='default'):
+    """
+    Runs `requests` simulated requests, each `query()` between the
+    request_started and request_finished signals, on `concurrency` threads
+    with the connection settings of `mode` (see CONNECTION_MODES) applied to
+    `alias`. Returns (recorder, wall-clock seconds, connects).
+    """
+    settings_dict = connections.settings[alias]
+    saved = {key: settings_dict.get(key) for key in CONNECTION_MODES[mode]}
+    connects = []
+
+    def count_connect(sender, connection, **kwargs):
+        if connection.alias == alias:
+            connects.append(1)
+
+    recorder = Recorder()
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = time.perf_counter()
+                request_started.send(sender=None)
+                query()
+                request_finished.send(sender=None)
+                recorder.add(Sample(mode, 200, time.perf_counter() - start, 1))
+        finally:
+            connections.close_all()
+
+    overrides = dict(CONNECTION_MODES[mode])
+    if 'OPTIONS' in overrides:
+        overrides['OPTIONS'] = {**settings_dict.get('OPTIONS', {}), **overrides['OPTIONS']}
+    connections[alias].close()
+    settings_dict.update(overrides)
+    connection_created.connect(count_connect)
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - start
+    finally:
+        connection_created.disconnect(count_connect)
+        if mode == 'pool':
+            connections[alias].close_pool()
+        settings_dict.update(saved)
+    return recorder, wall_seconds, len(connects)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, wall_seconds):
+    """Per-endpoint throughput, latency percentiles (ms), queries per request and 429s."""
+    endpoints = {}
+    for sample in samples:
+        endpoints.setdefault(sample.endpoint, []).append(sample)
+
+    report = {}
+    for endpoint, endpoint_samples in sorted(endpoints.items()):
+        latencies = sorted(sample.seconds * 1000 for sample in endpoint_samples)
+        queries = [sample.queries for sample in endpoint_samples]
+        report[endpoint] = {
+            'requests': len(endpoint_samples),
+            'errors': sum(1 for sample in endpoint_samples if sample.status >= 400),
+            'throttled': sum(1 for sample in endpoint_samples if sample.status == 429),
+            'throughput_rps': round(len(endpoint_samples) / wall_seconds, 2) if wall_seconds else None,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 0.50), 3),
+                'p95': round(percentile(latencies, 0.95), 3),
+                'p99': round(percentile(latencies, 0.99), 3),
+                'max': round(latencies[-1], 3),
+            },
+            'queries_per_request': {
+                'mean': round(sum(queries) / len(queries), 2),
+                'max': max(queries),
+            },
+        }
+    return report
+
+
+def compare(current, baseline):
+    """
+    Returns, per endpoint present in both reports, the change in p95 latency
+    and mean queries per request (current minus baseline).
+    """
+    deltas = {}
+    for endpoint, stats in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if before:
+            deltas[endpoint] = {
+                'p95_ms': round(stats['latency_ms']['p95'] - before['latency_ms']['p95'], 3),
+                'queries_per_request': round(stats['queries_per_request']['mean'] - before['queries_per_request']['mean'], 2),
+            }
+    return deltas
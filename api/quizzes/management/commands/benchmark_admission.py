@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from quizzes.loadtest import run_quiz_flow, summarize
+
+from .benchmark_quiz_flow import Command as QuizFlowBenchmark
+
+ADMISSION_MODES = ('off', 'on')
+
+
+class Command(QuizFlowBenchmark):
+    help = (
+        'Simulates an exam start: every student takes the same quiz at once, with admission control '
+        '(QUIZ_ADMISSION) off and on. Compares latency, 429s and failed students; throttled '
+        'requests are retried after their Retry-After.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(students=200, concurrency=64)
+        parser.add_argument('--mode', action='append', choices=ADMISSION_MODES, help='Mode to measure; repeatable (default: both).')
+        parser.add_argument('--max-concurrent-writes', type=int, help='Override QUIZ_ADMISSION["MAX_CONCURRENT_WRITES"].')
+        parser.add_argument('--retries', type=int, default=20, help='Retries per throttled request (default: 20).')
+
+    def run(self, options, quiz_ids):
+        quiz_ids = list(quiz_ids)[:1]
+        if not quiz_ids:
+            raise CommandError('No quizzes to benchmark.')
+        admission = dict(getattr(settings, 'QUIZ_ADMISSION', {}))
+        if options['max_concurrent_writes'] is not None:
+            admission['MAX_CONCURRENT_WRITES'] = options['max_concurrent_writes']
+        report = {
+            'benchmark': 'admission',
+            'created_at': timezone.now().isoformat(),
+            'git_revision': self.git_revision(),
+            'database': connection.vendor,
+            'students': options['students'],
+            'concurrency': options['concurrency'],
+            'quiz': quiz_ids[0],
+            'max_concurrent_writes': admission.get('MAX_CONCURRENT_WRITES'),
+            'modes': {},
+        }
+        for mode in options['mode'] or ADMISSION_MODES:
+            with override_settings(QUIZ_ADMISSION={**admission, 'ENABLED': mode == 'on'}):
+                recorder, wall_seconds, failures = run_quiz_flow(
+                    quiz_ids, options['students'], options['concurrency'], retries=options['retries']
+                )
+            endpoints = summarize(recorder.samples, wall_seconds)
+            report['modes'][mode] = {
+                'failed_students': failures,
+                'wall_seconds': round(wall_seconds, 3),
+                'throttled': sum(stats['throttled'] for stats in endpoints.values()),
+                'endpoints': {
+                    endpoint: endpoints.get(endpoint)
+                    for endpoint in ('attempts.create', 'attempts.current_question', 'attempts.answer')
+                },
+            }
+        return report
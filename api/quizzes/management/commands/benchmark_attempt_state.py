@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from quizzes.attempt_state import DURABILITY_MODES
+from quizzes.loadtest import run_quiz_flow, summarize
+
+from .benchmark_quiz_flow import Command as QuizFlowBenchmark
+
+# Engine off (every answer and cursor move written to the database), then each durability mode
+STATE_MODES = ('database',) + DURABILITY_MODES
+
+
+class Command(QuizFlowBenchmark):
+    help = (
+        'Runs the quiz-taking flow with the attempt state engine off, in write-through and in '
+        'write-behind mode, and compares answer throughput, latency and queries per request.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--mode', action='append', choices=STATE_MODES, help='Mode to measure; repeatable (default: all).')
+        parser.add_argument('--flush-every', type=int, default=10, help='Answers per database flush (default: 10).')
+
+    def run(self, options, quiz_ids):
+        quiz_ids = list(quiz_ids)
+        if not quiz_ids:
+            raise CommandError('No quizzes to benchmark.')
+        report = {
+            'benchmark': 'attempt_state',
+            'created_at': timezone.now().isoformat(),
+            'git_revision': self.git_revision(),
+            'database': connection.vendor,
+            'students': options['students'],
+            'concurrency': options['concurrency'],
+            'flush_every': options['flush_every'],
+            'modes': {},
+        }
+        for mode in options['mode'] or STATE_MODES:
+            state_settings = {
+                **getattr(settings, 'QUIZ_ATTEMPT_STATE', {}),
+                'ENABLED': mode != 'database',
+                'DURABILITY': mode if mode != 'database' else DURABILITY_MODES[0],
+                'FLUSH_EVERY': options['flush_every'],
+            }
+            with override_settings(QUIZ_ATTEMPT_STATE=state_settings):
+                recorder, wall_seconds, failures = run_quiz_flow(quiz_ids, options['students'], options['concurrency'])
+            endpoints = summarize(recorder.samples, wall_seconds)
+            answers = [sample for sample in recorder.samples if sample.endpoint == 'attempts.answer']
+            report['modes'][mode] = {
+                'failed_students': failures,
+                'wall_seconds': round(wall_seconds, 3),
+                # Answers per second of time spent serving them, per worker thread
+                'answers_per_busy_second': round(len(answers) / sum(sample.seconds for sample in answers), 2) if answers else None,
+                'answer': endpoints.get('attempts.answer'),
+                'current_question': endpoints.get('attempts.current_question'),
+            }
+        return report
@@ -0,0 +1,58 @@
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+
+from quizzes.loadtest import CONNECTION_MODES, run_connection_benchmark, summarize
+from quizzes.models import Quiz
+
+from .benchmark_quiz_flow import Command as QuizFlowBenchmark
+
+
+class Command(QuizFlowBenchmark):
+    help = (
+        'Measures per-request database connection overhead: replays the request lifecycle '
+        '(request_started, one query, request_finished) with fresh, persistent and pooled '
+        'connections and reports latency and connects per request for each.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per mode (default: 2000).')
+        parser.add_argument('--mode', action='append', choices=sorted(CONNECTION_MODES),
+                            help='Connection mode to measure; repeatable (default: fresh, persistent, and pool on PostgreSQL).')
+
+    def run(self, options, quiz_ids):
+        modes = options['mode'] or ['fresh', 'persistent'] + (['pool'] if connection.vendor == 'postgresql' else [])
+        if 'pool' in modes and connection.vendor != 'postgresql':
+            raise CommandError('The pool mode needs PostgreSQL (psycopg pool).')
+
+        def query():
+            # A typical hot-path read: one small indexed lookup
+            list(Quiz.objects.values_list('id', 'content_version')[:1])
+
+        report = {
+            'benchmark': 'connections',
+            'created_at': timezone.now().isoformat(),
+            'git_revision': self.git_revision(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'modes': {},
+        }
+        for mode in modes:
+            recorder, wall_seconds, connects = run_connection_benchmark(mode, query, options['requests'], options['concurrency'])
+            stats = summarize(recorder.samples, wall_seconds)[mode]
+            report['modes'][mode] = {
+                'throughput_rps': stats['throughput_rps'],
+                'latency_ms': stats['latency_ms'],
+                'mean_ms': round(sum(sample.seconds for sample in recorder.samples) * 1000 / len(recorder.samples), 3),
+                'connects': connects,
+                'connects_per_request': round(connects / len(recorder.samples), 3),
+            }
+        if 'fresh' in report['modes']:
+            # Connection overhead per request that each mode saves compared to a fresh connection per request
+            baseline = report['modes']['fresh']['mean_ms']
+            report['overhead_saved_ms'] = {
+                mode: round(baseline - stats['mean_ms'], 3) for mode, stats in report['modes'].items() if mode != 'fresh'
+            }
+        return report
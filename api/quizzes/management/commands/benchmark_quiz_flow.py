@@ -0,0 +1,97 @@
+import json
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+
+from quizzes.bundles import import_bundle, open_bundle
+from quizzes.loadtest import compare, run_quiz_flow, summarize
+from quizzes.management.commands.seed_lizards import LIZARDS_BUNDLE
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the quiz-taking flow (register, start attempt, current_question/answer '
+        'to completion, results) with concurrent simulated students and reports throughput, '
+        'p50/p95/p99 latency and queries per request for each endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=20, help='Number of simulated students (default: 20).')
+        parser.add_argument('--concurrency', type=int, default=8, help='Worker threads (default: 8).')
+        parser.add_argument('--bundle', default=str(LIZARDS_BUNDLE), help='Quiz bundle loaded into the benchmark database.')
+        parser.add_argument('--use-current-db', action='store_true',
+                            help='Run against the configured database and its existing quizzes instead of a throwaway test database.')
+        parser.add_argument('--output', '-o', help='Write the JSON report to this file.')
+        parser.add_argument('--compare', help='A previous JSON report to diff p95 latency and queries per request against.')
+
+    def handle(self, *args, **options):
+        if options['use_current_db']:
+            report = self.run(options, Quiz.objects.values_list('id', flat=True))
+        else:
+            report = self.run_on_test_database(options)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline:
+                report['compared_to'] = {'file': options['compare'], 'deltas': compare(report, json.load(baseline))}
+
+        rendered = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(rendered + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))  # type: ignore
+        self.stdout.write(rendered)
+
+    def run_on_test_database(self, options):
+        """Creates a throwaway database, loads the bundle, runs the benchmark and cleans up."""
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # SQLite stand-in: a file (rather than in-memory) database and immediate
+                # transactions let worker threads wait on the write lock instead of failing.
+                database = connection.settings_dict
+                database.setdefault('TEST', {})['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+                database.setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 30})
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                with open_bundle(options['bundle']) as bundle:
+                    import_bundle(bundle)
+                return self.run(options, Quiz.objects.values_list('id', flat=True))
+            finally:
+                connection.close()
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+    def run(self, options, quiz_ids):
+        quiz_ids = list(quiz_ids)
+        if not quiz_ids:
+            raise CommandError('No quizzes to benchmark.')
+        recorder, wall_seconds, failures = run_quiz_flow(quiz_ids, options['students'], options['concurrency'])
+        return {
+            'benchmark': 'quiz_flow',
+            'created_at': timezone.now().isoformat(),
+            'git_revision': self.git_revision(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'students': options['students'],
+            'concurrency': options['concurrency'],
+            'failed_students': failures,
+            'wall_seconds': round(wall_seconds, 3),
+            'total_requests': len(recorder.samples),
+            'throughput_rps': round(len(recorder.samples) / wall_seconds, 2) if wall_seconds else None,
+            'endpoints': summarize(recorder.samples, wall_seconds),
+        }
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,92 @@
+import itertools
+import uuid
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+
+from quizzes.loadtest import compare, run_quiz_flow, run_read_benchmark, summarize
+from quizzes.attempt_state import question_order
+from quizzes.models import Attempt, Quiz, Student
+from quizzes.question_plan import get_question_plan
+
+from .benchmark_quiz_flow import Command as QuizFlowBenchmark
+
+# (endpoint, sync path, async path); {quiz}, {open} and {completed} are filled per request
+READ_ENDPOINTS = (
+    ('quizzes.list', '/api/quizzes/', '/api/async/quizzes/'),
+    ('quizzes.retrieve', '/api/quizzes/{quiz}/', '/api/async/quizzes/{quiz}/'),
+    ('attempts.current_question', '/api/attempts/{open}/current_question/', '/api/async/attempts/{open}/current_question/'),
+    ('attempts.results', '/api/attempts/{completed}/results/', '/api/async/attempts/{completed}/results/'),
+)
+
+
+class Command(QuizFlowBenchmark):
+    help = (
+        'Compares the read endpoints (quiz list/detail, current_question, results) served by the '
+        'sync DRF views through the WSGI handler against the async views through the ASGI handler, '
+        'at high concurrency: throughput, p50/p95/p99 latency and queries per request.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=2000, help='GET requests per mode (default: 2000).')
+        parser.add_argument('--mode', choices=('wsgi', 'asgi', 'both'), default='both', help='Handler(s) to benchmark (default: both).')
+        parser.set_defaults(concurrency=64)
+
+    def run(self, options, quiz_ids):
+        quiz_ids = list(quiz_ids)
+        if not quiz_ids:
+            raise CommandError('No quizzes to benchmark.')
+        open_ids, completed_ids = self.prepare_attempts(quiz_ids, options['students'])
+
+        report = {
+            'benchmark': 'read_path',
+            'created_at': timezone.now().isoformat(),
+            'git_revision': self.git_revision(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+        }
+        modes = ('wsgi', 'asgi') if options['mode'] == 'both' else (options['mode'],)
+        for mode in modes:
+            targets = self.targets(mode, quiz_ids, open_ids, completed_ids)
+            recorder, wall_seconds = run_read_benchmark(mode, targets, options['requests'], options['concurrency'])
+            report[mode] = {
+                'wall_seconds': round(wall_seconds, 3),
+                'throughput_rps': round(len(recorder.samples) / wall_seconds, 2) if wall_seconds else None,
+                'errors': sum(1 for sample in recorder.samples if sample.status >= 400),
+                'endpoints': summarize(recorder.samples, wall_seconds),
+            }
+        if len(modes) == 2:
+            # Positive p95 deltas mean ASGI is slower than WSGI for that endpoint
+            report['asgi_minus_wsgi'] = compare(report['asgi'], report['wsgi'])
+        return report
+
+    def prepare_attempts(self, quiz_ids, students):
+        """Completes `students` attempts through the API and opens one more attempt per quiz."""
+        run_quiz_flow(quiz_ids, students, min(students, 8))
+        completed_ids = list(Attempt.objects.filter(quiz_id__in=quiz_ids, time_end__isnull=False).values_list('id', flat=True))  # type: ignore
+        run_id = uuid.uuid4().hex[:8]
+        open_ids = []
+        for quiz in Quiz.objects.filter(id__in=quiz_ids):
+            plan = get_question_plan(quiz)
+            if not plan:
+                continue
+            student = Student.objects.create(name='reader', email=f'read-{run_id}-{quiz.id}@example.com')  # type: ignore
+            attempt = Attempt.objects.create(student=student, quiz=quiz, question_order=question_order(plan))  # type: ignore
+            open_ids.append(attempt.id)
+        if not open_ids or not completed_ids:
+            raise CommandError('Could not prepare attempts to read.')
+        return open_ids, completed_ids
+
+    def targets(self, mode, quiz_ids, open_ids, completed_ids):
+        """One (endpoint, path) per endpoint in turn, cycling through quizzes and attempts."""
+        ids = {'quiz': itertools.cycle(quiz_ids), 'open': itertools.cycle(open_ids), 'completed': itertools.cycle(completed_ids)}
+        rounds = max(len(quiz_ids), len(open_ids), len(completed_ids))
+        targets = []
+        for _ in range(rounds):
+            for endpoint, sync_path, async_path in READ_ENDPOINTS:
+                path = async_path if mode == 'asgi' else sync_path
+                targets.append((endpoint, path.format(**{key: next(values) for key, values in ids.items() if '{' + key + '}' in path})))
+        return targets
@@ -0,0 +1,106 @@
+import time
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from quizzes.loadtest import run_quiz_flow
+from quizzes.models import Attempt, MCQ, Quiz
+from quizzes.projections import attempt_results_payload, current_question_payload, load_question, quiz_detail_payload
+from quizzes.question_plan import get_question_plan, question_model
+from quizzes.renderers import render_json
+from quizzes.results import load_attempt_results
+from quizzes.serializers import AttemptResultsSerializer, ChoiceQuizSerializer, CurrentQuestionSerializer, QuizDetailSerializer
+
+from .benchmark_quiz_flow import Command as QuizFlowBenchmark
+
+
+def current_question_data(question, choices, position, total_questions, quiz_id):
+    """
+    The "before" current question payload: `CurrentQuestionSerializer` for an
+    already loaded question at a position of an attempt's question order;
+    `choices` are the MCQ's choices (None for FTQs).
+    """
+    data = {
+        'question_id': question.id,
+        'question_type': question.__class__.__name__.lower(),
+        'question_text': question.question,
+        'points': question.points,
+        'question_number': position + 1,
+        'total_questions': total_questions,
+        'quiz_id': quiz_id
+    }
+    if choices is not None:
+        data['choices'] = ChoiceQuizSerializer(choices, many=True).data
+    return CurrentQuestionSerializer(data).data
+
+
+class Command(QuizFlowBenchmark):
+    help = (
+        'Micro-benchmarks rendering the hot payloads (quiz detail, attempt results, current question) '
+        'from already loaded rows: DRF serializers with JSONRenderer before, projections with the '
+        'orjson renderer after. Reports payloads rendered per second.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=2000, help='Renders per payload and path (default: 2000).')
+
+    def run(self, options, quiz_ids):
+        quiz = Quiz.objects.filter(pk__in=list(quiz_ids)).order_by('-question_count', 'id').first()  # type: ignore
+        if quiz is None:
+            raise CommandError('No quizzes to benchmark.')
+        # One completed attempt to render results for
+        run_quiz_flow([quiz.id], students=1, concurrency=1)
+        attempt = Attempt.objects.select_related('student', 'quiz').filter(quiz=quiz, time_end__isnull=False).latest('time_end')  # type: ignore
+        load_attempt_results(attempt)
+
+        full_quiz = Quiz.objects.prefetch_related('mcqs__choices', 'ftqs').get(pk=quiz.pk)  # type: ignore
+        plan = get_question_plan(quiz)
+        entry = plan[0]
+        question = question_model(entry).objects.get(pk=entry.question_id)
+        choices = list(question.choices.all()) if isinstance(question, MCQ) else None
+        row = load_question(entry)
+
+        cases = {
+            'quiz_detail': (
+                lambda: JSONRenderer().render(QuizDetailSerializer(full_quiz).data),
+                lambda: render_json(quiz_detail_payload(full_quiz)),
+            ),
+            'attempt_results': (
+                lambda: JSONRenderer().render(AttemptResultsSerializer(attempt).data),
+                lambda: render_json(attempt_results_payload(attempt)),
+            ),
+            'current_question': (
+                lambda: JSONRenderer().render(current_question_data(question, choices, 0, len(plan), quiz.id)),
+                lambda: render_json(current_question_payload(row, 0, len(plan), quiz.id)),
+            ),
+        }
+        payloads = {}
+        for name, (before, after) in cases.items():
+            before_rate = self.rate(before, options['iterations'])
+            after_rate = self.rate(after, options['iterations'])
+            payloads[name] = {
+                'before_per_second': round(before_rate),
+                'after_per_second': round(after_rate),
+                'speedup': round(after_rate / before_rate, 2),
+            }
+        return {
+            'benchmark': 'serializers',
+            'created_at': timezone.now().isoformat(),
+            'git_revision': self.git_revision(),
+            'database': connection.vendor,
+            'quiz_questions': len(plan),
+            'iterations': options['iterations'],
+            'payloads': payloads,
+        }
+
+    def rate(self, render, iterations):
+        """Renders per second of `render()`, after a short warm-up."""
+        for _ in range(min(iterations, 50)):
+            render()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        return iterations / (time.perf_counter() - start)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.exports import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, filter_attempts, iter_export, parse_timestamp
+
+
+class Command(BaseCommand):
+    help = 'Streams attempts and their answers as NDJSON or CSV (same format as /api/attempts/export/).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson', help='Output format (default: ndjson).')
+        parser.add_argument('--quiz', type=int, help='Only export attempts on this quiz id.')
+        parser.add_argument('--student', type=int, help='Only export attempts by this student id.')
+        parser.add_argument('--completed-after', help='Only export attempts completed at or after this ISO date/datetime.')
+        parser.add_argument('--completed-before', help='Only export attempts completed before this ISO date/datetime.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per database round trip.')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+
+    def handle(self, *args, **options):
+        try:
+            attempts = filter_attempts(
+                quiz_id=options['quiz'],
+                student_id=options['student'],
+                completed_after=parse_timestamp(options['completed_after']) if options['completed_after'] else None,
+                completed_before=parse_timestamp(options['completed_before']) if options['completed_before'] else None,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        chunks = iter_export(options['format'], attempts, options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.bundles import iter_bundle, open_bundle
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Exports quizzes as a quiz bundle (.jsonl, gzip-compressed if the file name ends in .gz).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Quiz id to export (repeatable; default: all).')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.filter(pk__in=options['quiz']) if options['quiz'] else Quiz.objects.all()
+        lines = iter_bundle(quizzes)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open_bundle(options['output'], 'w') as output:
+            for line in lines:
+                output.write(line)
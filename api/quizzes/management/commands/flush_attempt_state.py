@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.attempt_state import cached_attempt_ids, enabled, flush_attempt_state
+from quizzes.models import Attempt
+from quizzes.question_plan import get_question_plan
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes the cached state of in-progress attempts (buffered answers and cursors, see '
+        'quizzes/attempt_state.py) to the database. Run it periodically in write-behind mode '
+        'and before anything that clears the cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--discard', action='store_true', help='Also drop the flushed states from the cache.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Attempts looked up in the cache at a time (default: 500).')
+
+    def handle(self, *args, **options):
+        if not enabled():
+            raise CommandError('The attempt state engine is off (QUIZ_ATTEMPT_STATE["ENABLED"]).')
+        open_ids = list(Attempt.objects.filter(time_end__isnull=True).order_by('id').values_list('id', flat=True))  # type: ignore
+        batch_size = options['batch_size']
+        flushed = 0
+        for start in range(0, len(open_ids), batch_size):
+            cached_ids = cached_attempt_ids(open_ids[start:start + batch_size])
+            for attempt in Attempt.objects.filter(id__in=cached_ids).select_related('quiz'):  # type: ignore
+                plan = get_question_plan(attempt.quiz)
+                if plan and flush_attempt_state(attempt, plan, discard=options['discard']):
+                    flushed += 1
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} attempt state(s).'))  # type: ignore
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from quizzes.bundles import DEFAULT_BATCH_SIZE, BundleError, import_bundle, open_bundle
+
+
+class Command(BaseCommand):
+    help = 'Imports quizzes from one or more quiz bundle files (.jsonl, optionally .gz) in a single transaction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('bundles', nargs='+', help='Bundle files to import.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of questions inserted per bulk_create batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the bundles; write nothing.')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for path in options['bundles']:
+            try:
+                with open_bundle(path) as bundle:
+                    counts = import_bundle(bundle, batch_size=options['batch_size'], dry_run=options['dry_run'])
+            except (OSError, BundleError) as error:
+                raise CommandError(f'{path}: {error}')
+
+            verb = 'Validated' if options['dry_run'] else 'Imported'
+            self.stdout.write(self.style.SUCCESS(  # type: ignore
+                f'{verb} {path}: {counts["quizzes"]} quizzes, {counts["mcqs"]} multiple choice '
+                f'and {counts["ftqs"]} free text questions.'
+            ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.leaderboard import rebuild_quiz_aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the leaderboard aggregates (best score per student and score histogram per quiz) '
+        'from completed attempts, e.g. after attempts were deleted or rescored.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Quiz id to rebuild (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        best_scores, buckets = rebuild_quiz_aggregates(options['quiz'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {best_scores} best score(s) and {buckets} histogram bucket(s).'))  # type: ignore
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Renders the stored quiz payload snapshots (student and answer-key views, see quizzes/snapshots.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Quiz id to render (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        rendered = rebuild_snapshots(options['quiz'])
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} snapshot(s).'))  # type: ignore
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.models import Quiz
+from quizzes.regrading import regrade_quiz
+
+
+class Command(BaseCommand):
+    help = (
+        'Regrades stored answers against the current answer keys (choice flags, accepted answers, '
+        'grading policies) and question points, then rescores the attempts that changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Quiz id to regrade (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.order_by('id')  # type: ignore
+        if options['quiz']:
+            quizzes = quizzes.filter(id__in=options['quiz'])
+        answers = attempts = 0
+        for quiz in quizzes:
+            result = regrade_quiz(quiz)
+            answers += result.answers
+            attempts += result.attempts
+        self.stdout.write(self.style.SUCCESS(f'Regraded {answers} answer(s); {attempts} attempt(s) changed.'))  # type: ignore
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the stored question count and total points of quizzes from their questions, '
+        'e.g. after questions were bulk-created or updated with queryset updates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Quiz id to repair (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        repaired = Quiz.repair_totals(options['quiz'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed the totals of {repaired} quiz(zes).'))  # type: ignore
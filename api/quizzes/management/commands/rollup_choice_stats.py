@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.choice_stats import rollup_choice_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-choice selection counters from stored answers, e.g. after attempts were deleted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Quiz id to roll up (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        written = rollup_choice_stats(options['quiz'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {written} choice counter(s).'))  # type: ignore
@@ -0,0 +1,285 @@
+"""
+Per-endpoint request metrics and SQL instrumentation.
+
+`MetricsMiddleware` times every request, counts its SQL queries and SQL time
+through a connection execute wrapper, and records them under the view that
+handled it. DRF viewsets report themselves as "<ViewSet>.<action>" (see
+`InstrumentedViewSetMixin`); other views fall back to their URL name.
+
+Collected per view:
+
+- request latency, SQL queries per request and response size histograms;
+- total SQL time;
+- a bounded sample of slow queries with the view that issued them;
+
+plus the number of database connects per alias, which shows whether
+connections are being reused (see quiz_wizard/db_config.py).
+
+Metrics are exposed in the Prometheus text format by `metrics_view`, slow
+query samples as JSON by `slow_queries_view`, and every response carries a
+`Server-Timing` header. Recording is a handful of dict updates under a lock,
+cheap enough to leave enabled.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _settings():
+    return {
+        'SLOW_QUERY_MS': 100,
+        'SLOW_QUERY_SAMPLES': 50,
+        **getattr(settings, 'QUIZ_METRICS', {}),
+    }
+
+
+class Histogram:
+    """A Prometheus-style histogram with fixed upper bounds."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yields (upper bound, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            yield bound, total
+        yield '+Inf', self.count
+
+
+class ViewMetrics:
+    __slots__ = ('latency', 'queries', 'response_size', 'sql_seconds', 'responses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.sql_seconds = 0.0
+        self.responses = {}
+
+
+class MetricsRegistry:
+    """Process-wide metrics store, shared by all worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.views = {}
+            self.connects = {}
+            self.slow_queries = deque(maxlen=_settings()['SLOW_QUERY_SAMPLES'])
+
+    def record(self, view, status, seconds, queries, sql_seconds, size, slow_queries):
+        with self._lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(queries)
+            if size is not None:
+                metrics.response_size.observe(size)
+            metrics.sql_seconds += sql_seconds
+            status_class = f'{status // 100}xx'
+            metrics.responses[status_class] = metrics.responses.get(status_class, 0) + 1
+            self.slow_queries.extend(slow_queries)
+
+    def record_connect(self, alias):
+        with self._lock:
+            self.connects[alias] = self.connects.get(alias, 0) + 1
+
+    def render_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            views = sorted(self.views.items())
+            lines = []
+
+            def histogram(name, help_text, attribute):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, metrics in views:
+                    values = getattr(metrics, attribute)
+                    for bound, count in values.cumulative():
+                        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{view="{view}"}} {values.sum}')
+                    lines.append(f'{name}_count{{view="{view}"}} {values.count}')
+
+            histogram('quizwhiz_request_duration_seconds', 'Request latency by view.', 'latency')
+            histogram('quizwhiz_request_db_queries', 'SQL queries per request by view.', 'queries')
+            histogram('quizwhiz_response_size_bytes', 'Response body size by view.', 'response_size')
+
+            lines.append('# HELP quizwhiz_db_time_seconds_total Time spent in SQL by view.')
+            lines.append('# TYPE quizwhiz_db_time_seconds_total counter')
+            for view, metrics in views:
+                lines.append(f'quizwhiz_db_time_seconds_total{{view="{view}"}} {metrics.sql_seconds}')
+
+            lines.append('# HELP quizwhiz_responses_total Responses by view and status class.')
+            lines.append('# TYPE quizwhiz_responses_total counter')
+            for view, metrics in views:
+                for status_class, count in sorted(metrics.responses.items()):
+                    lines.append(f'quizwhiz_responses_total{{view="{view}",status="{status_class}"}} {count}')
+
+            lines.append('# HELP quizwhiz_db_connects_total Database connections opened (or checked out of the pool) by alias.')
+            lines.append('# TYPE quizwhiz_db_connects_total counter')
+            for alias, count in sorted(self.connects.items()):
+                lines.append(f'quizwhiz_db_connects_total{{alias="{alias}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """A connection execute wrapper that counts and times queries, keeping slow ones."""
+
+    def __init__(self, slow_seconds):
+        self.slow_seconds = slow_seconds
+        self.count = 0
+        self.seconds = 0.0
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if elapsed >= self.slow_seconds:
+                self.slow.append((sql, elapsed))
+
+
+# The timer of the request being handled. A context variable rather than a
+# per-connection wrapper: connections are per thread, and async views run
+# their queries in worker threads, which inherit the request's context.
+_active_timer = ContextVar('quizwhiz_query_timer', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = _active_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timing(connection):
+    """Adds the request query timer hook to a connection (once)."""
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+@receiver(connection_created, dispatch_uid='quizwhiz-query-timing')
+def _on_connection_created(sender, connection, **kwargs):
+    install_query_timing(connection)
+    registry.record_connect(connection.alias)
+
+
+def set_view_label(request, label):
+    """Records which view (e.g. "QuizViewSet.retrieve") handled a request."""
+    request._metrics_view = label
+
+
+class InstrumentedViewSetMixin:
+    """DRF hook: labels requests with "<ViewSet>.<action>" once DRF has resolved the action."""
+
+    def initial(self, request, *args, **kwargs):
+        set_view_label(request._request, f'{type(self).__name__}.{self.action}')
+        super().initial(request, *args, **kwargs)
+
+
+class MetricsMiddleware:
+    """
+    Records per-view metrics for every request and adds a Server-Timing header.
+    Sync and async capable, so async views under ASGI stay on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _active_timer.reset(token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timer, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _active_timer.reset(token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    def start(self):
+        # Connections opened before this module was imported missed the signal
+        for alias in connections:
+            install_query_timing(connections[alias])
+        timer = QueryTimer(_settings()['SLOW_QUERY_MS'] / 1000)
+        return timer, _active_timer.set(timer), time.perf_counter()
+
+    def finish(self, request, response, timer, seconds):
+        view = getattr(request, '_metrics_view', None)
+        if view is None:
+            match = getattr(request, 'resolver_match', None)
+            view = match.view_name if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, response.status_code, seconds, timer.count, timer.seconds, size,
+            [
+                {'view': view, 'path': request.path, 'sql': sql[:2000], 'ms': round(elapsed * 1000, 3)}
+                for sql, elapsed in timer.slow
+            ],
+        )
+        response['Server-Timing'] = (
+            f'db;dur={timer.seconds * 1000:.3f};desc="{timer.count} queries", '
+            f'total;dur={seconds * 1000:.3f}'
+        )
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def slow_queries_view(request):
+    """The most recent slow query samples, newest last."""
+    with registry._lock:
+        samples = list(registry.slow_queries)
+    return JsonResponse({'slow_query_ms': _settings()['SLOW_QUERY_MS'], 'samples': samples})
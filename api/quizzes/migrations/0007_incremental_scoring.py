@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:39
+
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+
+
+def backfill_scores(apps, schema_editor):
+    """Fills in answer points, attempt running totals, duration and score for existing rows."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    MCQ = apps.get_model('quizzes', 'MCQ')
+    FTQ = apps.get_model('quizzes', 'FTQ')
+    Attempt = apps.get_model('quizzes', 'Attempt')
+    Answer = apps.get_model('quizzes', 'Answer')
+
+    for model, question_model in (('mcq', MCQ), ('ftq', FTQ)):
+        question_type = ContentType.objects.filter(app_label='quizzes', model=model).first()
+        if question_type is None:
+            continue
+        Answer.objects.filter(is_correct=True, question_type=question_type).update(
+            points_earned=Coalesce(Subquery(question_model.objects.filter(pk=OuterRef('question_id')).values('points')[:1]), 0)
+        )
+
+    answers = Answer.objects.filter(attempt=OuterRef('pk')).order_by().values('attempt')
+    Attempt.objects.update(
+        points_earned=Coalesce(Subquery(answers.annotate(total=Sum('points_earned')).values('total'), output_field=IntegerField()), 0),
+        correct_count=Coalesce(Subquery(answers.annotate(total=Count('pk', filter=Q(is_correct=True))).values('total'), output_field=IntegerField()), 0),
+        answered_count=Coalesce(Subquery(answers.annotate(total=Count('pk')).values('total'), output_field=IntegerField()), 0),
+    )
+
+    completed = Attempt.objects.filter(time_end__isnull=False)
+    completed.update(duration=ExpressionWrapper(F('time_end') - F('time_start'), output_field=DurationField()))
+    for quiz in Quiz.objects.all():
+        total_points = (MCQ.objects.filter(quiz=quiz).aggregate(total=Sum('points'))['total'] or 0) + \
+            (FTQ.objects.filter(quiz=quiz).aggregate(total=Sum('points'))['total'] or 0)
+        if total_points:
+            completed.filter(quiz=quiz).update(score=Cast(F('points_earned'), FloatField()) * Value(100.0) / Value(float(total_points)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_quiz_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='points_earned',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='answered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='correct_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='points_earned',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
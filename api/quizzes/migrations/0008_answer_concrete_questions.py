@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('quizzes', '0007_incremental_scoring'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='ftq',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answers', to='quizzes.ftq'),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='mcq',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answers', to='quizzes.mcq'),
+        ),
+    ]
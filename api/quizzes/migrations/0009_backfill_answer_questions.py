@@ -0,0 +1,84 @@
+from django.db import migrations
+from django.db.models import Count, DurationField, ExpressionWrapper, F, FloatField, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    """
+    Prepares existing rows for the constraints added in 0010:
+    copies each answer's polymorphic question into the concrete mcq/ftq
+    column, removes duplicate answers (keeping the newest), and completes all
+    but the newest open attempt per (student, quiz), scored like any other
+    completed attempt.
+    """
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    MCQ = apps.get_model('quizzes', 'MCQ')
+    FTQ = apps.get_model('quizzes', 'FTQ')
+    Attempt = apps.get_model('quizzes', 'Attempt')
+    Answer = apps.get_model('quizzes', 'Answer')
+
+    for model, question_model, column in (('mcq', MCQ, 'mcq'), ('ftq', FTQ, 'ftq')):
+        question_type = ContentType.objects.filter(app_label='quizzes', model=model).first()
+        if question_type is not None:
+            Answer.objects.filter(question_type=question_type).update(**{
+                column: Subquery(question_model.objects.filter(pk=OuterRef('question_id')).values('pk')[:1])
+            })
+
+    duplicates = (
+        Answer.objects.values('attempt', 'question_type', 'question_id')
+        .annotate(newest=Max('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    affected_attempts = set()
+    for duplicate in duplicates:
+        Answer.objects.filter(
+            attempt=duplicate['attempt'],
+            question_type=duplicate['question_type'],
+            question_id=duplicate['question_id'],
+        ).exclude(id=duplicate['newest']).delete()
+        affected_attempts.add(duplicate['attempt'])
+
+    if affected_attempts:
+        answers = Answer.objects.filter(attempt=OuterRef('pk')).order_by().values('attempt')
+        Attempt.objects.filter(pk__in=affected_attempts).update(
+            points_earned=Coalesce(Subquery(answers.annotate(total=Sum('points_earned')).values('total'), output_field=IntegerField()), 0),
+            correct_count=Coalesce(Subquery(answers.annotate(total=Count('pk', filter=Q(is_correct=True))).values('total'), output_field=IntegerField()), 0),
+            answered_count=Coalesce(Subquery(answers.annotate(total=Count('pk')).values('total'), output_field=IntegerField()), 0),
+        )
+
+    open_duplicates = (
+        Attempt.objects.filter(time_end__isnull=True)
+        .values('student', 'quiz')
+        .annotate(newest=Max('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    now = timezone.now()
+    total_points = {}
+    for duplicate in open_duplicates:
+        quiz = duplicate['quiz']
+        if quiz not in total_points:
+            total_points[quiz] = (MCQ.objects.filter(quiz=quiz).aggregate(total=Sum('points'))['total'] or 0) + \
+                (FTQ.objects.filter(quiz=quiz).aggregate(total=Sum('points'))['total'] or 0)
+        if total_points[quiz]:
+            score = Cast(F('points_earned'), FloatField()) * Value(100.0) / Value(float(total_points[quiz]))
+        else:
+            score = Value(0.0)
+        closed = list(Attempt.objects.filter(
+            student=duplicate['student'], quiz=quiz, time_end__isnull=True
+        ).exclude(id=duplicate['newest']).values_list('id', flat=True))
+        Attempt.objects.filter(pk__in=closed).update(time_end=now, score=score)
+        Attempt.objects.filter(pk__in=closed).update(
+            duration=ExpressionWrapper(F('time_end') - F('time_start'), output_field=DurationField())
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0008_answer_concrete_questions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0009_backfill_answer_questions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('time_end__isnull', True)), fields=['student', '-time_start'], name='attempt_open_by_student'),
+        ),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(fields=('attempt', 'question_type', 'question_id'), name='answer_unique_per_attempt_question'),
+        ),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.CheckConstraint(condition=models.Q(('mcq__isnull', True), ('ftq__isnull', True), _connector='OR'), name='answer_single_concrete_question'),
+        ),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(condition=models.Q(('time_end__isnull', True)), fields=('student', 'quiz'), name='attempt_one_open_per_student_quiz'),
+        ),
+    ]
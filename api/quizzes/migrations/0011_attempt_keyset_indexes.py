@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('quizzes', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attempt',
+            name='attempt_open_by_student',
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('time_end__isnull', True)), fields=['student', '-time_start', '-id'], name='attempt_open_by_student'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['-time_start', '-id'], name='attempt_newest_first'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0011_attempt_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizBestScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('achieved_at', models.DateTimeField()),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quizzes.attempt')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_scores', to='quizzes.quiz')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_scores', to='quizzes.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['quiz', '-score', 'achieved_at', 'id'], name='best_score_leaderboard')],
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'student'), name='best_score_unique_per_quiz_student')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='quizzes.quiz')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'bucket'), name='score_bucket_unique_per_quiz')],
+            },
+        ),
+    ]
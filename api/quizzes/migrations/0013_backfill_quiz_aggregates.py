@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, F, IntegerField, Window
+from django.db.models.functions import Cast, Floor, Least, RowNumber
+
+BUCKET_WIDTH = 10
+BUCKETS = 10
+
+
+def backfill(apps, schema_editor):
+    """Fills the leaderboard aggregates from existing completed attempts (as quizzes.leaderboard.rebuild_quiz_aggregates)."""
+    Attempt = apps.get_model('quizzes', 'Attempt')
+    QuizBestScore = apps.get_model('quizzes', 'QuizBestScore')
+    QuizScoreBucket = apps.get_model('quizzes', 'QuizScoreBucket')
+
+    completed = Attempt.objects.filter(time_end__isnull=False, score__isnull=False)
+    best_rows = completed.annotate(
+        rank=Window(RowNumber(), partition_by=[F('quiz_id'), F('student_id')], order_by=[F('score').desc(), F('time_end'), F('id')]),
+    ).filter(rank=1).values_list('quiz_id', 'student_id', 'id', 'score', 'time_end')
+    QuizBestScore.objects.bulk_create(
+        (QuizBestScore(quiz_id=quiz_id, student_id=student_id, attempt_id=attempt_id, score=score, achieved_at=time_end)
+         for quiz_id, student_id, attempt_id, score, time_end in best_rows.iterator()),
+        batch_size=1000
+    )
+
+    bucket_rows = completed.annotate(
+        bucket=Least(Cast(Floor(F('score') / BUCKET_WIDTH), IntegerField()), BUCKETS - 1),
+    ).values_list('quiz_id', 'bucket').annotate(count=Count('id')).order_by()
+    QuizScoreBucket.objects.bulk_create(
+        [QuizScoreBucket(quiz_id=quiz_id, bucket=max(bucket, 0), count=count) for quiz_id, bucket, count in bucket_rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0012_quiz_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
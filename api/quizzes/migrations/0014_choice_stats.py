@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0013_backfill_quiz_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChoiceStat',
+            fields=[
+                ('choice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='quizzes.choice')),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill(apps, schema_editor):
+    """Fills the choice selection counters from existing answers (as quizzes.choice_stats.rollup_choice_stats)."""
+    Answer = apps.get_model('quizzes', 'Answer')
+    ChoiceStat = apps.get_model('quizzes', 'ChoiceStat')
+    counts = Answer.objects.filter(selected_choice__isnull=False).values_list('selected_choice_id').annotate(count=Count('id')).order_by()
+    ChoiceStat.objects.bulk_create([ChoiceStat(choice_id=choice_id, count=count) for choice_id, count in counts], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0014_choice_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
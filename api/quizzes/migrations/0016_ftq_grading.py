@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0015_backfill_choice_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ftq',
+            name='accepted_answers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='ftq',
+            name='grading_policy',
+            field=models.CharField(choices=[('exact', 'Exact match'), ('normalized', 'Ignore case, accents, punctuation and spacing'), ('fuzzy', 'Normalized, within max_edits typos')], default='normalized', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='ftq',
+            name='max_edits',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Fuzzy policy: edits (insertions, deletions, substitutions) allowed.'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    """Fills the stored quiz totals from existing questions (as Quiz.repair_totals)."""
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    totals = {}
+    for model_name in ('MCQ', 'FTQ'):
+        questions = apps.get_model('quizzes', model_name).objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+        for field, aggregate in (('question_count', Count('pk')), ('total_points', Sum('points'))):
+            total = Coalesce(Subquery(questions.annotate(total=aggregate).values('total'), output_field=IntegerField()), 0)
+            totals[field] = totals[field] + total if field in totals else total
+    Quiz.objects.update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0017_quiz_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0018_backfill_quiz_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('variant', models.CharField(max_length=16)),
+                ('version', models.PositiveIntegerField()),
+                ('payload', models.BinaryField()),
+                ('rendered_at', models.DateTimeField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='quizzes.quiz')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'variant'), name='snapshot_unique_per_quiz_variant')],
+            },
+        ),
+    ]
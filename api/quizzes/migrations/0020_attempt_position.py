@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0019_quiz_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='answered',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='question_order',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
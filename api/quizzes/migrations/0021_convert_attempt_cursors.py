@@ -0,0 +1,72 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def question_order(apps, quiz_id, mcq_ct, ftq_ct):
+    """The quiz's question order as a question plan builds it: MCQs, then FTQs, each by id."""
+    order = [[mcq_ct, mcq_id] for mcq_id in apps.get_model('quizzes', 'MCQ').objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', flat=True)]
+    order += [[ftq_ct, ftq_id] for ftq_id in apps.get_model('quizzes', 'FTQ').objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', flat=True)]
+    return order
+
+
+def convert(apps, schema_editor):
+    """
+    Gives existing attempts a question order, the position of their
+    current_question pointer in it (past the furthest stored answer when the
+    pointer is unset or stale) and the answered bitmap of their stored answers.
+    """
+    Attempt = apps.get_model('quizzes', 'Attempt')
+    Answer = apps.get_model('quizzes', 'Answer')
+    content_types = dict(apps.get_model('contenttypes', 'ContentType').objects.filter(
+        app_label='quizzes', model__in=['mcq', 'ftq']
+    ).values_list('model', 'id'))
+    orders = {}
+    attempts = Attempt.objects.order_by('pk').only('pk', 'quiz_id', 'current_question_type_id', 'current_question_id')
+    batch = []
+
+    def save(batch):
+        answers = Answer.objects.filter(attempt_id__in=[attempt.pk for attempt in batch]).values_list('attempt_id', 'question_type_id', 'question_id')
+        answered_keys = {}
+        for attempt_id, question_type_id, question_id in answers:
+            answered_keys.setdefault(attempt_id, []).append((question_type_id, question_id))
+        for attempt in batch:
+            positions = {tuple(key): position for position, key in enumerate(attempt.question_order)}
+            answered = bytearray()
+            furthest = -1
+            for key in answered_keys.get(attempt.pk, ()):
+                position = positions.get(key)
+                if position is not None:
+                    if position >> 3 >= len(answered):
+                        answered.extend(bytes((position >> 3) + 1 - len(answered)))
+                    answered[position >> 3] |= 1 << (position & 7)
+                    furthest = max(furthest, position)
+            position = positions.get((attempt.current_question_type_id, attempt.current_question_id))
+            if position is None:
+                position = max(min(furthest + 1, len(positions) - 1), 0)
+            attempt.position = position
+            attempt.answered = bytes(answered)
+        Attempt.objects.bulk_update(batch, ['question_order', 'position', 'answered'])
+
+    for attempt in attempts.iterator(chunk_size=BATCH_SIZE):
+        if attempt.quiz_id not in orders:
+            orders[attempt.quiz_id] = question_order(apps, attempt.quiz_id, content_types.get('mcq'), content_types.get('ftq'))
+        attempt.question_order = orders[attempt.quiz_id]
+        batch.append(attempt)
+        if len(batch) >= BATCH_SIZE:
+            save(batch)
+            batch = []
+    if batch:
+        save(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('quizzes', '0020_attempt_position'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0021_convert_attempt_cursors'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='attempt',
+            name='current_question_id',
+        ),
+        migrations.RemoveField(
+            model_name='attempt',
+            name='current_question_type',
+        ),
+    ]
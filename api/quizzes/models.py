@@ -1,20 +1,96 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
 # --- Quiz Model ---
 class Quiz(models.Model):
     name = models.CharField(max_length=255)
+    # Bumped whenever the quiz's questions or choices change (see quizzes.signals).
+    # Cached data derived from quiz content (e.g. question plans) is keyed on it.
+    content_version = models.PositiveIntegerField(default=1)  # type: ignore
+    # Totals over the quiz's MCQs and FTQs, kept in step with question saves and deletes
+    # (see quizzes.signals); the `repair_quiz_totals` command recomputes them.
+    question_count = models.PositiveIntegerField(default=0)  # type: ignore
+    total_points = models.PositiveIntegerField(default=0)  # type: ignore
+
+    # Fields maintained with queryset updates rather than by saving the instance.
+    DERIVED_FIELDS = ('content_version', 'question_count', 'total_points')
 
     def __str__(self):
         return self.name
 
-    @property
-    def total_points(self):
-        """Calculates the total points for all questions in the quiz."""
-        mcq_points = self.mcqs.aggregate(total=models.Sum('points'))['total'] or 0  # type: ignore
-        ftq_points = self.ftqs.aggregate(total=models.Sum('points'))['total'] or 0  # type: ignore
-        return mcq_points + ftq_points
+    # The pk this instance was loaded or saved under, while its row is known to exist.
+    _stored_pk = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_pk = instance.pk
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Never write back a possibly stale in-memory copy of the derived fields.
+        Only applies to rows known to exist; an instance built with an explicit
+        pk, given a new pk or saved again after a delete is saved as usual.
+        """
+        stored = not self._state.adding and self.pk is not None and self.pk == self._stored_pk
+        if stored and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        self._stored_pk = self.pk
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._stored_pk = None
+        return result
+
+    @classmethod
+    def bump_content_version(cls, quiz_ids):
+        """Atomically increments the content version of the given quizzes."""
+        quiz_ids = [quiz_id for quiz_id in quiz_ids if quiz_id is not None]
+        if quiz_ids:
+            cls.objects.filter(pk__in=quiz_ids).update(content_version=models.F('content_version') + 1)  # type: ignore
+
+    @classmethod
+    def adjust_totals(cls, quiz_id, questions, points):
+        """Atomically adds to the question count and total points of a quiz."""
+        if quiz_id is not None and (questions or points):
+            cls.objects.filter(pk=quiz_id).update(  # type: ignore
+                question_count=models.F('question_count') + questions,
+                total_points=models.F('total_points') + points,
+            )
+
+    @classmethod
+    def repair_totals(cls, quiz_ids=None):
+        """Recomputes the stored totals of the given quizzes (default: all) with one UPDATE. Returns the number of quizzes updated."""
+        quizzes = cls.objects.all() if quiz_ids is None else cls.objects.filter(pk__in=quiz_ids)  # type: ignore
+        totals = {}
+        for model in (MCQ, FTQ):
+            questions = model.objects.filter(quiz=models.OuterRef('pk')).order_by().values('quiz')  # type: ignore
+            for field, aggregate in (('question_count', models.Count('pk')), ('total_points', models.Sum('points'))):
+                subquery = models.Subquery(questions.annotate(total=aggregate).values('total'), output_field=models.IntegerField())
+                total = Coalesce(subquery, 0)
+                totals[field] = totals[field] + total if field in totals else total
+        return quizzes.update(**totals)
+
+# --- Questions ---
+class QuestionTotalsMixin:
+    """
+    Saves and deletes questions in a transaction, so the quiz totals updated by
+    the signal handlers (quizzes.signals) commit or roll back with the question.
+    """
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
 # --- Student Model ---
 class Student(models.Model):
@@ -25,16 +101,26 @@ class Student(models.Model):
         return self.name
 
 # --- Free Text Question (FTQ) Model ---
-class FTQ(models.Model):
+class GradingPolicy(models.TextChoices):
+    """How free-text responses are compared with an FTQ's accepted answers (see quizzes/grading.py)."""
+    EXACT = 'exact', 'Exact match'
+    NORMALIZED = 'normalized', 'Ignore case, accents, punctuation and spacing'
+    FUZZY = 'fuzzy', 'Normalized, within max_edits typos'
+
+class FTQ(QuestionTotalsMixin, models.Model):
     quiz = models.ForeignKey(Quiz, related_name='ftqs', on_delete=models.CASCADE, null=True)
     question = models.TextField()
     points = models.PositiveIntegerField()
+    # Without accepted answers, any non-empty response is correct
+    accepted_answers = models.JSONField(default=list, blank=True)
+    grading_policy = models.CharField(max_length=16, choices=GradingPolicy.choices, default=GradingPolicy.NORMALIZED)
+    max_edits = models.PositiveSmallIntegerField(default=1, help_text='Fuzzy policy: edits (insertions, deletions, substitutions) allowed.')  # type: ignore
 
     def __str__(self):
         return self.question
 
 # --- Multiple Choice Question (MCQ) Model ---
-class MCQ(models.Model):
+class MCQ(QuestionTotalsMixin, models.Model):
     quiz = models.ForeignKey(Quiz, related_name='mcqs', on_delete=models.CASCADE, null=True)
     question = models.TextField()
     points = models.PositiveIntegerField(default=5)  # type: ignore
@@ -58,12 +144,38 @@ class Attempt(models.Model):
     time_start = models.DateTimeField(auto_now_add=True)
     time_end = models.DateTimeField(null=True, blank=True)
     score = models.FloatField(null=True, blank=True)
-    # Polymorphic current_question (can be MCQ or FTQ)
-    current_question_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True)
-    current_question_id = models.PositiveIntegerField(null=True, blank=True)
-    current_question = GenericForeignKey('current_question_type', 'current_question_id')
+    # The attempt's fixed question order ([content_type_id, question_id] pairs, taken from the
+    # quiz's question plan when it starts), the cursor into it and a bitmap of the positions
+    # answered (bit i of byte i // 8); see quizzes/attempt_state.py
+    question_order = models.JSONField(default=list, blank=True)
+    position = models.PositiveIntegerField(default=0)  # type: ignore
+    answered = models.BinaryField(default=b'', blank=True)
     # Optional: duration (pre-calculated)
     duration = models.DurationField(null=True, blank=True)
+    # Running totals, updated atomically as answers are created or replaced (see quizzes/scoring.py)
+    points_earned = models.PositiveIntegerField(default=0)  # type: ignore
+    correct_count = models.PositiveIntegerField(default=0)  # type: ignore
+    answered_count = models.PositiveIntegerField(default=0)  # type: ignore
+
+    class Meta:
+        constraints = [
+            # A student has at most one open attempt per quiz (also serves the resume lookup)
+            models.UniqueConstraint(
+                fields=['student', 'quiz'],
+                condition=models.Q(time_end__isnull=True),
+                name='attempt_one_open_per_student_quiz',
+            ),
+        ]
+        indexes = [
+            # Student.in_progress_attempts: open attempts, newest first (keyset pagination key)
+            models.Index(
+                fields=['student', '-time_start', '-id'],
+                condition=models.Q(time_end__isnull=True),
+                name='attempt_open_by_student',
+            ),
+            # Attempt list: all attempts, newest first (keyset pagination key)
+            models.Index(fields=['-time_start', '-id'], name='attempt_newest_first'),
+        ]
 
     def __str__(self):
         return f"Attempt by {self.student} on {self.quiz}"
@@ -75,9 +187,88 @@ class Answer(models.Model):
     question_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     question_id = models.PositiveIntegerField()
     question = GenericForeignKey('question_type', 'question_id')
+    # Concrete copies of the polymorphic question, so hot paths can join instead of resolving the GFK
+    mcq = models.ForeignKey(MCQ, null=True, blank=True, on_delete=models.SET_NULL, related_name='answers')
+    ftq = models.ForeignKey(FTQ, null=True, blank=True, on_delete=models.SET_NULL, related_name='answers')
     selected_choice = models.ForeignKey(Choice, null=True, blank=True, on_delete=models.SET_NULL)
     free_text_response = models.TextField(null=True, blank=True)
     is_correct = models.BooleanField()
+    # Points awarded when the answer was submitted
+    points_earned = models.PositiveIntegerField(default=0)  # type: ignore
+
+    class Meta:
+        constraints = [
+            # One answer per question per attempt (also serves the answer upsert lookup)
+            models.UniqueConstraint(
+                fields=['attempt', 'question_type', 'question_id'],
+                name='answer_unique_per_attempt_question',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(mcq__isnull=True) | models.Q(ftq__isnull=True),
+                name='answer_single_concrete_question',
+            ),
+        ]
 
     def __str__(self):
         return f"Answer to {self.question} in {self.attempt}"
+
+# --- Quiz aggregates (see quizzes/leaderboard.py) ---
+class QuizBestScore(models.Model):
+    """A student's best completed attempt at a quiz; earlier attempts win ties."""
+    quiz = models.ForeignKey(Quiz, related_name='best_scores', on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, related_name='best_scores', on_delete=models.CASCADE)
+    attempt = models.ForeignKey(Attempt, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+    achieved_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'student'], name='best_score_unique_per_quiz_student'),
+        ]
+        indexes = [
+            # Leaderboard: top N of a quiz
+            models.Index(fields=['quiz', '-score', 'achieved_at', 'id'], name='best_score_leaderboard'),
+        ]
+
+    def __str__(self):
+        return f"{self.student}: {self.score} on {self.quiz}"
+
+class QuizScoreBucket(models.Model):
+    """Number of completed attempts at a quiz whose score falls in one histogram bucket."""
+    quiz = models.ForeignKey(Quiz, related_name='score_buckets', on_delete=models.CASCADE)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)  # type: ignore
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'bucket'], name='score_bucket_unique_per_quiz'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz} bucket {self.bucket}: {self.count}"
+
+# --- Choice selection counters (see quizzes/choice_stats.py) ---
+class ChoiceStat(models.Model):
+    """Number of answers that currently select a choice."""
+    choice = models.OneToOneField(Choice, primary_key=True, related_name='stat', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)  # type: ignore
+
+    def __str__(self):
+        return f"{self.choice}: {self.count}"
+
+# --- Pre-rendered quiz payloads (see quizzes/snapshots.py) ---
+class QuizSnapshot(models.Model):
+    """The rendered JSON of one quiz payload variant, as of a content version."""
+    quiz = models.ForeignKey(Quiz, related_name='snapshots', on_delete=models.CASCADE)
+    variant = models.CharField(max_length=16)
+    version = models.PositiveIntegerField()
+    payload = models.BinaryField()
+    rendered_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'variant'], name='snapshot_unique_per_quiz_variant'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz} {self.variant} v{self.version}"
@@ -0,0 +1,110 @@
+"""
+Keyset (seek) pagination for the attempt and student lists.
+
+Each page is fetched with `WHERE (key) < (last key of previous page)
+ORDER BY key LIMIT n`, where the key is a unique ordering such as
+(time_start, id). The index on the key serves the whole query, so every page
+costs the same no matter how deep into the history it is. The cursor is the
+last row's key, encoded in the `next` link:
+
+    {"next": "http://.../api/attempts/?cursor=WyIyMDI0LTAx...", "results": [...]}
+
+Unlike DRF's `CursorPagination` (which seeks on the first ordering field only
+and skips ties with an OFFSET), ties are broken by the trailing `id`.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # Must end with a unique field; "-" for descending
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.seek(fields, self.decode_cursor(cursor, fields)))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        self.next_key = None
+        if len(rows) > self.page_size_value:
+            rows = rows[:self.page_size_value]
+            self.next_key = [field.value_to_string(rows[-1]) for field in fields]
+        return rows
+
+    def seek(self, fields, values):
+        """The condition "row comes after `values` in `ordering`", as a lexicographic OR of ANDs."""
+        condition = Q()
+        for position, (name, field) in enumerate(zip(self.ordering, fields)):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{field.attname}__{lookup}': values[position]})
+            for earlier, earlier_field in enumerate(fields[:position]):
+                step &= Q(**{earlier_field.attname: values[earlier]})
+            condition |= step
+        return condition
+
+    def decode_cursor(self, cursor, fields):
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(raw, list) or len(raw) != len(fields):
+                raise ValueError(raw)
+            return [field.to_python(value) for field, value in zip(fields, raw)]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, key):
+        return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_key))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class AttemptPagination(KeysetPagination):
+    """Attempts, newest first."""
+    ordering = ('-time_start', '-id')
+
+
+class StudentPagination(KeysetPagination):
+    """Students, in registration order."""
+    ordering = ('id',)
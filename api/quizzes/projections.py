@@ -0,0 +1,114 @@
+"""
+Read-only projections for the hot read endpoints.
+
+The DRF serializers in quizzes/serializers.py describe these payloads field by
+field and run every value through a field object on each call; for
+`current_question` the payload was even built as a dict first and then pushed
+through `CurrentQuestionSerializer` again. The functions here build the same
+payloads directly:
+
+- `current_question_payload` from a `QuestionRow` (a slotted dataclass
+  loaded with two narrow `values_list()` queries);
+- `attempt_results_payload` from the loaded attempt (with student and quiz)
+  and its `AttemptResults`;
+- `quiz_detail_payload` from a quiz with `mcqs__choices` and `ftqs`
+  prefetched (used to render quiz snapshots, see quizzes/snapshots.py).
+
+The serializers stay the reference for the payload shapes: tests check both
+produce identical payloads, and `benchmark_serializers` compares their speed.
+"""
+from dataclasses import dataclass
+
+from rest_framework import serializers
+
+from .models import Choice, MCQ
+from .question_plan import question_model
+from .results import load_attempt_results
+
+# DRF's datetime formatting (current time zone, 'Z' for UTC), as ModelSerializer applies it
+_datetime = serializers.DateTimeField()
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionRow:
+    question_type: str
+    id: int
+    question: str
+    points: int
+    choices: tuple = None  # (id, content) pairs; None for FTQs
+
+
+def _question_querysets(entry):
+    model = question_model(entry)
+    question = model.objects.filter(pk=entry.question_id).values_list('id', 'question', 'points')  # type: ignore
+    choices = Choice.objects.filter(mcq_id=entry.question_id).order_by('id').values_list('id', 'content') if model is MCQ else None  # type: ignore
+    return model._meta.model_name, question, choices
+
+
+def load_question(entry):
+    """Loads the question at a plan entry as a QuestionRow."""
+    question_type, question, choices = _question_querysets(entry)
+    return QuestionRow(question_type, *question.get(), choices=tuple(choices) if choices is not None else None)
+
+
+async def aload_question(entry):
+    """`load_question` using the async ORM."""
+    question_type, question, choices = _question_querysets(entry)
+    choices = tuple([row async for row in choices]) if choices is not None else None
+    return QuestionRow(question_type, *(await question.aget()), choices=choices)
+
+
+def current_question_payload(row, position, total_questions, quiz_id):
+    """The `CurrentQuestionSerializer` payload for a loaded question at a position of an attempt's question order."""
+    data = {
+        'question_id': row.id,
+        'question_type': row.question_type,
+        'question_text': row.question,
+        'points': row.points,
+    }
+    if row.choices is not None:
+        data['choices'] = [{'id': choice_id, 'content': content} for choice_id, content in row.choices]
+    data['question_number'] = position + 1
+    data['total_questions'] = total_questions
+    data['quiz_id'] = quiz_id
+    return data
+
+
+def attempt_results_payload(attempt):
+    """The `AttemptResultsSerializer` payload for a completed attempt loaded with its student and quiz."""
+    student, quiz = attempt.student, attempt.quiz
+    return {
+        'id': attempt.id,
+        'student': {'id': student.id, 'name': student.name, 'email': student.email},
+        'quiz': {'id': quiz.id, 'name': quiz.name, 'question_count': quiz.question_count, 'total_points': quiz.total_points},
+        'time_start': _datetime.to_representation(attempt.time_start),
+        'time_end': _datetime.to_representation(attempt.time_end),
+        'score': attempt.score,
+        'total_questions': quiz.question_count,
+        'correct_answers': attempt.correct_count,
+        'total_points_earned': attempt.points_earned,
+        'total_possible_points': quiz.total_points,
+        'time_taken': attempt.time_end - attempt.time_start if attempt.time_end and attempt.time_start else None,
+        'answers': load_attempt_results(attempt).answers,
+    }
+
+
+def quiz_detail_payload(quiz, with_answers=False):
+    """
+    The `QuizDetailSerializer` payload (`QuizWithAnswersSerializer` with
+    `with_answers`) for a quiz with `mcqs__choices` and `ftqs` prefetched.
+    """
+    mcqs = []
+    for mcq in quiz.mcqs.all():
+        if with_answers:
+            choices = [{'id': choice.id, 'content': choice.content, 'is_correct': choice.is_correct} for choice in mcq.choices.all()]
+        else:
+            choices = [{'id': choice.id, 'content': choice.content} for choice in mcq.choices.all()]
+        mcqs.append({'id': mcq.id, 'question': mcq.question, 'points': mcq.points, 'choices': choices})
+    ftqs = []
+    for ftq in quiz.ftqs.all():
+        data = {'id': ftq.id, 'question': ftq.question, 'points': ftq.points}
+        if with_answers:
+            data['accepted_answers'] = ftq.accepted_answers
+        ftqs.append(data)
+    return {'id': quiz.id, 'name': quiz.name, 'mcqs': mcqs, 'ftqs': ftqs}
@@ -0,0 +1,186 @@
+"""
+Precompiled, cached question plans.
+
+A question plan is the ordered, compact description of a quiz's questions that
+the attempt endpoints need in order to move through a quiz: for every question
+its content type id, id, points and choice ids, and for FTQs the compiled
+answer key (see quizzes/grading.py). Plans are built once per quiz
+content version and kept in an in-process cache, optionally backed by the
+Django cache so that several worker processes can share one build.
+
+`Quiz.content_version` is bumped by the signal handlers in `quizzes.signals`
+whenever an MCQ, FTQ or Choice changes, which makes any cached plan for the
+previous version unreachable.
+"""
+import threading
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import DEFAULT_DB_ALIAS
+
+from .grading import compile_answer_key
+from .models import MCQ, FTQ, Choice
+
+PlanEntry = namedtuple(
+    'PlanEntry',
+    ['content_type_id', 'question_id', 'points', 'choice_ids', 'correct_choice_ids', 'answer_key'],
+    defaults=(None,),
+)
+
+
+class QuestionPlan:
+    """An immutable, ordered sequence of `PlanEntry` tuples for one quiz version."""
+
+    __slots__ = ('quiz_id', 'version', 'entries', 'total_points', '_positions')
+
+    def __init__(self, quiz_id, version, entries):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.entries = tuple(entries)
+        self.total_points = sum(entry.points for entry in self.entries)
+        self._positions = {
+            (entry.content_type_id, entry.question_id): position
+            for position, entry in enumerate(self.entries)
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, position):
+        return self.entries[position]
+
+    def position_of(self, content_type_id, question_id):
+        """Returns the 0-based position of a question, or None if it is not in the quiz."""
+        return self._positions.get((content_type_id, question_id))
+
+    def next_entry(self, position):
+        """Returns the entry following `position`, or None at the end of the quiz."""
+        if position + 1 < len(self.entries):
+            return self.entries[position + 1]
+        return None
+
+
+def mcq_content_type_id():
+    return ContentType.objects.get_for_model(MCQ).id
+
+
+def ftq_content_type_id():
+    return ContentType.objects.get_for_model(FTQ).id
+
+
+async def acontent_type_ids():
+    """
+    Returns (MCQ content type id, FTQ content type id) from an async context.
+    They are normally in ContentType's cache; the first lookup in a process
+    runs in a worker thread and fills it, so the sync helpers here are then
+    safe to call from async code too.
+    """
+    try:
+        return mcq_content_type_id(), ftq_content_type_id()
+    except SynchronousOnlyOperation:
+        return await sync_to_async(lambda: (mcq_content_type_id(), ftq_content_type_id()))()
+
+
+def question_model(entry):
+    """Returns the model class (MCQ or FTQ) a plan entry refers to."""
+    return ContentType.objects.get_for_id(entry.content_type_id).model_class()
+
+
+# --- Building ---
+
+def build_question_plan(quiz_id, version):
+    """
+    Builds a plan from the database: MCQs first, then FTQs, each ordered by id.
+    Reads the primary: the plan is cached under a version the primary just
+    reported, which a lagging replica might not have caught up with yet.
+    """
+    mcq_ct = mcq_content_type_id()
+    ftq_ct = ftq_content_type_id()
+
+    choice_ids = {}
+    correct_choice_ids = {}
+    choices = Choice.objects.using(DEFAULT_DB_ALIAS).filter(mcq__quiz_id=quiz_id).order_by('id').values_list('mcq_id', 'id', 'is_correct')  # type: ignore
+    for mcq_id, choice_id, is_correct in choices:
+        choice_ids.setdefault(mcq_id, []).append(choice_id)
+        if is_correct:
+            correct_choice_ids.setdefault(mcq_id, []).append(choice_id)
+
+    entries = [
+        PlanEntry(mcq_ct, mcq_id, points, tuple(choice_ids.get(mcq_id, ())), frozenset(correct_choice_ids.get(mcq_id, ())))
+        for mcq_id, points in MCQ.objects.using(DEFAULT_DB_ALIAS).filter(quiz_id=quiz_id).order_by('id').values_list('id', 'points')  # type: ignore
+    ]
+    ftqs = FTQ.objects.using(DEFAULT_DB_ALIAS).filter(quiz_id=quiz_id).order_by('id').values_list(  # type: ignore
+        'id', 'points', 'accepted_answers', 'grading_policy', 'max_edits'
+    )
+    entries += [
+        PlanEntry(ftq_ct, ftq_id, points, (), frozenset(), compile_answer_key(accepted_answers, policy, max_edits))
+        for ftq_id, points, accepted_answers, policy, max_edits in ftqs
+    ]
+    return QuestionPlan(quiz_id, version, entries)
+
+
+# --- Caching ---
+
+_local_plans = {}
+_local_lock = threading.Lock()
+
+
+def _shared_cache():
+    """Returns the Django cache backing the in-process cache, or None if disabled."""
+    alias = getattr(settings, 'QUIZ_QUESTION_PLAN_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _shared_key(quiz_id, version):
+    return f'quizzes:question-plan:{quiz_id}:{version}'
+
+
+def get_question_plan(quiz):
+    """
+    Returns the question plan for the quiz's current content version.
+
+    Lookup order: in-process cache, then the shared Django cache (if configured
+    through the QUIZ_QUESTION_PLAN_CACHE setting), then the database.
+    """
+    version = quiz.content_version
+    plan = _local_plans.get(quiz.pk)
+    if plan is not None and plan.version == version:
+        return plan
+
+    shared = _shared_cache()
+    entries = shared.get(_shared_key(quiz.pk, version)) if shared is not None else None
+    if entries is not None:
+        plan = QuestionPlan(quiz.pk, version, (PlanEntry(*entry) for entry in entries))
+    else:
+        plan = build_question_plan(quiz.pk, version)
+        if shared is not None:
+            shared.set(_shared_key(quiz.pk, version), [tuple(entry) for entry in plan.entries])
+
+    with _local_lock:
+        current = _local_plans.get(quiz.pk)
+        if current is None or current.version <= version:
+            _local_plans[quiz.pk] = plan
+    return plan
+
+
+def invalidate_question_plans(quiz_ids):
+    """Drops this process's cached plans; other processes notice the version bump."""
+    with _local_lock:
+        for quiz_id in quiz_ids:
+            _local_plans.pop(quiz_id, None)
+
+
+async def aget_question_plan(quiz):
+    """
+    `get_question_plan` for async views. An in-process hit returns without
+    leaving the event loop; otherwise the lookup runs in a worker thread.
+    """
+    await acontent_type_ids()
+    plan = _local_plans.get(quiz.pk)
+    if plan is not None and plan.version == quiz.content_version:
+        return plan
+    return await sync_to_async(get_question_plan)(quiz)
@@ -0,0 +1,185 @@
+"""
+Regrading stored answers after an answer key changes.
+
+Fixing a choice's `is_correct` flag, a question's points or an FTQ's accepted
+answers leaves the answers already stored for that question, and the scores
+of their attempts, stale. `regrade_quiz` brings them back in line:
+
+- MCQ answers are regraded in SQL: one SELECT finds the attempts with an
+  answer whose correctness or points no longer match the choice flags and
+  question points, and one UPDATE rewrites just those answers.
+- FTQ answers need the free-text matcher (quizzes/grading.py), so they are
+  streamed once, each distinct (question, response) pair is graded once,
+  and only answers whose verdict or points changed are written, one UPDATE
+  per batch.
+- The affected attempts' running totals and scores are then recomputed, and
+  their quizzes' leaderboard aggregates rebuilt. Attempts are found by their
+  answers, not by quiz, so those at a question's previous quiz are rescored too.
+- A points change also moves the quiz's total points, so every completed
+  attempt at the quiz whose score no longer matches is rescored as well.
+
+The admin regrades after a question or its choices are saved
+(`schedule_regrade`): inline when the question has few answers, otherwise
+in a background thread once the edit is committed. The `regrade_answers`
+command does the same on demand.
+
+Answers still buffered by write-behind attempt state (quizzes/attempt_state.py)
+are written as they were graded; run `flush_attempt_state` first.
+"""
+import logging
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Subquery, Value, When
+
+from .grading import grade_free_text
+from .leaderboard import rebuild_quiz_aggregates
+from .models import Answer, Attempt, Choice, MCQ, Quiz
+from .question_plan import ftq_content_type_id, get_question_plan
+from .scoring import recalculate_attempt_totals, score_expression
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 500
+
+RegradeResult = namedtuple('RegradeResult', ['answers', 'attempts'])
+
+
+def _settings():
+    return {
+        'BACKGROUND_THRESHOLD': 5000,
+        **getattr(settings, 'QUIZ_REGRADING', {}),
+    }
+
+
+def rescore_attempts(attempt_ids):
+    """
+    Recomputes the running totals of the given attempts, and the scores of the
+    completed ones against their own quiz's total points: a question moved to
+    another quiz still carries answers from attempts at its old one. Returns
+    the ids of the attempts' quizzes.
+    """
+    attempts = Attempt.objects.filter(pk__in=attempt_ids)  # type: ignore
+    recalculate_attempt_totals(attempts)
+    quiz_ids = set(attempts.values_list('quiz_id', flat=True).order_by().distinct())
+    for quiz in Quiz.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=quiz_ids):  # type: ignore
+        total_points = get_question_plan(quiz).total_points
+        attempts.filter(quiz=quiz, time_end__isnull=False).update(score=score_expression(total_points))
+    return quiz_ids
+
+
+def rescore_stale_scores(quiz, total_points):
+    """
+    Rescores the completed attempts at a quiz whose score no longer matches
+    their running total over the quiz's total points, as after a question's
+    points change, even for attempts whose answers did not. Returns their ids.
+    """
+    score = score_expression(total_points)
+    stale = Attempt.objects.filter(quiz=quiz, time_end__isnull=False).alias(rescored=score).exclude(score=F('rescored'))  # type: ignore
+    attempt_ids = set(stale.values_list('pk', flat=True))
+    if attempt_ids:
+        Attempt.objects.filter(pk__in=attempt_ids).update(score=score)  # type: ignore
+    return attempt_ids
+
+
+def _regrade_mcq_answers(mcq_ids):
+    """Regrades MCQ answers in SQL. Returns (answers changed, ids of their attempts)."""
+    correct = Exists(Choice.objects.filter(pk=OuterRef('selected_choice_id'), is_correct=True))  # type: ignore
+    points = Case(
+        When(correct, then=Subquery(MCQ.objects.filter(pk=OuterRef('mcq_id')).values('points'))),  # type: ignore
+        default=Value(0), output_field=IntegerField()
+    )
+    stale = Answer.objects.filter(mcq_id__in=mcq_ids).alias(  # type: ignore
+        regraded_correct=correct, regraded_points=points
+    ).exclude(is_correct=F('regraded_correct'), points_earned=F('regraded_points'))
+
+    attempt_ids = set(stale.values_list('attempt_id', flat=True).order_by().distinct())
+    if not attempt_ids:
+        return 0, attempt_ids
+    changed = Answer.objects.filter(pk__in=stale.values('pk')).update(is_correct=correct, points_earned=points)  # type: ignore
+    return changed, attempt_ids
+
+
+def _regrade_ftq_answers(entries):
+    """Regrades the answers to the given FTQ plan entries ({ftq_id: entry}). Returns (answers changed, ids of their attempts)."""
+    answers = Answer.objects.filter(ftq_id__in=entries).values_list(  # type: ignore
+        'id', 'attempt_id', 'ftq_id', 'free_text_response', 'is_correct', 'points_earned'
+    ).order_by()
+
+    verdicts = {}
+    now_correct, now_wrong, attempt_ids = [], [], set()
+    for answer_id, attempt_id, ftq_id, response, is_correct, points_earned in answers.iterator():
+        verdict = verdicts.get((ftq_id, response))
+        if verdict is None:
+            verdict = verdicts[ftq_id, response] = grade_free_text(entries[ftq_id].answer_key, response)
+        if (verdict, points_earned) != (is_correct, entries[ftq_id].points if verdict else 0):
+            (now_correct if verdict else now_wrong).append(answer_id)
+            attempt_ids.add(attempt_id)
+
+    points = Case(*(When(ftq_id=ftq_id, then=Value(entry.points)) for ftq_id, entry in entries.items()), output_field=IntegerField())
+    for start in range(0, len(now_correct), UPDATE_BATCH_SIZE):
+        Answer.objects.filter(pk__in=now_correct[start:start + UPDATE_BATCH_SIZE]).update(is_correct=True, points_earned=points)  # type: ignore
+    for start in range(0, len(now_wrong), UPDATE_BATCH_SIZE):
+        Answer.objects.filter(pk__in=now_wrong[start:start + UPDATE_BATCH_SIZE]).update(is_correct=False, points_earned=0)  # type: ignore
+    return len(now_correct) + len(now_wrong), attempt_ids
+
+
+def regrade_quiz(quiz, mcq_ids=None, ftq_ids=None):
+    """
+    Regrades the stored answers to the given questions of the quiz (default:
+    all of them) against the current answer keys and points, and rescores the
+    attempts that changed, along with any completed attempt whose score moved
+    with the quiz's total points. Returns a RegradeResult of answers and
+    attempts changed.
+    """
+    plan = get_question_plan(quiz)
+    ftq_ct = ftq_content_type_id()
+    if mcq_ids is None:
+        mcq_ids = [entry.question_id for entry in plan.entries if entry.content_type_id != ftq_ct]
+    ftq_entries = {
+        entry.question_id: entry for entry in plan.entries
+        if entry.content_type_id == ftq_ct and (ftq_ids is None or entry.question_id in ftq_ids)
+    }
+
+    with transaction.atomic():
+        mcq_answers, mcq_attempt_ids = _regrade_mcq_answers(mcq_ids) if mcq_ids else (0, set())
+        ftq_answers, ftq_attempt_ids = _regrade_ftq_answers(ftq_entries) if ftq_entries else (0, set())
+        attempt_ids = mcq_attempt_ids | ftq_attempt_ids
+        quiz_ids = rescore_attempts(attempt_ids) if attempt_ids else set()
+        rescored_ids = rescore_stale_scores(quiz, plan.total_points)
+        if rescored_ids:
+            quiz_ids.add(quiz.pk)
+        if quiz_ids:
+            rebuild_quiz_aggregates(quiz_ids)
+    return RegradeResult(mcq_answers + ftq_answers, len(attempt_ids | rescored_ids))
+
+
+def _regrade_in_background(quiz_id, mcq_ids, ftq_ids):
+    try:
+        # Content reads may go to a replica, which can lag behind the edit that scheduled this
+        quiz = Quiz.objects.using(DEFAULT_DB_ALIAS).get(pk=quiz_id)  # type: ignore
+        result = regrade_quiz(quiz, mcq_ids, ftq_ids)
+        logger.info('Regraded quiz %s: %s answer(s) across %s attempt(s) changed.', quiz_id, result.answers, result.attempts)
+    except Exception:
+        logger.exception('Regrading quiz %s failed.', quiz_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_regrade(quiz_id, mcq_ids=None, ftq_ids=None):
+    """
+    Regrades answers to the given questions after an answer key change.
+    Questions with at most `QUIZ_REGRADING['BACKGROUND_THRESHOLD']` stored
+    answers are regraded inline and the RegradeResult returned. Larger
+    histories are regraded in a background thread once the current
+    transaction commits; returns None then.
+    """
+    answers = Answer.objects.filter(mcq_id__in=mcq_ids or []) | Answer.objects.filter(ftq_id__in=ftq_ids or [])  # type: ignore
+    if answers.count() <= _settings()['BACKGROUND_THRESHOLD']:
+        return regrade_quiz(Quiz.objects.using(DEFAULT_DB_ALIAS).get(pk=quiz_id), mcq_ids or [], ftq_ids or [])  # type: ignore
+    transaction.on_commit(lambda: threading.Thread(
+        target=_regrade_in_background, args=(quiz_id, mcq_ids or [], ftq_ids or []), daemon=True
+    ).start())
+    return None
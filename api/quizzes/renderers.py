@@ -0,0 +1,50 @@
+"""
+orjson-based JSON rendering and parsing for the API.
+
+`ORJSONRenderer` and `ORJSONParser` replace DRF's `JSONRenderer` and
+`JSONParser` (see REST_FRAMEWORK in settings). They produce and accept the
+same JSON: compact, UTF-8, and values orjson does not handle natively
+(timedeltas, decimals, lazy strings, and datetimes, so they keep DRF's
+format) go through DRF's encoder. Indented output, as requested by the
+browsable API, still goes through DRF's renderer.
+
+`render_json` is the same encoding for bodies built outside DRF responses
+(cached payloads, snapshots, the async views).
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+_fallback = JSONEncoder()
+
+
+def render_json(data):
+    """Encodes data as compact UTF-8 JSON bytes, byte-for-byte as DRF's JSONRenderer would."""
+    body = orjson.dumps(data, default=_fallback.default, option=_OPTIONS)
+    # Like DRF, escape the two line terminators that are valid JSON but not valid JavaScript
+    return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return render_json(data)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
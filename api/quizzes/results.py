@@ -0,0 +1,71 @@
+"""
+Constant-query loading of attempt results.
+
+`AttemptResults` fetches everything a results page needs with a fixed number
+of queries, independent of how many questions were answered:
+
+1. the attempt's answers, joined with their questions (through the concrete
+   `mcq`/`ftq` foreign keys rather than the generic relation) and selected choices;
+2. the quiz's correct choices (one narrow `values()` query);
+
+and joins them in memory. The attempt itself (with student and quiz) is
+expected to have been loaded already, e.g. by `AttemptViewSet.get_object`.
+
+The summary numbers (points, counts, totals) are not computed here: they are
+read from the attempt's running totals (see quizzes/scoring.py) and the quiz's
+stored totals.
+"""
+from .models import Choice
+from .question_plan import acontent_type_ids, mcq_content_type_id, ftq_content_type_id
+
+
+def _querysets(attempt):
+    correct = Choice.objects.filter(mcq__quiz_id=attempt.quiz_id, is_correct=True).order_by('id').values_list('mcq_id', 'content')  # type: ignore
+    answers = attempt.answers.select_related('mcq', 'ftq', 'selected_choice').order_by('id')
+    return correct, answers
+
+
+class AttemptResults:
+    """The in-memory join of an attempt's answers with its quiz's questions."""
+
+    def __init__(self, attempt, correct=None, answers=None):
+        # The rows are loaded here unless already fetched (see `aload`)
+        if answers is None:
+            correct, answers = _querysets(attempt)
+        mcq_ct = mcq_content_type_id()
+        ftq_ct = ftq_content_type_id()
+
+        correct_choices = {}
+        for mcq_id, content in correct:
+            correct_choices.setdefault(mcq_id, content)
+
+        self.answers = []
+        for answer in answers:
+            question = answer.mcq or answer.ftq
+            answer_data = {
+                'question_text': question.question if question else None,
+                'is_correct': answer.is_correct,
+                'points_earned': answer.points_earned,
+            }
+            if answer.question_type_id == mcq_ct:
+                answer_data['correct_answer'] = correct_choices.get(answer.question_id)
+                answer_data['student_answer'] = answer.selected_choice.content if answer.selected_choice else None
+            elif answer.question_type_id == ftq_ct:
+                answer_data['student_answer'] = answer.free_text_response
+                # For FTQ, we'd need a way to store correct answers or use manual grading
+            self.answers.append(answer_data)
+
+    @classmethod
+    async def aload(cls, attempt):
+        """Loads the results with the async ORM."""
+        await acontent_type_ids()
+        correct, answers = _querysets(attempt)
+        return cls(attempt, [row async for row in correct], [answer async for answer in answers])
+
+
+def load_attempt_results(attempt):
+    """Returns the attempt's answer details, loading them at most once per attempt instance."""
+    results = getattr(attempt, '_results_cache', None)
+    if results is None:
+        results = attempt._results_cache = AttemptResults(attempt)
+    return results
@@ -0,0 +1,208 @@
+"""
+Incremental scoring.
+
+Each `Answer` stores the points it earned when it was submitted, and each
+`Attempt` keeps running totals (points earned, correct and answered counts).
+The totals are adjusted with single `UPDATE ... SET x = x + delta` statements
+whenever an answer is created or replaced, so reading a score never requires
+walking the answers again.
+"""
+from django.db import transaction
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .choice_stats import apply_choice_deltas, selection_deltas
+from .grading import grade_free_text
+from .leaderboard import record_completion
+from .models import Attempt, Answer
+from .question_plan import mcq_content_type_id
+
+
+class InvalidChoice(ValueError):
+    """Raised when a choice id does not belong to the question being answered."""
+
+
+class InvalidResponse(ValueError):
+    """Raised when a free-text response is not a string."""
+
+
+def grade(entry, choice_id=None, free_text_response=None):
+    """
+    Grades a response to the question described by a plan entry.
+    Returns (selected_choice_id, free_text_response, is_correct).
+    """
+    if entry.content_type_id == mcq_content_type_id():
+        if not choice_id:
+            return None, None, False
+        try:
+            choice_id = int(choice_id)
+        except (TypeError, ValueError):
+            raise InvalidChoice(choice_id)
+        if choice_id not in entry.choice_ids:
+            raise InvalidChoice(choice_id)
+        return choice_id, None, choice_id in entry.correct_choice_ids
+
+    if free_text_response is not None and not isinstance(free_text_response, str):
+        raise InvalidResponse(free_text_response)
+    return None, free_text_response, grade_free_text(entry.answer_key, free_text_response)
+
+
+def concrete_question_ids(entry):
+    """The (mcq_id, ftq_id) pair to store on an answer to a plan entry."""
+    if entry.content_type_id == mcq_content_type_id():
+        return entry.question_id, None
+    return None, entry.question_id
+
+
+def lock_attempt(attempt):
+    """
+    Locks the attempt's row for the rest of the transaction. Writers of the same
+    attempt's answers queue here: locking the answer rows alone locks nothing
+    when the answer does not exist yet, and two first answers would both insert.
+    """
+    Attempt.objects.select_for_update().filter(pk=attempt.pk).values_list('pk', flat=True).first()  # type: ignore
+
+
+def record_answer(attempt, entry, *, selected_choice_id=None, free_text_response=None, is_correct=False):
+    """
+    Creates or replaces the attempt's answer to the question described by a
+    plan entry, and updates the attempt's running totals and the choice
+    selection counters in the same transaction.
+    """
+    points_earned = entry.points if is_correct else 0
+    with transaction.atomic():
+        lock_attempt(attempt)
+        existing_answer = Answer.objects.filter(
+            attempt=attempt,
+            question_type_id=entry.content_type_id,
+            question_id=entry.question_id
+        ).first()
+
+        if existing_answer:
+            points_delta = points_earned - existing_answer.points_earned
+            correct_delta = int(is_correct) - int(existing_answer.is_correct)
+            answered_delta = 0
+            previous_choice_id = existing_answer.selected_choice_id
+            existing_answer.selected_choice_id = selected_choice_id
+            existing_answer.free_text_response = free_text_response
+            existing_answer.is_correct = is_correct
+            existing_answer.points_earned = points_earned
+            existing_answer.save(update_fields=['selected_choice', 'free_text_response', 'is_correct', 'points_earned'])
+        else:
+            points_delta = points_earned
+            correct_delta = int(is_correct)
+            answered_delta = 1
+            previous_choice_id = None
+            mcq_id, ftq_id = concrete_question_ids(entry)
+            Answer.objects.create(
+                attempt=attempt,
+                question_type_id=entry.content_type_id,
+                question_id=entry.question_id,
+                mcq_id=mcq_id,
+                ftq_id=ftq_id,
+                selected_choice_id=selected_choice_id,
+                free_text_response=free_text_response,
+                is_correct=is_correct,
+                points_earned=points_earned
+            )
+
+        apply_totals_delta(attempt, points_delta, correct_delta, answered_delta)
+        apply_choice_deltas(selection_deltas([(previous_choice_id, selected_choice_id)]))
+
+
+def record_answers(attempt, graded):
+    """
+    Creates or replaces several answers at once. `graded` maps plan entries to
+    (selected_choice_id, free_text_response, is_correct) tuples as returned by
+    `grade`. Existing answers are read with one query and written back with
+    `bulk_create`/`bulk_update`; the running totals and the choice selection
+    counters are adjusted once.
+    """
+    with transaction.atomic():
+        lock_attempt(attempt)
+        existing_answers = {
+            (answer.question_type_id, answer.question_id): answer
+            for answer in Answer.objects.filter(attempt=attempt)
+        }
+        to_create, to_update = [], []
+        choice_changes = []
+        points_delta = correct_delta = 0
+        for entry, (selected_choice_id, free_text_response, is_correct) in graded.items():
+            points_earned = entry.points if is_correct else 0
+            answer = existing_answers.get((entry.content_type_id, entry.question_id))
+            if answer:
+                points_delta += points_earned - answer.points_earned
+                correct_delta += int(is_correct) - int(answer.is_correct)
+                to_update.append(answer)
+            else:
+                points_delta += points_earned
+                correct_delta += int(is_correct)
+                mcq_id, ftq_id = concrete_question_ids(entry)
+                answer = Answer(
+                    attempt=attempt, question_type_id=entry.content_type_id, question_id=entry.question_id,
+                    mcq_id=mcq_id, ftq_id=ftq_id,
+                )
+                to_create.append(answer)
+            choice_changes.append((answer.selected_choice_id, selected_choice_id))
+            answer.selected_choice_id = selected_choice_id
+            answer.free_text_response = free_text_response
+            answer.is_correct = is_correct
+            answer.points_earned = points_earned
+
+        Answer.objects.bulk_create(to_create)
+        Answer.objects.bulk_update(to_update, ['selected_choice', 'free_text_response', 'is_correct', 'points_earned'])
+        apply_totals_delta(attempt, points_delta, correct_delta, len(to_create))
+        apply_choice_deltas(selection_deltas(choice_changes))
+
+
+def apply_totals_delta(attempt, points_delta, correct_delta, answered_delta):
+    """Atomically adjusts an attempt's running totals (and its in-memory copy)."""
+    if not (points_delta or correct_delta or answered_delta):
+        return
+    Attempt.objects.filter(pk=attempt.pk).update(
+        points_earned=F('points_earned') + points_delta,
+        correct_count=F('correct_count') + correct_delta,
+        answered_count=F('answered_count') + answered_delta,
+    )
+    attempt.points_earned += points_delta
+    attempt.correct_count += correct_delta
+    attempt.answered_count += answered_delta
+
+
+def score_expression(total_points):
+    """The SQL expression for an attempt's percentage score from its stored running total."""
+    if total_points:
+        return Cast(F('points_earned'), FloatField()) * Value(100.0) / Value(float(total_points))
+    return Value(0.0)
+
+
+def complete_attempt(attempt, total_points):
+    """
+    Marks an attempt as completed: sets time_end, duration and the final score,
+    and adds it to the quiz's leaderboard aggregates in the same transaction.
+    The score is computed in SQL from the stored running total.
+    """
+    now = timezone.now()
+    score = score_expression(total_points)
+    with transaction.atomic():
+        # Only the request that actually completes the attempt counts it in the aggregates
+        completed = Attempt.objects.filter(pk=attempt.pk, time_end__isnull=True).update(
+            time_end=now, duration=now - attempt.time_start, score=score
+        )
+        attempt.refresh_from_db(fields=['time_end', 'duration', 'score', 'points_earned', 'correct_count', 'answered_count'])
+        if completed:
+            record_completion(attempt)
+
+
+def recalculate_attempt_totals(attempts):
+    """
+    Recomputes the running totals of the given attempts from their stored answers
+    with one set-based UPDATE. Returns the number of attempts updated.
+    """
+    answers = Answer.objects.filter(attempt=OuterRef('pk')).order_by().values('attempt')
+    return attempts.update(
+        points_earned=Coalesce(Subquery(answers.annotate(total=Sum('points_earned')).values('total'), output_field=IntegerField()), 0),
+        correct_count=Coalesce(Subquery(answers.annotate(total=Count('pk', filter=Q(is_correct=True))).values('total'), output_field=IntegerField()), 0),
+        answered_count=Coalesce(Subquery(answers.annotate(total=Count('pk')).values('total'), output_field=IntegerField()), 0),
+    )
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Quiz, MCQ, Choice, FTQ, Attempt, Answer, Student
+from .results import load_attempt_results
 
 # --- List Serializer (Simple) ---
 class QuizListSerializer(serializers.ModelSerializer):
@@ -8,7 +9,7 @@ class QuizListSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Quiz
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'question_count', 'total_points']
 
 # --- Detail Serializers (Comprehensive) ---
 class ChoiceQuizSerializer(serializers.ModelSerializer):
@@ -43,6 +44,12 @@ class FTQSerializer(serializers.ModelSerializer):
         model = FTQ
         fields = ['id', 'question', 'points']
 
+class FTQResultsSerializer(serializers.ModelSerializer):
+    """Serializes a Free Text Question with its accepted answers (for results view)."""
+    class Meta:
+        model = FTQ
+        fields = ['id', 'question', 'points', 'accepted_answers']
+
 class QuizDetailSerializer(serializers.ModelSerializer):
     """
     The "master" serializer for the quiz detail view.
@@ -61,7 +68,7 @@ class QuizWithAnswersSerializer(serializers.ModelSerializer):
     This should only be used after quiz completion.
     """
     mcqs = MCQResultsSerializer(many=True, read_only=True)
-    ftqs = FTQSerializer(many=True, read_only=True)
+    ftqs = FTQResultsSerializer(many=True, read_only=True)
     
     class Meta:
         model = Quiz
@@ -102,7 +109,12 @@ class CurrentQuestionSerializer(serializers.Serializer):
     quiz_id = serializers.IntegerField()
 
 class AttemptResultsSerializer(serializers.ModelSerializer):
-    """Serializes detailed results for a completed attempt."""
+    """
+    Serializes detailed results for a completed attempt.
+    Totals come from the attempt's running totals and the quiz's stored totals;
+    the per-answer details come from one `AttemptResults` load (see quizzes/results.py),
+    so the number of queries does not grow with the number of answers.
+    """
     student = StudentSerializer(read_only=True)
     quiz = QuizListSerializer(read_only=True)
     total_questions = serializers.SerializerMethodField()
@@ -121,21 +133,13 @@ class AttemptResultsSerializer(serializers.ModelSerializer):
         ]
     
     def get_total_questions(self, obj):
-        return obj.quiz.mcqs.count() + obj.quiz.ftqs.count()
+        return obj.quiz.question_count
     
     def get_correct_answers(self, obj):
-        return obj.answers.filter(is_correct=True).count()
+        return obj.correct_count
     
     def get_total_points_earned(self, obj):
-        total = 0
-        for answer in obj.answers.filter(is_correct=True):
-            if answer.question_type.model == 'mcq':
-                mcq = MCQ.objects.get(id=answer.question_id)  # type: ignore
-                total += mcq.points
-            elif answer.question_type.model == 'ftq':
-                ftq = FTQ.objects.get(id=answer.question_id)  # type: ignore
-                total += ftq.points
-        return total
+        return obj.points_earned
     
     def get_total_possible_points(self, obj):
         return obj.quiz.total_points
@@ -146,33 +150,4 @@ class AttemptResultsSerializer(serializers.ModelSerializer):
         return None
     
     def get_answers(self, obj):
-        answers_data = []
-        for answer in obj.answers.all():
-            answer_data = {
-                'question_text': str(answer.question),
-                'is_correct': answer.is_correct,
-                'points_earned': 0
-            }
-            
-            # Calculate points earned for this answer
-            if answer.is_correct:
-                if answer.question_type.model == 'mcq':
-                    mcq = MCQ.objects.get(id=answer.question_id)  # type: ignore
-                    answer_data['points_earned'] = mcq.points
-                elif answer.question_type.model == 'ftq':
-                    ftq = FTQ.objects.get(id=answer.question_id)  # type: ignore
-                    answer_data['points_earned'] = ftq.points
-            
-            # Add correct answer information
-            if answer.question_type.model == 'mcq':
-                mcq = MCQ.objects.get(id=answer.question_id)  # type: ignore
-                correct_choice = mcq.choices.filter(is_correct=True).first()
-                answer_data['correct_answer'] = correct_choice.content if correct_choice else None
-                answer_data['student_answer'] = answer.selected_choice.content if answer.selected_choice else None
-            elif answer.question_type.model == 'ftq':
-                answer_data['student_answer'] = answer.free_text_response
-                # For FTQ, we'd need a way to store correct answers or use manual grading
-            
-            answers_data.append(answer_data)
-        
-        return answers_data 
\ No newline at end of file
+        return load_attempt_results(obj).answers
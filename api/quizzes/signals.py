@@ -0,0 +1,81 @@
+"""
+Signal handlers that keep data derived from quiz content in sync.
+
+Any change to an MCQ, FTQ or Choice (through the admin, the ORM or a cascade),
+or to the quiz itself, bumps `Quiz.content_version` for the affected quizzes and
+drops this process's cached question plans for them. Everything cached under a
+content version (question plans, rendered quiz payloads and snapshots, ETags)
+then goes stale.
+
+Question saves and deletes also keep `Quiz.question_count` and
+`Quiz.total_points` up to date with relative updates. Questions save and
+delete in a transaction (`QuestionTotalsMixin`), and the previous row is
+read with SELECT ... FOR UPDATE, so concurrent edits of one question apply
+their deltas in turn. Bulk operations (`bulk_create`, queryset `update`)
+bypass the signals: set the totals directly, or run `repair_quiz_totals`.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Quiz, MCQ, FTQ, Choice
+from .question_plan import invalidate_question_plans
+
+
+def content_changed(quiz_ids):
+    """Records that the content of the given quizzes changed."""
+    quiz_ids = {quiz_id for quiz_id in quiz_ids if quiz_id is not None}
+    if quiz_ids:
+        Quiz.bump_content_version(quiz_ids)
+        invalidate_question_plans(quiz_ids)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_changed(sender, instance, created, **kwargs):
+    """Renaming a quiz changes its rendered payloads too."""
+    if not created:
+        content_changed([instance.pk])
+
+
+@receiver(pre_save, sender=MCQ)
+@receiver(pre_save, sender=FTQ)
+def remember_previous_question(sender, instance, **kwargs):
+    """Remembers the quiz and points a question had, in case the save moves it or changes its points."""
+    instance._previous_quiz_id = instance._previous_points = None
+    if instance.pk is not None:
+        previous = sender.objects.select_for_update().filter(pk=instance.pk).values_list('quiz_id', 'points').first()
+        if previous is not None:
+            instance._previous_quiz_id, instance._previous_points = previous
+
+
+@receiver(post_save, sender=MCQ)
+@receiver(post_save, sender=FTQ)
+@receiver(post_delete, sender=MCQ)
+@receiver(post_delete, sender=FTQ)
+def question_changed(sender, instance, **kwargs):
+    content_changed([instance.quiz_id, getattr(instance, '_previous_quiz_id', None)])
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    content_changed(MCQ.objects.filter(pk=instance.mcq_id).values_list('quiz_id', flat=True))  # type: ignore
+
+
+@receiver(post_save, sender=MCQ)
+@receiver(post_save, sender=FTQ)
+def question_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance._previous_points is None:
+        Quiz.adjust_totals(instance.quiz_id, 1, instance.points)
+    elif instance._previous_quiz_id != instance.quiz_id:
+        Quiz.adjust_totals(instance._previous_quiz_id, -1, -instance._previous_points)
+        Quiz.adjust_totals(instance.quiz_id, 1, instance.points)
+    else:
+        Quiz.adjust_totals(instance.quiz_id, 0, instance.points - instance._previous_points)
+
+
+@receiver(post_delete, sender=MCQ)
+@receiver(post_delete, sender=FTQ)
+def question_deleted(sender, instance, **kwargs):
+    Quiz.adjust_totals(instance.quiz_id, -1, -instance.points)
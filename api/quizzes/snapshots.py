@@ -0,0 +1,109 @@
+"""
+Pre-rendered quiz payload snapshots.
+
+Serializing a quiz walks quiz -> mcqs -> choices and ftqs field by field.
+Instead, each quiz keeps one `QuizSnapshot` per payload variant (the student
+view and the answer-key view) holding the rendered JSON bytes and the content
+version they were rendered from. The quiz endpoints serve those bytes as they
+are.
+
+Any content change bumps `Quiz.content_version` (see quizzes/signals.py), so
+a snapshot whose version is behind the quiz is stale: the next request for
+it renders the payload once and replaces the snapshot. The write only
+replaces a snapshot at the same or an older version, so a slow render of an
+older version never overwrites a newer one.
+`rebuild_snapshots` (management command `rebuild_quiz_snapshots`) renders all
+of them ahead of time, e.g. after a deploy or a bulk import.
+"""
+from django.utils import timezone
+
+from .models import Quiz, QuizSnapshot
+from .projections import quiz_detail_payload
+from .renderers import render_json
+
+# The student view (QuizDetailSerializer shape) and the answer-key view (QuizWithAnswersSerializer shape)
+STUDENT = 'student'
+ANSWERS = 'answers'
+VARIANTS = (STUDENT, ANSWERS)
+
+def _full_quizzes():
+    return Quiz.objects.prefetch_related('mcqs__choices', 'ftqs')  # type: ignore
+
+
+def render_snapshot(quiz, variant):
+    """Renders a variant of a quiz loaded with `mcqs__choices` and `ftqs` prefetched."""
+    payload = render_json(quiz_detail_payload(quiz, with_answers=variant == ANSWERS))
+    return QuizSnapshot(quiz=quiz, variant=variant, version=quiz.content_version, payload=payload, rendered_at=timezone.now())
+
+
+def _replaceable(snapshot):
+    """The stored snapshot `snapshot` may replace: same quiz and variant, at its version or older."""
+    return QuizSnapshot.objects.filter(  # type: ignore
+        quiz_id=snapshot.quiz_id, variant=snapshot.variant, version__lte=snapshot.version
+    )
+
+
+def save_snapshots(snapshots):
+    """
+    Stores rendered snapshots, replacing stored ones at the same or an older
+    version and inserting missing ones. A snapshot already at a newer version
+    is left alone.
+    """
+    missing = [
+        snapshot for snapshot in snapshots
+        if not _replaceable(snapshot).update(version=snapshot.version, payload=snapshot.payload, rendered_at=snapshot.rendered_at)
+    ]
+    if missing:
+        # Conflicts are rows that are newer, or were just inserted by a concurrent render
+        QuizSnapshot.objects.bulk_create(missing, ignore_conflicts=True)  # type: ignore
+
+
+async def asave_snapshots(snapshots):
+    """`save_snapshots` using the async ORM."""
+    missing = [
+        snapshot for snapshot in snapshots
+        if not await _replaceable(snapshot).aupdate(version=snapshot.version, payload=snapshot.payload, rendered_at=snapshot.rendered_at)
+    ]
+    if missing:
+        await QuizSnapshot.objects.abulk_create(missing, ignore_conflicts=True)  # type: ignore
+
+
+def snapshot_body(quiz, variant):
+    """The JSON bytes of a quiz payload variant at the quiz's content version, rendering them if the snapshot is stale."""
+    payload = QuizSnapshot.objects.filter(  # type: ignore
+        quiz_id=quiz.pk, variant=variant, version=quiz.content_version
+    ).values_list('payload', flat=True).first()
+    if payload is None:
+        snapshot = render_snapshot(_full_quizzes().get(pk=quiz.pk), variant)
+        save_snapshots([snapshot])
+        payload = snapshot.payload
+    return bytes(payload)
+
+
+async def asnapshot_body(quiz, variant):
+    """`snapshot_body` using the async ORM."""
+    payload = await QuizSnapshot.objects.filter(  # type: ignore
+        quiz_id=quiz.pk, variant=variant, version=quiz.content_version
+    ).values_list('payload', flat=True).afirst()
+    if payload is None:
+        snapshot = render_snapshot(await _full_quizzes().aget(pk=quiz.pk), variant)
+        await asave_snapshots([snapshot])
+        payload = snapshot.payload
+    return bytes(payload)
+
+
+def rebuild_snapshots(quiz_ids=None, chunk_size=100):
+    """Renders every variant of the given quizzes (default: all). Returns the number of snapshots rendered."""
+    quizzes = _full_quizzes().order_by('id')
+    if quiz_ids is not None:
+        quizzes = quizzes.filter(pk__in=quiz_ids)
+    rendered = 0
+    batch = []
+    for quiz in quizzes.iterator(chunk_size=chunk_size):
+        batch.extend(render_snapshot(quiz, variant) for variant in VARIANTS)
+        if len(batch) >= chunk_size:
+            save_snapshots(batch)
+            rendered += len(batch)
+            batch = []
+    save_snapshots(batch)
+    return rendered + len(batch)
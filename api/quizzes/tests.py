@@ -1,3 +1,1225 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from quiz_wizard.db_config import database_from_env
+
+from . import admission
+from .choice_stats import apply_choice_deltas
+from .attempt_state import is_answered, open_attempt_state, question_order
+from .bundles import BUNDLE_FORMAT, BUNDLE_VERSION, BundleError, import_bundle, iter_bundle, open_bundle
+from .db_routing import PIN_COOKIE
+from .loadtest import Recorder, StudentSession, percentile, summarize
+from .management.commands.benchmark_serializers import current_question_data
+from .management.commands.seed_lizards import LIZARDS_BUNDLE
+from .metrics import registry as metrics_registry
+from .grading import compile_answer_key, grade_free_text, normalize
+from .models import Quiz, Student, MCQ, FTQ, Choice, Attempt, Answer, ChoiceStat, GradingPolicy, QuizBestScore, QuizScoreBucket, QuizSnapshot
+from .question_plan import get_question_plan, invalidate_question_plans, mcq_content_type_id, ftq_content_type_id, question_model
+from .projections import attempt_results_payload, current_question_payload, load_question, quiz_detail_payload
+from .regrading import regrade_quiz, schedule_regrade
+from .renderers import ORJSONRenderer, render_json
+from .serializers import AttemptResultsSerializer, QuizDetailSerializer, QuizWithAnswersSerializer
+from . import snapshots
+from .snapshots import snapshot_body
+from .scoring import recalculate_attempt_totals, record_answer, record_answers
+
+
+def make_quiz(name='Lizards', mcqs=3, ftqs=1):
+    """Creates a quiz with `mcqs` four-choice MCQs (first choice correct) and `ftqs` FTQs."""
+    quiz = Quiz.objects.create(name=name)  # type: ignore
+    for i in range(mcqs):
+        mcq = MCQ.objects.create(quiz=quiz, question=f'MCQ {i}', points=i + 1)  # type: ignore
+        for j in range(4):
+            Choice.objects.create(mcq=mcq, content=f'Choice {j}', is_correct=(j == 0))  # type: ignore
+    for i in range(ftqs):
+        FTQ.objects.create(quiz=quiz, question=f'FTQ {i}', points=10)  # type: ignore
+    quiz.refresh_from_db()
+    return quiz
+
+
+@override_settings(QUIZ_DB_ROUTING={'REPLICA': None})
+class PrimaryOnlyTestCase(TestCase):
+    """Reads stay on `default`: a replica test mirror cannot see a TestCase's uncommitted rows."""
+
+
+class QuizAPIMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.quiz = make_quiz()
+        self.student = Student.objects.create(name='Leo', email='leo@example.com')  # type: ignore
+
+    def start_attempt(self):
+        response = self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': self.student.id}, format='json')
+        return Attempt.objects.get(id=response.data['id'])  # type: ignore
+
+    def answer_all(self, attempt):
+        """Answers every question in an attempt: correct MCQ choices, non-empty FTQ text."""
+        while True:
+            question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+            if question['question_type'] == 'mcq':
+                payload = {'choice_id': question['choices'][0]['id']}
+            else:
+                payload = {'answer': 'Autotomy'}
+            response = self.client.post(f'/api/attempts/{attempt.id}/answer/', payload, format='json')
+            if not response.data['next_question_available']:
+                return
+
+
+class QuizAPITestCase(QuizAPIMixin, PrimaryOnlyTestCase):
+    pass
+
+
+class QuestionPlanTests(QuizAPITestCase):
+    def test_plan_orders_mcqs_then_ftqs(self):
+        plan = get_question_plan(self.quiz)
+        self.assertEqual(len(plan), 4)
+        self.assertEqual([entry.content_type_id for entry in plan.entries], [mcq_content_type_id()] * 3 + [ftq_content_type_id()])
+        self.assertEqual(plan[0].points, 1)
+        self.assertEqual(len(plan[0].choice_ids), 4)
+        self.assertEqual(plan[0].correct_choice_ids, {plan[0].choice_ids[0]})
+
+    def test_cached_plan_does_not_query(self):
+        get_question_plan(self.quiz)
+        with self.assertNumQueries(0):
+            get_question_plan(self.quiz)
+
+    def test_content_change_bumps_version_and_rebuilds_plan(self):
+        plan = get_question_plan(self.quiz)
+        choice = Choice.objects.get(id=plan[0].choice_ids[1])  # type: ignore
+        choice.is_correct = True
+        choice.save()
+        self.quiz.refresh_from_db()
+        self.assertGreater(self.quiz.content_version, plan.version)
+        self.assertIn(choice.id, get_question_plan(self.quiz)[0].correct_choice_ids)
+
+    def test_quiz_save_does_not_overwrite_content_version(self):
+        stale = Quiz.objects.get(id=self.quiz.id)  # type: ignore
+        FTQ.objects.create(quiz=self.quiz, question='Another', points=3)  # type: ignore
+        stale.name = 'Renamed'
+        stale.save()
+        self.quiz.refresh_from_db()
+        self.assertGreater(self.quiz.content_version, stale.content_version)
+
+
+class AttemptFlowTests(QuizAPITestCase):
+    def test_walks_every_question_in_order(self):
+        attempt = self.start_attempt()
+        numbers = []
+        while True:
+            question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+            numbers.append(question['question_number'])
+            self.assertEqual(question['total_questions'], 4)
+            payload = {'choice_id': question['choices'][0]['id']} if question['question_type'] == 'mcq' else {'answer': 'x'}
+            response = self.client.post(f'/api/attempts/{attempt.id}/answer/', payload, format='json')
+            if not response.data['next_question_available']:
+                break
+        self.assertEqual(numbers, [1, 2, 3, 4])
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.time_end)
+        self.assertEqual(attempt.answers.filter(is_correct=True).count(), 4)
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (16, 4, 4))
+        self.assertEqual(attempt.score, 100.0)
+        self.assertEqual(attempt.duration, attempt.time_end - attempt.time_start)
+
+    def test_replacing_an_answer_adjusts_running_totals(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        self.client.get(f'/api/attempts/{attempt.id}/current_question/')
+        self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': plan[0].choice_ids[0]}, format='json')
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (1, 1, 1))
+        # Go back to the first question and answer it wrongly
+        self.client.post(f'/api/attempts/{attempt.id}/navigate/', {'direction': 'previous'}, format='json')
+        self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': plan[0].choice_ids[1]}, format='json')
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (0, 0, 1))
+        self.assertEqual(recalculate_attempt_totals(Attempt.objects.filter(pk=attempt.pk)), 1)
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (0, 0, 1))
+
+    def test_answer_can_return_next_question(self):
+        attempt = self.start_attempt()
+        first = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+        response = self.client.post(
+            f'/api/attempts/{attempt.id}/answer/?include_next=true', {'choice_id': first['choices'][0]['id']}, format='json'
+        )
+        self.assertTrue(response.data['next_question_available'])
+        self.assertEqual(response.data['next_question'], self.client.get(f'/api/attempts/{attempt.id}/current_question/').data)
+        self.assertEqual(response.data['next_question']['question_number'], 2)
+        plain = self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': response.data['next_question']['choices'][0]['id']}, format='json')
+        self.assertNotIn('next_question', plain.data)
+
+    def test_rejects_choice_from_another_question(self):
+        attempt = self.start_attempt()
+        self.client.get(f'/api/attempts/{attempt.id}/current_question/')
+        other_choice = Choice.objects.exclude(mcq__in=MCQ.objects.filter(quiz=self.quiz)[:1]).first()  # type: ignore
+        response = self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': other_choice.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_answer_does_not_scan_question_tables(self):
+        attempt = self.start_attempt()
+        self.client.get(f'/api/attempts/{attempt.id}/current_question/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': get_question_plan(self.quiz)[0].choice_ids[0]}, format='json')
+        for query in queries.captured_queries:
+            self.assertNotIn('"quizzes_mcq"', query['sql'])
+            self.assertNotIn('"quizzes_ftq"', query['sql'])
+
+    def test_answers_carry_concrete_question_keys(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        plan = get_question_plan(self.quiz)
+        answers = list(attempt.answers.order_by('id'))
+        self.assertEqual([answer.mcq_id for answer in answers], [entry.question_id for entry in plan.entries[:3]] + [None])
+        self.assertEqual(answers[3].ftq_id, plan[3].question_id)
+
+    def test_one_open_attempt_per_student_and_quiz(self):
+        first = self.start_attempt()
+        self.assertEqual(self.start_attempt().id, first.id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Attempt.objects.create(student=self.student, quiz=self.quiz)  # type: ignore
+
+
+class BulkAnswerTests(QuizAPITestCase):
+    def bulk_url(self, attempt):
+        return f'/api/attempts/{attempt.id}/answers/bulk/'
+
+    def test_bulk_submission_completes_attempt(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        answers = [{'question_type': 'mcq', 'question_id': entry.question_id, 'choice_id': entry.choice_ids[0]} for entry in plan.entries[:3]]
+        answers.append({'question_type': 'ftq', 'question_id': plan[3].question_id, 'answer': 'Autotomy'})
+        response = self.client.post(self.bulk_url(attempt), {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['answers_recorded'], 4)
+        self.assertFalse(response.data['next_question_available'])
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.time_end)
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (16, 4, 4))
+        self.assertEqual(attempt.score, 100.0)
+
+    def test_bulk_submission_upserts_and_moves_cursor(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        first = {'question_type': 'mcq', 'question_id': plan[0].question_id, 'choice_id': plan[0].choice_ids[0]}
+        self.client.post(self.bulk_url(attempt), [first], format='json')
+        replay = [dict(first, choice_id=plan[0].choice_ids[1]),
+                  {'question_type': 'mcq', 'question_id': plan[1].question_id, 'choice_id': plan[1].choice_ids[0]}]
+        response = self.client.post(self.bulk_url(attempt), replay, format='json')
+        self.assertTrue(response.data['next_question_available'])
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.answers.count(), 2)
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (2, 1, 2))
+        question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+        self.assertEqual(question['question_number'], 3)
+
+    def test_bulk_submission_is_all_or_nothing(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        answers = [{'question_type': 'mcq', 'question_id': plan[0].question_id, 'choice_id': plan[0].choice_ids[0]},
+                   {'question_type': 'mcq', 'question_id': plan[1].question_id, 'choice_id': plan[0].choice_ids[0]},
+                   {'question_type': 'ftq', 'question_id': 999999, 'answer': 'x'}]
+        response = self.client.post(self.bulk_url(attempt), answers, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(attempt.answers.exists())
+
+    def test_answer_writes_lock_the_attempt_before_reading_answers(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        for write in (lambda: record_answer(attempt, plan[0], selected_choice_id=plan[0].choice_ids[0], is_correct=True),
+                      lambda: record_answers(attempt, {plan[1]: (plan[1].choice_ids[0], None, True)})):
+            with CaptureQueriesContext(connection) as queries:
+                write()
+            statements = [q['sql'] for q in queries.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+            # Without the attempt lock, two first answers to a question both insert and one hits the unique constraint
+            self.assertIn('"quizzes_attempt"', statements[0])
+            self.assertIn('"quizzes_answer"', statements[1])
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.points_earned, attempt.answered_count), (3, 2))
+
+
+class AttemptCursorTests(QuizAPITestCase):
+    def navigate(self, attempt, **data):
+        return self.client.post(f'/api/attempts/{attempt.id}/navigate/', data, format='json')
+
+    def test_concurrent_requests_keep_each_others_answered_bits(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        # Two requests that loaded the attempt before either answered
+        first, second = Attempt.objects.get(pk=attempt.pk), Attempt.objects.get(pk=attempt.pk)  # type: ignore
+        with open_attempt_state(first, plan) as state:
+            state.record(0, plan[0], plan[0].choice_ids[0], None, True)
+            state.move_to(1)
+        with open_attempt_state(second, plan) as state:
+            state.record(1, plan[1], plan[1].choice_ids[0], None, True)
+            self.assertEqual(state.next_unanswered(1), 2)
+            state.move_to(2)
+        attempt.refresh_from_db()
+        self.assertEqual([is_answered(attempt.answered, position) for position in range(4)], [True, True, False, False])
+
+        ftq = {'question_type': 'ftq', 'question_id': plan[3].question_id, 'answer': 'Autotomy'}
+        self.client.post(f'/api/attempts/{attempt.id}/answers/bulk/', [ftq], format='json')
+        attempt.refresh_from_db()
+        self.assertEqual(([is_answered(attempt.answered, position) for position in range(4)], attempt.position), ([True, True, False, True], 2))
+
+    def test_attempt_starts_at_first_question_of_fixed_order(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        self.assertEqual(attempt.question_order, question_order(plan))
+        self.assertEqual((attempt.position, bytes(attempt.answered)), (0, b''))
+        # Questions added later are not part of the attempt
+        MCQ.objects.create(quiz=self.quiz, question='Late?', points=1)  # type: ignore
+        question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+        self.assertEqual((question['question_id'], question['question_number'], question['total_questions']), (plan[0].question_id, 1, 4))
+
+    def test_skip_go_back_and_jump(self):
+        attempt = self.start_attempt()
+        self.assertEqual(self.navigate(attempt, direction='next').data['question_number'], 2)
+        skipped_to = self.navigate(attempt, direction='next').data
+        self.assertEqual((skipped_to['question_number'], skipped_to['answered']), (3, False))
+        self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': skipped_to['choices'][0]['id']}, format='json')
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.position, 3)
+        self.assertEqual([is_answered(attempt.answered, position) for position in range(4)], [False, False, True, False])
+
+        self.assertEqual(self.navigate(attempt, direction='previous').data['question_number'], 3)
+        self.assertTrue(self.navigate(attempt, question_number=3).data['answered'])
+        back = self.navigate(attempt, question_number=1).data
+        self.assertEqual((back['question_number'], back['answered']), (1, False))
+        self.assertEqual(self.client.get(f'/api/attempts/{attempt.id}/current_question/').data['question_number'], 1)
+
+        self.assertEqual(self.navigate(attempt, direction='previous').status_code, 400)
+        self.assertEqual(self.navigate(attempt, question_number=5).status_code, 400)
+        self.assertEqual(self.navigate(attempt).status_code, 400)
+
+    def test_deleted_questions_are_stepped_over(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        MCQ.objects.get(pk=plan[1].question_id).delete()  # type: ignore
+        self.assertEqual(self.navigate(attempt, direction='next').data['question_number'], 3)
+        self.assertEqual(self.navigate(attempt, question_number=2).status_code, 400)
+        MCQ.objects.get(pk=plan[2].question_id).delete()  # type: ignore
+        question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+        self.assertEqual((question['question_id'], question['question_number']), (plan[3].question_id, 4))
+
+    def test_attempt_without_order_takes_the_plan_order(self):
+        attempt = Attempt.objects.create(student=self.student, quiz=self.quiz)  # type: ignore
+        self.assertEqual(self.client.get(f'/api/attempts/{attempt.id}/current_question/').data['question_number'], 1)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.question_order, question_order(get_question_plan(self.quiz)))
+
+    def test_bulk_answers_mark_positions_answered(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        self.client.post(f'/api/attempts/{attempt.id}/answers/bulk/', [
+            {'question_type': 'mcq', 'question_id': plan[1].question_id, 'choice_id': plan[1].choice_ids[0]},
+            {'question_type': 'ftq', 'question_id': plan[3].question_id, 'answer': 'Autotomy'},
+        ], format='json')
+        attempt.refresh_from_db()
+        self.assertIsNone(attempt.time_end)
+        self.assertEqual(bytes(attempt.answered), bytes([0b1010]))
+        # Wrapped around to the first unanswered question
+        self.assertEqual(attempt.position, 0)
+
+    def test_answering_the_last_question_first_does_not_complete(self):
+        attempt = self.start_attempt()
+        self.navigate(attempt, question_number=4)
+        response = self.client.post(f'/api/attempts/{attempt.id}/answer/?include_next=true', {'answer': 'Autotomy'}, format='json')
+        self.assertTrue(response.data['next_question_available'])
+        self.assertEqual(response.data['next_question']['question_number'], 1)
+        attempt.refresh_from_db()
+        self.assertIsNone(attempt.time_end)
+
+        self.navigate(attempt, question_number=2)
+        self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': ''}, format='json')
+        self.assertEqual(self.client.get(f'/api/attempts/{attempt.id}/current_question/').data['question_number'], 3)
+        self.answer_all(attempt)
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.time_end)
+        self.assertEqual(attempt.answered_count, 4)
+
+
+@override_settings(QUIZ_ATTEMPT_STATE={'ENABLED': True, 'DURABILITY': 'write-behind', 'FLUSH_EVERY': 10})
+class AttemptStateTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def answer_first(self, attempt, count):
+        for _ in range(count):
+            question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+            payload = {'choice_id': question['choices'][0]['id']} if question['question_type'] == 'mcq' else {'answer': 'x'}
+            self.client.post(f'/api/attempts/{attempt.id}/answer/', payload, format='json')
+
+    def test_write_behind_buffers_answers_until_completion(self):
+        attempt = self.start_attempt()
+        self.answer_first(attempt, 3)
+        self.assertFalse(attempt.answers.exists())
+        with self.assertNumQueries(2):  # attempt with its quiz, FTQ row: the cursor comes from the cache
+            question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+        self.assertEqual(question['question_number'], 4)
+
+        self.client.post(f'/api/attempts/{attempt.id}/answer/', {'answer': 'Autotomy'}, format='json')
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.time_end)
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.answered_count), (16, 4, 4))
+        self.assertEqual(attempt.score, 100.0)
+        self.assertIsNone(cache.get(f'quizzes:attempt-state:{attempt.id}'))
+
+    @override_settings(QUIZ_ATTEMPT_STATE={'ENABLED': True, 'DURABILITY': 'write-behind', 'FLUSH_EVERY': 2})
+    def test_full_batches_are_flushed(self):
+        attempt = self.start_attempt()
+        self.answer_first(attempt, 3)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.answered_count, 2)
+        self.assertEqual(attempt.position, 2)
+
+    @override_settings(QUIZ_ATTEMPT_STATE={'ENABLED': True, 'DURABILITY': 'write-through'})
+    def test_write_through_survives_losing_the_cache(self):
+        attempt = self.start_attempt()
+        self.answer_first(attempt, 2)
+        self.assertEqual(attempt.answers.count(), 2)
+        cache.clear()
+        question = self.client.get(f'/api/attempts/{attempt.id}/current_question/').data
+        self.assertEqual(question['question_number'], 3)
+
+    def test_flush_command_and_bulk_answers_write_buffered_answers(self):
+        attempt = self.start_attempt()
+        self.answer_first(attempt, 1)
+        call_command('flush_attempt_state', stdout=io.StringIO())
+        self.assertEqual(attempt.answers.count(), 1)
+
+        self.answer_first(attempt, 1)
+        plan = get_question_plan(self.quiz)
+        response = self.client.post(
+            f'/api/attempts/{attempt.id}/answers/bulk/', [{'question_type': 'mcq', 'question_id': plan[2].question_id}], format='json'
+        )
+        self.assertTrue(response.data['next_question_available'])
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.answered_count, 3)
+        self.assertEqual(self.client.get(f'/api/attempts/{attempt.id}/current_question/').data['question_number'], 4)
+
+
+class AttemptResultsTests(QuizAPITestCase):
+    def test_results_payload(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        data = self.client.get(f'/api/attempts/{attempt.id}/results/').data
+        self.assertEqual(data['total_questions'], 4)
+        self.assertEqual(data['correct_answers'], 4)
+        self.assertEqual(data['total_points_earned'], 16)
+        self.assertEqual(data['total_possible_points'], 16)
+        self.assertEqual(data['score'], 100.0)
+        self.assertEqual(data['answers'][0], {
+            'question_text': 'MCQ 0', 'is_correct': True, 'points_earned': 1,
+            'correct_answer': 'Choice 0', 'student_answer': 'Choice 0',
+        })
+        self.assertEqual(data['answers'][3]['student_answer'], 'Autotomy')
+
+    def test_results_is_read_only(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/attempts/{attempt.id}/results/')
+        self.assertFalse([q for q in queries.captured_queries if not q['sql'].startswith('SELECT')])
+
+    def test_results_query_count_is_constant(self):
+        for quiz in (self.quiz, make_quiz('Big', mcqs=40, ftqs=5)):
+            self.quiz = quiz
+            attempt = self.start_attempt()
+            self.answer_all(attempt)
+            self.client.get(f'/api/attempts/{attempt.id}/results/')
+            # attempt + answers (joined with their questions) + correct choices
+            with self.assertNumQueries(3):
+                self.client.get(f'/api/attempts/{attempt.id}/results/')
+
+
+class QuizTotalsTests(QuizAPITestCase):
+    def totals(self, quiz=None):
+        quiz = Quiz.objects.get(pk=(quiz or self.quiz).pk)  # type: ignore
+        return quiz.question_count, quiz.total_points
+
+    def test_question_saves_and_deletes_keep_totals(self):
+        self.assertEqual(self.totals(), (4, 16))
+        mcq = MCQ.objects.filter(quiz=self.quiz).order_by('id').first()  # type: ignore
+        mcq.points = 6
+        mcq.save()
+        self.assertEqual(self.totals(), (4, 21))
+        other = make_quiz('Other', mcqs=0, ftqs=0)
+        mcq.quiz = other
+        mcq.save()
+        self.assertEqual((self.totals(), self.totals(other)), ((3, 15), (1, 6)))
+        FTQ.objects.filter(quiz=self.quiz).delete()  # type: ignore
+        self.assertEqual(self.totals(), (2, 5))
+
+    def test_saves_keep_totals_but_insert_rows_that_do_not_exist(self):
+        stale = Quiz.objects.get(pk=self.quiz.pk)  # type: ignore
+        MCQ.objects.create(quiz=self.quiz, question='New', points=5)  # type: ignore
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertEqual(self.totals(), (5, 21))
+
+        Quiz(pk=999, name='Fixture').save()
+        stale.delete()
+        stale.pk = self.quiz.pk
+        stale.save()
+        self.assertEqual(set(Quiz.objects.filter(pk__in=[999, self.quiz.pk]).values_list('name', flat=True)), {'Fixture', 'Renamed'})  # type: ignore
+
+    def test_failed_question_save_rolls_back_totals(self):
+        with self.assertRaises(IntegrityError):
+            FTQ.objects.create(quiz=self.quiz, question='No points', points=None)  # type: ignore
+        self.assertEqual(self.totals(), (4, 16))
+
+    def test_admin_shows_totals_read_only(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        url = f'/admin/quizzes/quiz/{self.quiz.id}/change/'
+        self.assertNotContains(self.client.get(url), 'name="total_points"')
+        self.client.post(url, {'name': 'Renamed', 'question_count': 99, 'total_points': 99, 'content_version': 99})
+        self.assertEqual(Quiz.objects.get(pk=self.quiz.pk).name, 'Renamed')  # type: ignore
+        self.assertEqual(self.totals(), (4, 16))
+
+    def test_imports_and_repair_command(self):
+        lines = [json.dumps({'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION}), json.dumps({'name': 'Imported', 'questions': [
+            {'type': 'mcq', 'text': 'Q', 'choices': [{'text': 'A', 'correct': True}]},
+            {'type': 'ftq', 'text': 'F', 'points': 4},
+        ]})]
+        import_bundle(lines)
+        self.assertEqual(self.totals(Quiz.objects.get(name='Imported')), (2, 9))  # type: ignore
+
+        MCQ.objects.filter(quiz=self.quiz).update(points=0)  # type: ignore
+        call_command('repair_quiz_totals', '--quiz', str(self.quiz.id), stdout=io.StringIO())
+        self.assertEqual(self.totals(), (4, 10))
+
+    def test_list_and_results_do_not_touch_question_tables(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        invalidate_question_plans([self.quiz.id])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/quizzes/')
+            data = self.client.get(f'/api/attempts/{attempt.id}/results/').data
+        self.assertEqual((data['total_questions'], data['total_possible_points']), (4, 16))
+        self.assertFalse([q for q in queries.captured_queries if 'SUM(' in q['sql'] or 'COUNT(' in q['sql']])
+
+
+class LeaderboardTests(QuizAPITestCase):
+    def complete(self, name, correct):
+        """Completes an attempt for a student answering the first `correct` questions correctly (points 1, 2, 3, 10)."""
+        student, _ = Student.objects.get_or_create(name=name, email=f'{name.lower()}@example.com')  # type: ignore
+        attempt = Attempt.objects.get(id=self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': student.id}, format='json').data['id'])  # type: ignore
+        plan = get_question_plan(self.quiz)
+        answers = [
+            {'question_type': 'mcq', 'question_id': entry.question_id, 'choice_id': entry.choice_ids[0 if position < correct else 1]}
+            for position, entry in enumerate(plan.entries[:3])
+        ]
+        answers.append({'question_type': 'ftq', 'question_id': plan[3].question_id, 'answer': 'x' if correct == 4 else ''})
+        self.client.post(f'/api/attempts/{attempt.id}/answers/bulk/', answers, format='json')
+        return attempt
+
+    def setUp(self):
+        super().setUp()
+        self.complete('Ana', 2)   # 3/16 -> 18.75
+        self.complete('Ana', 4)   # 16/16 -> 100.0, replaces her best
+        self.complete('Ana', 1)   # worse, ignored
+        self.complete('Bo', 4)    # ties Ana, ranked after her
+        self.complete('Cy', 3)    # 6/16 -> 37.5
+
+    def test_leaderboard_ranks_best_score_per_student(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(f'/api/quizzes/{self.quiz.id}/leaderboard/').data
+        self.assertEqual(
+            [(entry['rank'], entry['student']['name'], entry['score']) for entry in data['entries']],
+            [(1, 'Ana', 100.0), (1, 'Bo', 100.0), (3, 'Cy', 37.5)]
+        )
+        self.assertEqual(len(self.client.get(f'/api/quizzes/{self.quiz.id}/leaderboard/?limit=1').data['entries']), 1)
+        self.assertEqual(self.client.get(f'/api/quizzes/{self.quiz.id}/leaderboard/?limit=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/quizzes/999999/leaderboard/').status_code, 404)
+
+    def test_score_distribution_counts_every_completed_attempt(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(f'/api/quizzes/{self.quiz.id}/score_distribution/').data
+        self.assertEqual(data['completed_attempts'], 5)
+        self.assertEqual({bucket['min']: bucket['count'] for bucket in data['buckets'] if bucket['count']}, {0: 1, 10: 1, 30: 1, 90: 2})
+        self.assertEqual(len(data['buckets']), 10)
+
+    def test_rebuild_command_recomputes_aggregates(self):
+        leaderboard = self.client.get(f'/api/quizzes/{self.quiz.id}/leaderboard/').data
+        distribution = self.client.get(f'/api/quizzes/{self.quiz.id}/score_distribution/').data
+        QuizBestScore.objects.filter(quiz=self.quiz).update(score=0)  # type: ignore
+        QuizScoreBucket.objects.filter(quiz=self.quiz).delete()  # type: ignore
+        call_command('rebuild_quiz_aggregates', quiz=[self.quiz.id], stdout=io.StringIO())
+        self.assertEqual(self.client.get(f'/api/quizzes/{self.quiz.id}/leaderboard/').data, leaderboard)
+        self.assertEqual(self.client.get(f'/api/quizzes/{self.quiz.id}/score_distribution/').data, distribution)
+
+
+class ChoiceStatsTests(QuizAPITestCase):
+    def counts(self):
+        """{choice_id: count} for the choices of the quiz's first MCQ, from the choice_stats endpoint."""
+        with self.assertNumQueries(2):  # quiz, choices joined with their counters
+            data = self.client.get(f'/api/quizzes/{self.quiz.id}/choice_stats/').data
+        first = data['questions'][0]
+        return {choice['id']: choice['count'] for choice in first['choices']}, first['answered']
+
+    def test_counters_follow_answers_and_replacements(self):
+        plan = get_question_plan(self.quiz)
+        first, second = plan[0].choice_ids[:2]
+        for index in range(3):
+            self.student = Student.objects.create(name=f'S{index}', email=f'choice{index}@example.com')  # type: ignore
+            attempt = self.start_attempt()
+            self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': second if index else first}, format='json')
+        counts, answered = self.counts()
+        self.assertEqual((counts[first], counts[second], answered), (1, 2, 3))
+
+        # Replacing the last answer (through bulk answers) moves its selection
+        bulk = [{'question_type': 'mcq', 'question_id': plan[0].question_id, 'choice_id': first}]
+        self.client.post(f'/api/attempts/{attempt.id}/answers/bulk/', bulk, format='json')
+        counts, answered = self.counts()
+        self.assertEqual((counts[first], counts[second], answered), (2, 1, 3))
+
+        data = self.client.get(f'/api/quizzes/{self.quiz.id}/choice_stats/').data
+        self.assertEqual(len(data['questions']), 3)
+        self.assertEqual([choice['share'] for choice in data['questions'][0]['choices']], [0.6667, 0.3333, 0.0, 0.0])
+
+    def test_counter_created_concurrently_does_not_drop_the_rest_of_the_batch(self):
+        raced, new = get_question_plan(self.quiz)[0].choice_ids[:2]
+        bulk_create = ChoiceStat.objects.bulk_create  # type: ignore
+
+        def concurrent_insert(*args, **kwargs):
+            # Another request creates one of the missing counters just before this INSERT
+            ChoiceStat.objects.create(choice_id=raced, count=1)  # type: ignore
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(ChoiceStat.objects, 'bulk_create', side_effect=concurrent_insert):  # type: ignore
+            apply_choice_deltas({raced: 1, new: 1})
+        self.assertEqual(dict(ChoiceStat.objects.values_list('pk', 'count')), {raced: 2, new: 1})  # type: ignore
+
+    def test_rollup_command_rebuilds_counters_from_answers(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        expected = self.counts()
+        ChoiceStat.objects.update(count=7)  # type: ignore
+        call_command('rollup_choice_stats', stdout=io.StringIO())
+        self.assertEqual(self.counts(), expected)
+
+
+class FreeTextGradingTests(QuizAPITestCase):
+    def test_normalize_ignores_case_accents_punctuation_and_spacing(self):
+        self.assertEqual(normalize('  Jacobson\'s   ORGAN! '), 'jacobsons organ')
+        self.assertEqual(normalize('Sit-and-wait'), 'sit and wait')
+        self.assertEqual(normalize('Crème Brûlée'), 'creme brulee')
+
+    def test_policies(self):
+        exact = compile_answer_key(['Autotomy'], GradingPolicy.EXACT)
+        self.assertTrue(grade_free_text(exact, ' Autotomy '))
+        self.assertFalse(grade_free_text(exact, 'autotomy'))
+        normalized = compile_answer_key(['Autotomy'])
+        self.assertTrue(grade_free_text(normalized, 'AUTOTOMY.'))
+        self.assertFalse(grade_free_text(normalized, 'Autotomi'))
+        fuzzy = compile_answer_key(['Autotomy'], GradingPolicy.FUZZY, max_edits=1)
+        self.assertTrue(grade_free_text(fuzzy, 'autotomi'))
+        self.assertTrue(grade_free_text(fuzzy, 'Autotomyy'))
+        self.assertFalse(grade_free_text(fuzzy, 'autotmi'))
+        self.assertFalse(grade_free_text(fuzzy, ''))
+        # Without accepted answers any non-empty response is correct
+        self.assertTrue(grade_free_text(compile_answer_key([]), 'anything'))
+
+    def test_answer_endpoint_grades_against_accepted_answers(self):
+        FTQ.objects.filter(quiz=self.quiz).update(accepted_answers=['Autotomy'], grading_policy=GradingPolicy.FUZZY)  # type: ignore
+        Quiz.bump_content_version([self.quiz.id])
+        self.quiz.refresh_from_db()
+        ftq_id = get_question_plan(self.quiz)[3].question_id
+        for response, correct in (('autotomi', True), ('Regrowth', False)):
+            attempt = self.start_attempt()
+            bulk = [{'question_type': 'ftq', 'question_id': ftq_id, 'answer': response}]
+            self.client.post(f'/api/attempts/{attempt.id}/answers/bulk/', bulk, format='json')
+            answer = Answer.objects.get(attempt=attempt, ftq_id=ftq_id)  # type: ignore
+            self.assertEqual((answer.is_correct, answer.points_earned), (correct, 10 if correct else 0))
+
+    def test_non_string_answers_are_rejected_and_frontend_key_is_graded(self):
+        FTQ.objects.filter(quiz=self.quiz).update(accepted_answers=['Autotomy'])  # type: ignore
+        Quiz.bump_content_version([self.quiz.id])
+        self.quiz.refresh_from_db()
+        attempt = self.start_attempt()
+        self.client.post(f'/api/attempts/{attempt.id}/navigate/', {'question_number': 4}, format='json')
+        for answer in (5, ['x'], {'text': 'x'}):
+            response = self.client.post(f'/api/attempts/{attempt.id}/answer/', {'answer': answer}, format='json')
+            self.assertEqual(response.status_code, 400)
+        ftq_id = get_question_plan(self.quiz)[3].question_id
+        bulk = self.client.post(f'/api/attempts/{attempt.id}/answers/bulk/', [{'question_type': 'ftq', 'question_id': ftq_id, 'answer': 5}], format='json')
+        self.assertEqual(bulk.data['errors'], [{'index': 0, 'error': 'The answer must be a string'}])
+
+        self.client.post(f'/api/attempts/{attempt.id}/answer/', {'free_text_response': 'autotomy'}, format='json')
+        self.assertTrue(Answer.objects.get(attempt=attempt, ftq_id=ftq_id).is_correct)  # type: ignore
+
+    def test_regrade_updates_answers_scores_and_leaderboard(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)  # FTQ answered 'Autotomy', correct while no accepted answers are set
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 100.0)
+
+        ftq = FTQ.objects.get(quiz=self.quiz)  # type: ignore
+        ftq.accepted_answers = ['Tail shedding']
+        ftq.save()
+        out = io.StringIO()
+        call_command('regrade_answers', '--quiz', str(self.quiz.id), stdout=out)
+        self.assertIn('Regraded 1 answer(s); 1 attempt(s) changed', out.getvalue())
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.points_earned, attempt.correct_count, attempt.score), (6, 3, 37.5))
+        leaders = self.client.get(f'/api/quizzes/{self.quiz.id}/leaderboard/').data
+        self.assertEqual(leaders['entries'][0]['score'], 37.5)
+
+        # Nothing left to change
+        call_command('regrade_answers', '--quiz', str(self.quiz.id), stdout=out)
+        self.assertIn('Regraded 0 answer(s); 0 attempt(s) changed', out.getvalue())
+
+
+class RegradingTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.attempt = self.start_attempt()
+        self.answer_all(self.attempt)  # every answer correct: 16 / 16
+        self.mcq = MCQ.objects.filter(quiz=self.quiz).order_by('id').first()  # type: ignore
+        self.choices = list(self.mcq.choices.order_by('id'))
+
+    def test_admin_choice_fix_regrades_answers_and_scores(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        data = {
+            'quiz': self.quiz.id, 'question': self.mcq.question, 'points': self.mcq.points,
+            'choices-TOTAL_FORMS': 4, 'choices-INITIAL_FORMS': 4, 'choices-MIN_NUM_FORMS': 0, 'choices-MAX_NUM_FORMS': 1000,
+        }
+        for index, choice in enumerate(self.choices):
+            data.update({f'choices-{index}-id': choice.id, f'choices-{index}-mcq': self.mcq.id, f'choices-{index}-content': choice.content})
+        data['choices-1-is_correct'] = 'on'  # the correct choice was the second one all along
+        response = self.client.post(f'/admin/quizzes/mcq/{self.mcq.id}/change/', data, follow=True)
+        self.assertContains(response, 'Regraded 1 answer(s); 1 attempt(s) changed.')
+
+        answer = Answer.objects.get(attempt=self.attempt, mcq=self.mcq)  # type: ignore
+        self.assertEqual((answer.is_correct, answer.points_earned), (False, 0))
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.points_earned, self.attempt.correct_count, self.attempt.score), (15, 3, 93.75))
+
+    def test_points_change_regrades_with_few_statements(self):
+        MCQ.objects.filter(pk=self.mcq.pk).update(points=5)  # type: ignore
+        Quiz.bump_content_version([self.quiz.id])
+        self.quiz.refresh_from_db()
+        get_question_plan(self.quiz)
+        # savepoint, changed attempts, answer UPDATE, totals UPDATE, their quizzes and a score UPDATE per quiz,
+        # other stale scores, then the leaderboard rebuild (nested savepoint, 2 DELETEs, 2 SELECT + INSERT pairs)
+        with self.assertNumQueries(17):
+            result = regrade_quiz(self.quiz, mcq_ids=[self.mcq.pk], ftq_ids=[])
+        self.assertEqual(result, (1, 1))
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.points_earned, self.attempt.score), (20, 100.0))
+
+    def test_points_change_rescores_attempts_that_answered_wrong(self):
+        self.student = Student.objects.create(name='Mia', email='mia@example.com')  # type: ignore
+        wrong = self.start_attempt()
+        response = self.client.post(f'/api/attempts/{wrong.id}/answer/', {'choice_id': self.choices[1].id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.answer_all(wrong)  # 15 / 16
+        MCQ.objects.filter(pk=self.mcq.pk).update(points=5)  # type: ignore
+        Quiz.bump_content_version([self.quiz.id])
+        self.quiz.refresh_from_db()
+        result = regrade_quiz(self.quiz, mcq_ids=[self.mcq.pk], ftq_ids=[])
+        self.assertEqual(result, (1, 2))
+        wrong.refresh_from_db()
+        self.assertEqual((wrong.points_earned, wrong.score), (15, 75.0))
+        self.assertEqual(QuizBestScore.objects.get(quiz=self.quiz, student=self.student).score, 75.0)  # type: ignore
+
+    def test_regrade_after_a_move_rescores_attempts_at_the_previous_quiz(self):
+        other = make_quiz('Geckos', mcqs=1, ftqs=0)
+        self.mcq.quiz = other
+        self.mcq.save()
+        Choice.objects.filter(pk=self.choices[0].pk).update(is_correct=False)  # type: ignore
+        Quiz.bump_content_version([other.id])
+        result = regrade_quiz(Quiz.objects.get(pk=other.pk), mcq_ids=[self.mcq.pk], ftq_ids=[])  # type: ignore
+        self.assertEqual(result, (1, 1))
+        self.attempt.refresh_from_db()
+        total_points = get_question_plan(Quiz.objects.get(pk=self.quiz.pk)).total_points  # type: ignore
+        self.assertEqual((self.attempt.points_earned, self.attempt.correct_count), (15, 3))
+        self.assertEqual(self.attempt.score, 15 * 100.0 / total_points)
+        self.assertEqual(QuizBestScore.objects.get(quiz=self.quiz).score, self.attempt.score)  # type: ignore
+
+    @override_settings(QUIZ_REGRADING={'BACKGROUND_THRESHOLD': 0})
+    def test_large_histories_regrade_in_background_after_commit(self):
+        Choice.objects.filter(pk=self.choices[0].pk).update(is_correct=False)  # type: ignore
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertIsNone(schedule_regrade(self.quiz.id, mcq_ids=[self.mcq.pk]))
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(Answer.objects.get(attempt=self.attempt, mcq=self.mcq).is_correct)  # type: ignore
+
+
+class KeysetPaginationTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Seven attempts, five sharing a start time, so pages must break ties on id
+        tied = timezone.now()
+        self.attempts = []
+        for index in range(7):
+            student = Student.objects.create(name=f'S{index}', email=f's{index}@example.com')  # type: ignore
+            attempt = Attempt.objects.create(student=student, quiz=self.quiz)  # type: ignore
+            if index < 5:
+                Attempt.objects.filter(pk=attempt.pk).update(time_start=tied)  # type: ignore
+            self.attempts.append(attempt)
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url).data
+            ids += [row['id'] for row in data['results']]
+            url, pages = data['next'], pages + 1
+        return ids, pages
+
+    def test_walks_attempts_newest_first_without_gaps(self):
+        ids, pages = self.walk('/api/attempts/?page_size=2')
+        expected = list(Attempt.objects.order_by('-time_start', '-id').values_list('id', flat=True))  # type: ignore
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_page_query_count_does_not_depend_on_position(self):
+        second_page = self.client.get('/api/attempts/?page_size=2').data['next']
+        for url in ('/api/attempts/?page_size=2', second_page):
+            # one page query, with student and quiz joined
+            with self.assertNumQueries(1):
+                self.client.get(url)
+
+    def test_in_progress_attempts_are_paginated(self):
+        self.start_attempt()
+        data = self.client.get(f'/api/students/{self.student.id}/in_progress_attempts/').data
+        self.assertIsNone(data['next'])
+        self.assertEqual([row['quiz']['id'] for row in data['results']], [self.quiz.id])
+
+    def test_students_are_paginated(self):
+        ids, _ = self.walk('/api/students/?page_size=3')
+        self.assertEqual(ids, sorted(Student.objects.values_list('id', flat=True)))  # type: ignore
+
+    def test_rejects_malformed_cursor(self):
+        self.assertEqual(self.client.get('/api/attempts/?cursor=not-a-cursor').status_code, 404)
+
+
+class ExportTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.completed = self.start_attempt()
+        self.answer_all(self.completed)
+        other_student = Student.objects.create(name='Sally', email='sally@example.com')  # type: ignore
+        self.in_progress = Attempt.objects.create(student=other_student, quiz=self.quiz)  # type: ignore
+
+    def test_ndjson_export_nests_answers(self):
+        response = self.client.get('/api/attempts/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([record['attempt_id'] for record in records], [self.completed.id, self.in_progress.id])
+        self.assertEqual([answer['question_type'] for answer in records[0]['answers']], ['mcq', 'mcq', 'mcq', 'ftq'])
+        self.assertEqual(records[1]['answers'], [])
+
+    def test_csv_export_has_one_row_per_answer_and_filters(self):
+        response = self.client.get('/api/attempts/export/', {'fmt': 'csv', 'completed_after': '2000-01-01'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row['attempt_id'] for row in rows}, {str(self.completed.id)})
+        self.assertEqual(rows[0]['selected_choice'], 'Choice 0')
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_attempts', '--student', str(self.in_progress.student_id), stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+    def test_rejects_bad_filters(self):
+        self.assertEqual(self.client.get('/api/attempts/export/', {'completed_after': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/attempts/export/', {'fmt': 'xml'}).status_code, 400)
+
+
+class QuizHTTPCachingTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_retrieve_sets_etag_and_answers_conditional_get(self):
+        response = self.client.get(f'/api/quizzes/{self.quiz.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['mcqs']), 3)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get(f'/api/quizzes/{self.quiz.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('quizzes_mcq', queries.captured_queries[0]['sql'])
+
+    def test_repeated_retrieve_is_served_from_rendered_cache(self):
+        first = self.client.get(f'/api/quizzes/{self.quiz.id}/with_answers/')
+        with self.assertNumQueries(1):
+            second = self.client.get(f'/api/quizzes/{self.quiz.id}/with_answers/')
+        self.assertEqual(first.content, second.content)
+        self.assertNotEqual(first['ETag'], self.client.get(f'/api/quizzes/{self.quiz.id}/')['ETag'])
+
+    def test_content_change_changes_etag_and_body(self):
+        etag = self.client.get(f'/api/quizzes/{self.quiz.id}/')['ETag']
+        FTQ.objects.create(quiz=self.quiz, question='New', points=1)  # type: ignore
+        response = self.client.get(f'/api/quizzes/{self.quiz.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['ftqs']), 2)
+
+    def test_list_etag(self):
+        response = self.client.get('/api/quizzes/')
+        self.assertEqual(json.loads(response.content), [{'id': self.quiz.id, 'name': 'Lizards', 'question_count': 4, 'total_points': 16}])
+        self.assertEqual(self.client.get('/api/quizzes/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.quiz.name = 'Geckos'
+        self.quiz.save()
+        self.assertEqual(self.client.get('/api/quizzes/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class QuizSnapshotTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_payload_is_served_from_the_stored_snapshot(self):
+        first = self.client.get(f'/api/quizzes/{self.quiz.id}/')
+        snapshot = QuizSnapshot.objects.get(quiz=self.quiz, variant=snapshots.STUDENT)  # type: ignore
+        self.assertEqual((snapshot.version, bytes(snapshot.payload)), (self.quiz.content_version, first.content))
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(f'/api/quizzes/{self.quiz.id}/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(queries), 2)  # quiz row, snapshot
+        self.assertFalse([q for q in queries.captured_queries if 'quizzes_mcq' in q['sql']])
+
+    def test_content_change_rerenders_stale_snapshot(self):
+        self.client.get(f'/api/quizzes/{self.quiz.id}/with_answers/')
+        FTQ.objects.create(quiz=self.quiz, question='New', points=1, accepted_answers=['Yes'])  # type: ignore
+        self.quiz.refresh_from_db()
+        response = self.client.get(f'/api/quizzes/{self.quiz.id}/with_answers/')
+        self.assertEqual(json.loads(response.content)['ftqs'][1]['accepted_answers'], ['Yes'])
+        snapshot = QuizSnapshot.objects.get(quiz=self.quiz, variant=snapshots.ANSWERS)  # type: ignore
+        self.assertEqual((snapshot.version, bytes(snapshot.payload)), (self.quiz.content_version, response.content))
+
+    def test_older_render_does_not_replace_a_newer_snapshot(self):
+        slow = snapshots.render_snapshot(Quiz.objects.prefetch_related('mcqs__choices', 'ftqs').get(pk=self.quiz.pk), snapshots.STUDENT)  # type: ignore
+        FTQ.objects.create(quiz=self.quiz, question='New', points=1)  # type: ignore
+        self.quiz.refresh_from_db()
+        body = snapshot_body(self.quiz, snapshots.STUDENT)
+        snapshots.save_snapshots([slow])
+        snapshot = QuizSnapshot.objects.get(quiz=self.quiz, variant=snapshots.STUDENT)  # type: ignore
+        self.assertEqual((snapshot.version, bytes(snapshot.payload)), (self.quiz.content_version, body))
+
+    def test_rebuild_command_renders_every_variant(self):
+        make_quiz('Other')
+        out = io.StringIO()
+        call_command('rebuild_quiz_snapshots', stdout=out)
+        self.assertIn('Rendered 4 snapshot(s).', out.getvalue())
+        with self.assertNumQueries(1):
+            body = snapshot_body(self.quiz, snapshots.ANSWERS)
+        self.assertEqual(json.loads(body)['ftqs'][0]['accepted_answers'], [])
+
+
+class FastSerializationTests(QuizAPITestCase):
+    def test_projections_match_serializers(self):
+        attempt = self.start_attempt()
+        plan = get_question_plan(self.quiz)
+        for position in (0, 3):
+            entry = plan[position]
+            question = question_model(entry).objects.get(pk=entry.question_id)
+            choices = question.choices.all() if isinstance(question, MCQ) else None
+            self.assertEqual(
+                current_question_payload(load_question(entry), position, len(plan), self.quiz.id),
+                current_question_data(question, choices, position, len(plan), self.quiz.id)
+            )
+
+        self.answer_all(attempt)
+        attempt = Attempt.objects.select_related('student', 'quiz').get(pk=attempt.pk)  # type: ignore
+        self.assertEqual(attempt_results_payload(attempt), AttemptResultsSerializer(attempt).data)
+
+        quiz = Quiz.objects.prefetch_related('mcqs__choices', 'ftqs').get(pk=self.quiz.pk)  # type: ignore
+        self.assertEqual(quiz_detail_payload(quiz), QuizDetailSerializer(quiz).data)
+        self.assertEqual(quiz_detail_payload(quiz, with_answers=True), QuizWithAnswersSerializer(quiz).data)
+
+    def test_renderer_matches_drf_json(self):
+        data = {
+            'when': timezone.now(), 'took': timedelta(seconds=90), 'score': 37.5, 1: None,
+            'text': 'Crème brûlée \u2028 🦎', 'nested': [{'ok': True}],
+        }
+        self.assertEqual(render_json(data), JSONRenderer().render(data))
+
+    def test_api_uses_orjson_renderer_and_parser(self):
+        attempt = self.start_attempt()
+        response = self.client.get(f'/api/attempts/{attempt.id}/current_question/')
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        malformed = self.client.post('/api/attempts/', '{"quiz_id": ', content_type='application/json')
+        self.assertEqual(malformed.status_code, 400)
+        self.assertIn('JSON parse error', malformed.data['detail'])
+
+
+class QuizBundleTests(PrimaryOnlyTestCase):
+    def test_export_import_round_trip(self):
+        quiz = make_quiz('Round trip', mcqs=2, ftqs=1)
+        lines = list(iter_bundle(Quiz.objects.filter(pk=quiz.pk)))
+        self.assertEqual(json.loads(lines[0]), {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION})
+        counts = import_bundle(lines, batch_size=1)
+        self.assertEqual(counts, {'quizzes': 1, 'mcqs': 2, 'ftqs': 1})
+        copy = Quiz.objects.exclude(pk=quiz.pk).get()  # type: ignore
+        self.assertEqual(list(iter_bundle(Quiz.objects.filter(pk=copy.pk)))[1], lines[1])
+
+    def test_dry_run_writes_nothing(self):
+        with open_bundle(LIZARDS_BUNDLE) as bundle:
+            counts = import_bundle(bundle, dry_run=True)
+        self.assertEqual(counts, {'quizzes': 8, 'mcqs': 56, 'ftqs': 7})
+        self.assertFalse(Quiz.objects.exists())
+
+    def test_invalid_bundle_reports_line_and_rolls_back(self):
+        lines = [
+            json.dumps({'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION}),
+            json.dumps({'name': 'Fine', 'questions': [{'type': 'ftq', 'text': 'Q', 'points': 1}]}),
+            json.dumps({'name': 'Broken', 'questions': [{'type': 'mcq', 'text': 'Q', 'points': 1, 'choices': []}]}),
+        ]
+        with self.assertRaisesRegex(BundleError, 'line 3'):
+            import_bundle(lines, batch_size=1)
+        self.assertFalse(Quiz.objects.exists())
+
+    def test_gzip_bundle_commands(self):
+        make_quiz('Zipped')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bank.jsonl.gz')
+            call_command('export_quizzes', '--output', path)
+            Quiz.objects.all().delete()
+            call_command('import_quizzes', path, stdout=io.StringIO())
+        self.assertEqual(Quiz.objects.get().mcqs.count(), 3)  # type: ignore
+
+
+class AsyncReadPathTests(QuizAPITestCase):
+    def async_get(self, path, **headers):
+        return async_to_sync(self.async_client.get)(path, headers=headers)
+
+    def assertSamePayload(self, path):
+        sync_response = self.client.get(f'/api/{path}')
+        async_response = self.async_get(f'/api/async/{path}')
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+        return sync_response, async_response
+
+    def test_payloads_match_sync_views(self):
+        attempt = self.start_attempt()
+        self.assertSamePayload('quizzes/')
+        sync_response, async_response = self.assertSamePayload(f'quizzes/{self.quiz.id}/')
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+        self.assertEqual(self.async_get(f'/api/async/quizzes/{self.quiz.id}/', if_none_match=sync_response['ETag']).status_code, 304)
+        self.assertSamePayload(f'attempts/{attempt.id}/current_question/')
+        self.assertSamePayload(f'attempts/{attempt.id}/results/')
+
+        self.answer_all(attempt)
+        ContentType.objects.clear_cache()  # the first async lookup must not touch the ORM synchronously
+        self.assertSamePayload(f'attempts/{attempt.id}/results/')
+        self.assertSamePayload(f'attempts/{attempt.id}/current_question/')
+        self.assertEqual(self.async_get('/api/async/attempts/999999/results/').status_code, 404)
+
+    def test_async_results_with_cold_content_type_cache(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        expected = json.loads(self.client.get(f'/api/attempts/{attempt.id}/results/').content)
+        ContentType.objects.clear_cache()
+        response = self.async_get(f'/api/async/attempts/{attempt.id}/results/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), expected)
+
+    def test_async_requests_are_metered(self):
+        metrics_registry.reset()
+        attempt = self.start_attempt()
+        response = self.async_get(f'/api/async/attempts/{attempt.id}/current_question/')
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+        self.assertIn('view="async-attempt-current-question"', self.client.get('/api/metrics/').content.decode())
+
+
+HAS_REPLICA = 'replica' in settings.DATABASES
+
+
+@skipUnless(HAS_REPLICA, 'needs a "replica" database alias (e.g. DB_REPLICA_HOST=localhost)')
+class ReplicaRoutingTests(QuizAPIMixin, TransactionTestCase):
+    # The runner sets up every alias a test class names, skipped or not
+    databases = {'default', 'replica'} if HAS_REPLICA else {'default'}
+
+    def queries_on(self, alias, path, **cookies):
+        self.client.cookies.clear()
+        for name, value in cookies.items():
+            self.client.cookies[name] = value
+        with CaptureQueriesContext(connections[alias]) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_quiz_content_is_read_from_the_replica(self):
+        self.assertIn('"quizzes_quiz"', self.queries_on('replica', f'/api/quizzes/{self.quiz.id}/'))
+        self.assertNotIn('"quizzes_quiz"', self.queries_on('default', '/api/quizzes/'))
+
+    def test_results_stay_on_the_primary_right_after_completion(self):
+        attempt = self.start_attempt()
+        self.answer_all(attempt)
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+        results = f'/api/attempts/{attempt.id}/results/'
+        # Pinned by the cookie set when the answers were submitted
+        self.assertEqual(self.queries_on('replica', results, **{PIN_COOKIE: '1'}), '')
+        # Without the cookie, the answers of a just-completed attempt are still read from the primary
+        self.assertNotIn('"quizzes_answer"', self.queries_on('replica', results))
+        # Once the attempt has been complete for a while they come from the replica; the attempt never does
+        Attempt.objects.filter(pk=attempt.pk).update(time_end=timezone.now() - timedelta(minutes=1))  # type: ignore
+        replica_sql = self.queries_on('replica', results)
+        self.assertIn('"quizzes_answer"', replica_sql)
+        self.assertNotIn('FROM "quizzes_attempt"', replica_sql)
+
+    def test_writes_and_in_progress_reads_use_the_primary(self):
+        attempt = self.start_attempt()
+        with CaptureQueriesContext(connections['replica']) as queries:
+            self.client.get(f'/api/attempts/{attempt.id}/current_question/')
+            self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': get_question_plan(self.quiz)[0].choice_ids[0]}, format='json')
+        self.assertEqual(queries.captured_queries, [])
+
+
+ADMISSION = {
+    'ENABLED': True,
+    'MAX_CONCURRENT_WRITES': 1,
+    'QUEUE_SECONDS': 0,
+    'RETRY_AFTER': 2,
+    'ACTIONS': {
+        'AttemptViewSet.create': {'student': {'rate': '2/min'}},
+        'AttemptViewSet.current_question': {'quiz': {'rate': '1/min', 'burst': 3}},
+    },
+}
+
+
+@override_settings(QUIZ_ADMISSION=ADMISSION)
+class AdmissionControlTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_token_bucket_refills_at_rate(self):
+        now = 1000.0
+        self.assertEqual([admission.take_token(cache, 'bucket', '2/s', burst=2, now=now) for _ in range(3)], [0, 0, 0.5])
+        self.assertEqual(admission.take_token(cache, 'bucket', '2/s', burst=2, now=now + 0.5), 0)
+        self.assertEqual(admission.take_token(cache, 'bucket', '2/s', burst=2, now=now + 0.5), 0.5)
+
+    def test_student_bucket_throttles_attempt_starts(self):
+        other = Student.objects.create(name='Ada', email='ada@example.com')  # type: ignore
+        for _ in range(2):
+            self.assertIn(self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': self.student.id}, format='json').status_code, (200, 201))
+        response = self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': self.student.id}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': other.id}, format='json').status_code, 201)
+
+    def test_quiz_bucket_is_shared_by_its_attempts(self):
+        attempts = [self.start_attempt()]
+        for index in range(3):
+            student = Student.objects.create(name=f'S{index}', email=f's{index}@example.com')  # type: ignore
+            response = self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': student.id}, format='json')
+            attempts.append(Attempt.objects.get(id=response.data['id']))  # type: ignore
+        statuses = [self.client.get(f'/api/attempts/{attempt.id}/current_question/').status_code for attempt in attempts]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_busy_write_slots_shed_requests(self):
+        attempt = self.start_attempt()
+        held = admission.limiter('writes', 1)
+        self.assertTrue(held.acquire(0))
+        try:
+            response = self.client.post(f'/api/attempts/{attempt.id}/answer/', {'answer': 'x'}, format='json')
+            self.assertEqual((response.status_code, response['Retry-After']), (429, '2'))
+            # Reads are not limited
+            self.assertEqual(self.client.get(f'/api/attempts/{attempt.id}/current_question/').status_code, 200)
+        finally:
+            held.release()
+        self.assertEqual(self.client.post(f'/api/attempts/{attempt.id}/answer/', {'choice_id': ''}, format='json').status_code, 200)
+
+    @override_settings(QUIZ_ADMISSION={**ADMISSION, 'ENABLED': False})
+    def test_disabled_admits_everything(self):
+        for _ in range(3):
+            self.assertNotEqual(self.client.post('/api/attempts/', {'quiz_id': self.quiz.id, 'student_id': self.student.id}, format='json').status_code, 429)
+
+
+class LoadTestHarnessTests(PrimaryOnlyTestCase):
+    def test_student_session_records_every_request(self):
+        quiz = make_quiz()
+        recorder = Recorder()
+        self.assertTrue(StudentSession(recorder).take_quiz(quiz.id, 'bench@example.com'))
+        report = summarize(recorder.samples, wall_seconds=1.0)
+        self.assertEqual(report['attempts.answer']['requests'], 4)
+        self.assertEqual(report['attempts.results']['errors'], 0)
+        self.assertGreater(report['attempts.results']['queries_per_request']['mean'], 0)
+
+    @override_settings(QUIZ_ADMISSION={'ENABLED': True, 'ACTIONS': {'AttemptViewSet.answer': {'student': {'rate': '20/s', 'burst': 1}}}})
+    def test_student_session_retries_throttled_requests(self):
+        cache.clear()
+        quiz = make_quiz()
+        recorder = Recorder()
+        self.assertTrue(StudentSession(recorder, max_retry_wait=0.05).take_quiz(quiz.id, 'bench@example.com'))
+        report = summarize(recorder.samples, wall_seconds=1.0)
+        self.assertEqual(report['attempts.answer']['requests'] - report['attempts.answer']['throttled'], 4)
+        self.assertGreater(report['attempts.answer']['throttled'], 0)
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([7], 0.99), 7)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_defaults_to_persistent_connections_with_health_checks(self):
+        config = database_from_env({})
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (60, True))
+        self.assertNotIn('OPTIONS', config)
+
+    def test_pool_replaces_persistent_connections(self):
+        config = database_from_env({'DB_POOL': 'true', 'DB_POOL_MAX_SIZE': '40', 'DB_HOST': 'db'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 40, 'timeout': 10})
+        self.assertEqual(config['HOST'], 'db')
+
+    def test_rejects_bad_values(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_from_env({'DB_CONN_MAX_AGE': 'forever'})
+        with self.assertRaises(ImproperlyConfigured):
+            database_from_env({'DB_POOL': '1', 'DB_ENGINE': 'django.db.backends.sqlite3'})
+
+
+class MetricsTests(QuizAPITestCase):
+    def setUp(self):
+        super().setUp()
+        metrics_registry.reset()
+
+    def test_records_viewset_actions_and_exposes_prometheus_text(self):
+        attempt = self.start_attempt()
+        response = self.client.get(f'/api/attempts/{attempt.id}/current_question/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[0-9.]+;desc="\d+ queries", total;dur=[0-9.]+')
+        text = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('quizwhiz_request_duration_seconds_count{view="AttemptViewSet.current_question"} 1', text)
+        self.assertIn('quizwhiz_request_duration_seconds_count{view="AttemptViewSet.create"} 1', text)
+        self.assertIn('quizwhiz_responses_total{view="AttemptViewSet.create",status="2xx"} 1', text)
+        self.assertIn('quizwhiz_request_db_queries_bucket{view="AttemptViewSet.current_question",le="+Inf"} 1', text)
+
+    @override_settings(QUIZ_METRICS={'SLOW_QUERY_MS': 0})
+    def test_samples_slow_queries_with_their_view(self):
+        self.client.get(f'/api/quizzes/{self.quiz.id}/')
+        samples = self.client.get('/api/metrics/slow_queries/').json()['samples']
+        self.assertTrue(samples)
+        self.assertEqual(samples[0]['view'], 'QuizViewSet.retrieve')
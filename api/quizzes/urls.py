@@ -1,5 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
+from .metrics import metrics_view, slow_queries_view
 from .views import QuizViewSet, AttemptViewSet, StudentViewSet
 
 # A router automatically generates the URL patterns for a viewset.
@@ -10,5 +12,12 @@ router.register(r'students', StudentViewSet, basename='student')
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
+    path('metrics/slow_queries/', slow_queries_view, name='metrics-slow-queries'),
+    # Native async read path (see quizzes/async_views.py)
+    path('async/quizzes/', async_views.quiz_list, name='async-quiz-list'),
+    path('async/quizzes/<int:pk>/', async_views.quiz_detail, name='async-quiz-detail'),
+    path('async/attempts/<int:pk>/current_question/', async_views.current_question, name='async-attempt-current-question'),
+    path('async/attempts/<int:pk>/results/', async_views.attempt_results, name='async-attempt-results'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,26 +1,53 @@
 # type: ignore
-from django.shortcuts import render
-from rest_framework import viewsets, status, serializers
+import hashlib
+
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
-from .models import Quiz, MCQ, FTQ, Attempt, Answer, Student, Choice
-from .serializers import (
-    QuizListSerializer, QuizDetailSerializer, AttemptSerializer, 
-    AnswerSerializer, CurrentQuestionSerializer, AttemptResultsSerializer,
-    ChoiceQuizSerializer, MCQResultsSerializer, FTQSerializer, QuizWithAnswersSerializer,
-    StudentSerializer
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from .models import Quiz, Attempt, Student
+from .serializers import QuizListSerializer, QuizDetailSerializer, AttemptSerializer, StudentSerializer
+from .scoring import grade, InvalidChoice, InvalidResponse, record_answers, complete_attempt
+from .attempt_state import (
+    AttemptBusy, entry_at, flush_attempt_state, next_unanswered, open_attempt_state,
+    order_positions, question_order, resolve_position, save_answered, save_position
 )
+from .metrics import InstrumentedViewSetMixin
+from .admission import AdmissionControlMixin, attempt_scopes
+from .pagination import AttemptPagination, StudentPagination
+from . import leaderboard as quiz_aggregates
+from .choice_stats import quiz_choice_distribution
+from .http_caching import cached_json_response, quiz_etag
+from . import snapshots
+from .snapshots import snapshot_body
+from .projections import attempt_results_payload, current_question_payload, load_question
+from .exports import EXPORT_FORMATS, content_type_for, filter_attempts, iter_export, parse_timestamp
+from .question_plan import get_question_plan, mcq_content_type_id, ftq_content_type_id
 
 # Create your views here.
 
-class QuizViewSet(viewsets.ReadOnlyModelViewSet):
+def free_text_answer(data):
+    """A submitted free-text answer: `answer`, or `free_text_response` as the frontend sends it."""
+    return data.get('answer', data.get('free_text_response'))
+
+
+class QuizViewSet(InstrumentedViewSetMixin, AdmissionControlMixin, viewsets.ReadOnlyModelViewSet):
     """
     This viewset automatically provides `list` and `retrieve` actions.
     It uses a different serializer for each action.
+    
+    Responses carry strong ETags and Cache-Control headers. Quiz payloads are
+    stored pre-rendered per content version (see quizzes/snapshots.py) and
+    cached (see quizzes/http_caching.py).
     """
     queryset = Quiz.objects.all().order_by('name')
+    content_cache_control = 'public, max-age=60'
+    answers_cache_control = 'private, max-age=0, must-revalidate'
+
+    def admission_scopes(self, request):
+        return {'quiz': self.kwargs.get('pk')}
 
     def get_serializer_class(self):
         """
@@ -32,6 +59,32 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
             return QuizDetailSerializer
         return QuizListSerializer
     
+    def list(self, request, *args, **kwargs):
+        fields = QuizListSerializer.Meta.fields
+        rows = list(self.get_queryset().values_list(*fields, 'content_version'))
+        digest = hashlib.sha1(repr(rows).encode()).hexdigest()
+        return cached_json_response(
+            request,
+            etag=f'"quizzes-{digest}"',
+            cache_key=f'quizzes:rendered:list:{digest}',
+            render=lambda: [dict(zip(fields, row)) for row in rows],
+            cache_control=self.content_cache_control
+        )
+    
+    def _quiz_content_response(self, request, variant, cache_control):
+        """Serves a stored quiz payload snapshot, reading only the quiz row when it is cached."""
+        quiz = get_object_or_404(self.get_queryset().only('id', 'content_version'), pk=self.kwargs['pk'])
+        return cached_json_response(
+            request,
+            etag=quiz_etag(quiz.pk, quiz.content_version, variant),
+            cache_key=f'quizzes:rendered:{variant}:{quiz.pk}:{quiz.content_version}',
+            render_body=lambda: snapshot_body(quiz, variant),
+            cache_control=cache_control
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self._quiz_content_response(request, snapshots.STUDENT, self.content_cache_control)
+    
     @action(detail=True, methods=['get'])
     def with_answers(self, request, pk=None):
         """
@@ -43,16 +96,71 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
         URL: /api/quizzes/{id}/with_answers/
         Returns: Quiz with correct answers visible
         """
-        quiz = self.get_object()
-        serializer = QuizWithAnswersSerializer(quiz)
-        return Response(serializer.data)
+        return self._quiz_content_response(request, snapshots.ANSWERS, self.answers_cache_control)
+
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        """
+        Top best scores for a quiz, one entry per student (see quizzes/leaderboard.py).
 
-class AttemptViewSet(viewsets.ModelViewSet):
+        URL: /api/quizzes/{id}/leaderboard/?limit=10 (at most 100)
+        """
+        quiz = get_object_or_404(self.get_queryset().only('id'), pk=pk)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'quiz_id': quiz.id, 'entries': quiz_aggregates.leaderboard(quiz.id, limit)})
+
+    @action(detail=True, methods=['get'])
+    def score_distribution(self, request, pk=None):
+        """
+        Histogram of completed attempt scores for a quiz.
+
+        URL: /api/quizzes/{id}/score_distribution/
+        """
+        quiz = get_object_or_404(self.get_queryset().only('id'), pk=pk)
+        return Response({'quiz_id': quiz.id, **quiz_aggregates.score_distribution(quiz.id)})
+
+    @action(detail=True, methods=['get'])
+    def choice_stats(self, request, pk=None):
+        """
+        How often each choice of the quiz's MCQs is selected (see quizzes/choice_stats.py).
+        Reveals the correct choices, like `with_answers`.
+
+        URL: /api/quizzes/{id}/choice_stats/
+        """
+        quiz = get_object_or_404(self.get_queryset().only('id'), pk=pk)
+        return Response({'quiz_id': quiz.id, 'questions': quiz_choice_distribution(quiz.id)})
+
+class AttemptViewSet(InstrumentedViewSetMixin, AdmissionControlMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing quiz attempts.
     """
     queryset = Attempt.objects.all()
     serializer_class = AttemptSerializer
+    pagination_class = AttemptPagination
+    # Related rows joined per action; the quiz-taking actions only need the quiz
+    # (for its question plan), everything else serializes student and quiz too.
+    related_by_action = {
+        'current_question': ('quiz',),
+        'answer': ('quiz',),
+        'bulk_answers': ('quiz',),
+        'navigate': ('quiz',),
+    }
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(*self.related_by_action.get(self.action, ('student', 'quiz')))
+
+    def admission_scopes(self, request):
+        if self.action == 'create':
+            return {'student': request.data.get('student_id'), 'quiz': request.data.get('quiz_id')}
+        if 'pk' in self.kwargs:
+            return attempt_scopes(self.kwargs['pk'])
+        return {}
     
     def create(self, request, *args, **kwargs):
         """Start a new quiz attempt."""
@@ -80,17 +188,30 @@ class AttemptViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(existing_attempt)
             return Response(serializer.data, status=status.HTTP_200_OK)
         
-        # Create new attempt
-        attempt = Attempt.objects.create(
-            student=student,
-            quiz=quiz,
-            current_question_type=ContentType.objects.get_for_model(MCQ),
-            current_question_id=1
-        )
+        # Create new attempt. A concurrent request may have opened one first;
+        # the one-open-attempt constraint rejects ours and we resume theirs.
+        try:
+            with transaction.atomic():
+                attempt = Attempt.objects.create(
+                    student=student,
+                    quiz=quiz,
+                    question_order=question_order(get_question_plan(quiz))
+                )
+        except IntegrityError:
+            existing_attempt = Attempt.objects.filter(student=student, quiz=quiz, time_end__isnull=True).first()
+            if existing_attempt is None:
+                raise
+            serializer = self.get_serializer(existing_attempt)
+            return Response(serializer.data, status=status.HTTP_200_OK)
         
         serializer = self.get_serializer(attempt)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    def _question_payload(self, attempt, plan, position):
+        """The question at a position of the attempt's order in the `CurrentQuestionSerializer` shape (see quizzes/projections.py)."""
+        row = load_question(entry_at(attempt, plan, position))
+        return current_question_payload(row, position, len(attempt.question_order), attempt.quiz_id)
+
     @action(detail=True, methods=['get'])
     def current_question(self, request, pk=None):
         """Get the current question for an attempt."""
@@ -102,58 +223,34 @@ class AttemptViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get all questions for this quiz
-        mcqs = list(attempt.quiz.mcqs.all())
-        ftqs = list(attempt.quiz.ftqs.all())
-        all_questions = mcqs + ftqs
+        plan = get_question_plan(attempt.quiz)
         
-        if not all_questions:
+        if not plan:
             return Response(
                 {'error': 'No questions found for this quiz'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Find current question index
-        current_question = None
-        question_number = 1
-        
-        for question in all_questions:
-            if (attempt.current_question_type == ContentType.objects.get_for_model(type(question)) and 
-                attempt.current_question_id == question.id):
-                current_question = question
-                break
-            question_number += 1
-        
-        if not current_question:
-            # Start from the first question
-            current_question = all_questions[0]
-            question_number = 1
-            attempt.current_question_type = ContentType.objects.get_for_model(type(current_question))
-            attempt.current_question_id = current_question.id
-            attempt.save()
-        
-        # Prepare response data
-        data = {
-            'question_id': current_question.id,
-            'question_type': current_question.__class__.__name__.lower(),
-            'question_text': current_question.question,
-            'points': current_question.points,
-            'question_number': question_number,
-            'total_questions': len(all_questions),
-            'quiz_id': attempt.quiz.id
-        }
-        
-        # Add choices for MCQ
-        if isinstance(current_question, MCQ):
-            choices_serializer = ChoiceQuizSerializer(current_question.choices.all(), many=True)
-            data['choices'] = choices_serializer.data
-        
-        serializer = CurrentQuestionSerializer(data)
-        return Response(serializer.data)
+        try:
+            with open_attempt_state(attempt, plan) as state:
+                position = state.position
+        except AttemptBusy:
+            return self._attempt_busy()
+        if position is None:
+            return Response(
+                {'error': 'No questions found for this quiz'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(self._question_payload(attempt, plan, position))
     
     @action(detail=True, methods=['post'])
     def answer(self, request, pk=None):
-        """Submit an answer for the current question."""
+        """
+        Submit an answer for the current question.
+        
+        With `?include_next=true` the response also carries the next question
+        (same shape as `current_question`) under `next_question`.
+        """
         attempt = self.get_object()
         
         if attempt.time_end:
@@ -163,90 +260,230 @@ class AttemptViewSet(viewsets.ModelViewSet):
             )
         
         # Get current question
-        current_question = attempt.current_question
-        if not current_question:
+        plan = get_question_plan(attempt.quiz)
+        if not plan:
             return Response(
                 {'error': 'No current question found'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Check if answer already exists
-        existing_answer = Answer.objects.filter(
-            attempt=attempt,
-            question_type=attempt.current_question_type,
-            question_id=attempt.current_question_id
-        ).first()
+        try:
+            with open_attempt_state(attempt, plan) as state:
+                return self._record_and_advance(request, attempt, plan, state)
+        except AttemptBusy:
+            return self._attempt_busy()
+
+    def _record_and_advance(self, request, attempt, plan, state):
+        """Grades and records the answer to the state's current question, then moves on or completes."""
+        position = state.position
+        if position is None:
+            return Response(
+                {'error': 'No current question found'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        entry = state.entry(position)
         
         # Process the answer
-        is_correct = False
-        selected_choice = None
-        free_text_response = None
-        
-        if isinstance(current_question, MCQ):
-            choice_id = request.data.get('choice_id')
-            if choice_id:
-                try:
-                    selected_choice = Choice.objects.get(id=choice_id, mcq=current_question)
-                    is_correct = selected_choice.is_correct
-                except Choice.DoesNotExist:
-                    return Response(
-                        {'error': 'Invalid choice'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-        elif isinstance(current_question, FTQ):
-            free_text_response = request.data.get('answer')
-            # For FTQ, we'd need a way to determine correctness
-            # For now, we'll mark as correct if answer is provided
-            is_correct = bool(free_text_response)
-        
-        # Create or update answer
-        if existing_answer:
-            existing_answer.selected_choice = selected_choice
-            existing_answer.free_text_response = free_text_response
-            existing_answer.is_correct = is_correct
-            existing_answer.save()
-        else:
-            Answer.objects.create(
-                attempt=attempt,
-                question_type=attempt.current_question_type,
-                question_id=attempt.current_question_id,
-                selected_choice=selected_choice,
-                free_text_response=free_text_response,
-                is_correct=is_correct
+        try:
+            selected_choice_id, free_text_response, is_correct = grade(
+                entry,
+                choice_id=request.data.get('choice_id'),
+                free_text_response=free_text_answer(request.data)
+            )
+        except InvalidChoice:
+            return Response(
+                {'error': 'Invalid choice'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except InvalidResponse:
+            return Response(
+                {'error': 'The answer must be a string'}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Move to next question or complete quiz
-        mcqs = list(attempt.quiz.mcqs.all())
-        ftqs = list(attempt.quiz.ftqs.all())
-        all_questions = mcqs + ftqs
-        
-        current_index = -1
-        for i, question in enumerate(all_questions):
-            if (attempt.current_question_type == ContentType.objects.get_for_model(type(question)) and 
-                attempt.current_question_id == question.id):
-                current_index = i
-                break
+        # Create or update answer (and the attempt's running totals)
+        state.record(position, entry, selected_choice_id, free_text_response, is_correct)
         
-        if current_index < len(all_questions) - 1:
+        # Move to the next unanswered question, or complete the quiz once every question is answered
+        following = state.next_unanswered(position)
+        if following is not None:
             # Move to next question
-            next_question = all_questions[current_index + 1]
-            attempt.current_question_type = ContentType.objects.get_for_model(type(next_question))
-            attempt.current_question_id = next_question.id
-            attempt.save()
+            state.move_to(following)
             
-            return Response({
+            data = {
                 'message': 'Answer submitted successfully',
                 'next_question_available': True
-            })
+            }
+            # Opt-in: return the next question too, saving a current_question round trip
+            if request.query_params.get('include_next') in ('1', 'true', 'True'):
+                data['next_question'] = self._question_payload(attempt, plan, following)
+            return Response(data)
         else:
             # Quiz completed
-            attempt.time_end = timezone.now()
-            attempt.save()
+            state.complete()
             
             return Response({
                 'message': 'Quiz completed!',
                 'next_question_available': False
             })
+
+    @action(detail=True, methods=['post'])
+    def navigate(self, request, pk=None):
+        """
+        Move through the attempt's questions without answering: skip ahead, go back, or jump.
+        
+        Body: {"direction": "next"|"previous"} or {"question_number": 3}
+        Returns the question moved to (same shape as `current_question`) and
+        whether it has already been answered.
+        """
+        attempt = self.get_object()
+        
+        if attempt.time_end:
+            return Response(
+                {'error': 'Quiz already completed'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        plan = get_question_plan(attempt.quiz)
+        direction = request.data.get('direction')
+        question_number = request.data.get('question_number')
+        if direction not in ('next', 'previous') and question_number is None:
+            return Response(
+                {'error': 'A direction ("next" or "previous") or a question_number is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            with open_attempt_state(attempt, plan) as state:
+                if state.position is None:
+                    return Response(
+                        {'error': 'No questions found for this quiz'}, 
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+                if question_number is None:
+                    position = state.next_position(state.position, 1 if direction == 'next' else -1)
+                    if position is None:
+                        return Response(
+                            {'error': f'No {direction} question'}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                else:
+                    try:
+                        position = int(question_number) - 1
+                    except (TypeError, ValueError):
+                        position = -1
+                    if not 0 <= position < state.total:
+                        return Response(
+                            {'error': f'question_number must be between 1 and {state.total}'}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                    if state.entry(position) is None:
+                        return Response(
+                            {'error': 'That question is no longer part of this quiz'}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                if position != state.position:
+                    state.move_to(position)
+                answered = state.is_answered(position)
+        except AttemptBusy:
+            return self._attempt_busy()
+        
+        data = self._question_payload(attempt, plan, position)
+        data['answered'] = answered
+        return Response(data)
+
+    def _attempt_busy(self):
+        return Response(
+            {'error': 'Another request for this attempt is in progress, try again'}, 
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    @action(detail=True, methods=['post'], url_path='answers/bulk', url_name='bulk-answers')
+    def bulk_answers(self, request, pk=None):
+        """
+        Submit several answers at once, e.g. answers queued by a client while offline.
+        
+        URL: /api/attempts/{id}/answers/bulk/
+        Body: a list (or {"answers": [...]}) of
+              {"question_type": "mcq"|"ftq", "question_id": 1, "choice_id": 2, "answer": "..."}
+        
+        All entries are validated against the quiz before anything is written;
+        they are then upserted in one transaction and the attempt moves to the
+        next unanswered question after the furthest answered one (completing it
+        once every question is answered).
+        """
+        attempt = self.get_object()
+        
+        if attempt.time_end:
+            return Response(
+                {'error': 'Quiz already completed'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        submitted = request.data.get('answers') if isinstance(request.data, dict) else request.data
+        if not isinstance(submitted, list) or not submitted:
+            return Response(
+                {'error': 'A non-empty list of answers is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        plan = get_question_plan(attempt.quiz)
+        content_type_ids = {'mcq': mcq_content_type_id(), 'ftq': ftq_content_type_id()}
+        positions = order_positions(attempt)
+        graded = {}
+        answered_positions = set()
+        errors = []
+        
+        for index, item in enumerate(submitted):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'error': 'Invalid answer'})
+                continue
+            try:
+                position = positions.get((content_type_ids.get(item.get('question_type')), int(item.get('question_id'))))
+            except (TypeError, ValueError):
+                position = None
+            entry = None if position is None else entry_at(attempt, plan, position)
+            if entry is None:
+                errors.append({'index': index, 'error': 'Question not found in this quiz'})
+                continue
+            try:
+                # Later entries for the same question replace earlier ones
+                graded[entry] = grade(entry, choice_id=item.get('choice_id'), free_text_response=free_text_answer(item))
+            except InvalidChoice:
+                errors.append({'index': index, 'error': 'Invalid choice'})
+                continue
+            except InvalidResponse:
+                errors.append({'index': index, 'error': 'The answer must be a string'})
+                continue
+            answered_positions.add(position)
+        
+        if errors:
+            return Response({'error': 'Invalid answers', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # Answers, the cursor and the answered bitmap buffered by the attempt state engine go to the database first
+            flush_attempt_state(attempt, plan, discard=True)
+        except AttemptBusy:
+            return self._attempt_busy()
+        
+        with transaction.atomic():
+            record_answers(attempt, graded)
+            
+            # Move the cursor to the next unanswered question after the furthest answered one,
+            # or complete the quiz once every question is answered
+            answered = save_answered(attempt, answered_positions)
+            resolve_position(attempt, plan)
+            position = next_unanswered(attempt, plan, answered, max(answered_positions))
+            if position is not None:
+                save_position(attempt, position)
+                next_question_available = True
+            else:
+                complete_attempt(attempt, plan.total_points)
+                next_question_available = False
+        
+        return Response({
+            'message': 'Quiz completed!' if not next_question_available else 'Answers submitted successfully',
+            'answers_recorded': len(graded),
+            'next_question_available': next_question_available
+        })
     
     @action(detail=True, methods=['get'])
     def results(self, request, pk=None):
@@ -259,29 +496,52 @@ class AttemptViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Calculate final score
-        total_points_earned = 0
-        for answer in attempt.answers.filter(is_correct=True):
-            if answer.question_type.model == 'mcq':
-                mcq = MCQ.objects.get(id=answer.question_id)
-                total_points_earned += mcq.points
-            elif answer.question_type.model == 'ftq':
-                ftq = FTQ.objects.get(id=answer.question_id)
-                total_points_earned += ftq.points
-        
-        attempt.score = (total_points_earned / attempt.quiz.total_points) * 100
-        attempt.save()
-        
-        serializer = AttemptResultsSerializer(attempt)
-        return Response(serializer.data)
+        return Response(attempt_results_payload(attempt))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream attempts with their answers for grading and reporting.
+        
+        URL: /api/attempts/export/?fmt=ndjson|csv&quiz=1&student=2
+             &completed_after=2024-01-01&completed_before=2024-02-01
+        Returns: NDJSON (one attempt per line, answers nested) or CSV (one row per answer)
+        """
+        export_format = request.query_params.get('fmt', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'fmt must be one of: {", ".join(EXPORT_FORMATS)}'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            attempts = filter_attempts(
+                quiz_id=int(request.query_params['quiz']) if 'quiz' in request.query_params else None,
+                student_id=int(request.query_params['student']) if 'student' in request.query_params else None,
+                completed_after=parse_timestamp(request.query_params['completed_after']) if 'completed_after' in request.query_params else None,
+                completed_before=parse_timestamp(request.query_params['completed_before']) if 'completed_before' in request.query_params else None,
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Invalid filter value'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(iter_export(export_format, attempts), content_type=content_type_for(export_format))
+        response['Content-Disposition'] = f'attachment; filename="attempts.{export_format}"'
+        return response
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(InstrumentedViewSetMixin, AdmissionControlMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing students.
     Registration requires name+email, login requires email only.
     """
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    pagination_class = StudentPagination
+
+    def admission_scopes(self, request):
+        return {'student': self.kwargs.get('pk')}
     
     def create(self, request, *args, **kwargs):
         """Register a new student (requires name + email)."""
@@ -336,15 +596,17 @@ class StudentViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def in_progress_attempts(self, request, pk=None):
-        """Get only in-progress attempts for a specific student."""
+        """Get only in-progress attempts for a specific student, newest first, one page at a time."""
         try:
             student = self.get_object()
             in_progress_attempts = Attempt.objects.filter(
                 student=student, 
                 time_end__isnull=True
-            ).order_by('-time_start')
-            serializer = AttemptSerializer(in_progress_attempts, many=True)
-            return Response(serializer.data)
+            ).select_related('student', 'quiz')
+            paginator = AttemptPagination()
+            page = paginator.paginate_queryset(in_progress_attempts, request, view=self)
+            serializer = AttemptSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         except Student.DoesNotExist:
             return Response(
                 {'error': 'Student not found'}, 
@@ -68,20 +68,15 @@ export default function AttemptPage({ params }: AttemptPageProps) {
       setIsSubmitting(true);
       setError(null);
       
-      await attemptApi.submitAnswer(attemptId, answer);
+      const response = await attemptApi.submitAnswer(attemptId, answer);
       
-      // Try to fetch the next question
-      try {
-        const question = await attemptApi.getCurrentQuestion(attemptId);
-        setCurrentQuestion(question);
-      } catch (err: any) {
-        if (err.status === 404 || (err.message && err.message.toLowerCase().includes('quiz already completed'))) {
-          // Quiz is completed - redirect to results page
-          router.push(`/student/${studentId}/attempt/${attemptId}/results`);
-          return;
-        } else {
-          throw err; // Re-throw other errors
-        }
+      // The answer response carries the next question, if there is one
+      if (response.next_question_available && response.next_question) {
+        setCurrentQuestion(response.next_question);
+      } else {
+        // Quiz is completed - redirect to results page
+        router.push(`/student/${studentId}/attempt/${attemptId}/results`);
+        return;
       }
     } catch (err: any) {
       if (err.message && err.message.toLowerCase().includes('quiz already completed')) {
@@ -80,14 +80,15 @@ export const attemptApi = {
     return apiRequest<any>(`/attempts/${attemptId}/current_question/`);
   },
 
-  // Get in-progress attempts for a specific student
+  // Get in-progress attempts for a specific student (the first page, newest first)
   getStudentAttempts: async (studentId: string) => {
-    return apiRequest<any[]>(`/students/${studentId}/in_progress_attempts/`);
+    const page = await apiRequest<{ next: string | null; results: any[] }>(`/students/${studentId}/in_progress_attempts/`);
+    return page.results;
   },
 
-  // Submit an answer
+  // Submit an answer; the response includes `next_question` when one is available
   submitAnswer: async (attemptId: string, data: { choice_id?: number; free_text_response?: string }) => {
-    return apiRequest<any>(`/attempts/${attemptId}/answer/`, {
+    return apiRequest<any>(`/attempts/${attemptId}/answer/?include_next=true`, {
       method: 'POST',
       body: JSON.stringify(data),
     });